@@ -59,6 +59,115 @@ const TOOL_SPECIFICATIONS = [
     }
 ];
 
+// --- Document Chunking (RAG) ---
+// Mirrors nexus_documents.py: documents are split along headings, list items and
+// paragraphs into chunks of at most MAX_CHUNK_BYTES, each with a stable ID and its
+// UTF-8 byte offsets, so only the relevant chunks are sent to the model.
+const MAX_CHUNK_BYTES = 1200;
+const MAX_CONTEXT_CHUNKS = 3;
+
+const HEADING_PATTERN = /^\s{0,3}#{1,6}\s+\S/;
+const LIST_ITEM_PATTERN = /^\s*(?:\d+[.)]|[-*•]|[a-zA-Z][.)])\s+/;
+
+const textEncoder = new TextEncoder();
+const byteLength = (text) => textEncoder.encode(text).length;
+
+// FNV-1a hash of the chunk text, so a chunk keeps its ID as long as its text is unchanged
+const hashText = (text) => {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) {
+        hash ^= text.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    return hash.toString(16).padStart(8, '0');
+};
+
+// Splits [start, end) into pieces of at most MAX_CHUNK_BYTES, preferring sentence ends
+const splitOversized = (text, start, end) => {
+    const pieces = [];
+    while (byteLength(text.slice(start, end)) > MAX_CHUNK_BYTES) {
+        let limit = start + MAX_CHUNK_BYTES;
+        while (byteLength(text.slice(start, limit)) > MAX_CHUNK_BYTES) limit--;
+        const window = text.slice(start, limit);
+        const sentenceEnd = Math.max(window.lastIndexOf('. '), window.lastIndexOf('! '), window.lastIndexOf('? '));
+        const cut = sentenceEnd > 0 ? start + sentenceEnd + 1 : (window.lastIndexOf(' ') > 0 ? start + window.lastIndexOf(' ') : limit);
+        pieces.push({ start, end: cut });
+        start = cut;
+        while (start < end && /\s/.test(text[start])) start++;
+    }
+    if (start < end) pieces.push({ start, end });
+    return pieces;
+};
+
+const chunkDocument = (doc) => {
+    const text = doc.content || '';
+    const lines = text.split('\n');
+    const isBlank = (i) => i < 0 || i >= lines.length || !lines[i].trim();
+
+    // 1. Split into heading, list item and paragraph blocks (character offsets)
+    const blocks = [];
+    let current = null;
+    let offset = 0;
+    lines.forEach((line, i) => {
+        const start = offset;
+        const end = offset + line.replace(/\r$/, '').length;
+        offset += line.length + 1;
+        const trimmed = line.trim();
+
+        if (!trimmed) {
+            if (current) blocks.push(current);
+            current = null;
+        } else if (HEADING_PATTERN.test(line) || (isBlank(i - 1) && isBlank(i + 1) && trimmed.length <= 80
+                && !/[.,;:!?]$/.test(trimmed) && !LIST_ITEM_PATTERN.test(line))) {
+            if (current) blocks.push(current);
+            current = null;
+            blocks.push({ kind: 'heading', start, end });
+        } else if (LIST_ITEM_PATTERN.test(line)) {
+            if (current) blocks.push(current);
+            current = { kind: 'item', start, end };
+        } else if (current) {
+            current.end = end; // Continuation of a paragraph or wrapped list item
+        } else {
+            current = { kind: 'paragraph', start, end };
+        }
+    });
+    if (current) blocks.push(current);
+
+    // 2. Pack blocks into bounded chunks; a heading always opens a new chunk
+    const chunks = [];
+    let heading = '';
+    let span = null;
+    const emit = ({ start, end }) => {
+        const chunkText = text.slice(start, end);
+        chunks.push({
+            id: `${doc.id}#${hashText(chunkText)}`,
+            title: doc.title,
+            heading,
+            startByte: byteLength(text.slice(0, start)),
+            endByte: byteLength(text.slice(0, end)),
+            text: chunkText,
+        });
+    };
+    blocks.forEach(block => {
+        if (block.kind === 'heading') {
+            if (span) emit(span);
+            heading = text.slice(block.start, block.end).replace(/^\s*#+/, '').trim();
+            span = { start: block.start, end: block.end };
+            return;
+        }
+        splitOversized(text, block.start, block.end).forEach(piece => {
+            if (span && byteLength(text.slice(span.start, piece.end)) <= MAX_CHUNK_BYTES) {
+                span.end = piece.end;
+            } else {
+                if (span) emit(span);
+                span = { ...piece };
+            }
+        });
+    });
+    if (span) emit(span);
+    return chunks;
+};
+
 // --- Mock initial history ---
 const INITIAL_HISTORY = [
     {
@@ -272,24 +381,36 @@ const App = () => {
     };
 
     // 3. Document Context Retriever (Local Function for the Model)
+    // Documents are chunked once per Knowledge Base change, not on every tool call
+    const documentChunks = useMemo(() => documents.flatMap(chunkDocument), [documents]);
+
     const retrieveDocumentContext = useCallback((query) => {
-        // Simple search: find documents where the query appears in title or content
-        const searchResults = documents.filter(doc => 
-            doc.title.toLowerCase().includes(query.toLowerCase()) || 
-            doc.content.toLowerCase().includes(query.toLowerCase())
-        ).slice(0, 3); // Limit to top 3 relevant documents
+        // Simple search: rank chunks by how many query terms appear in their title, heading or text,
+        // with chunks containing the whole query first
+        const phrase = query.toLowerCase();
+        const terms = (phrase.match(/\w+/g) || []).filter(term => term.length > 2);
+        const searchResults = documentChunks
+            .map(chunk => {
+                const haystack = `${chunk.title}\n${chunk.heading}\n${chunk.text}`.toLowerCase();
+                let score = haystack.includes(phrase) ? terms.length + 1 : 0;
+                terms.forEach(term => { if (haystack.includes(term)) score += 1; });
+                return { chunk, score };
+            })
+            .filter(result => result.score > 0)
+            .sort((a, b) => b.score - a.score)
+            .slice(0, MAX_CONTEXT_CHUNKS); // Limit to the top relevant chunks
 
         if (searchResults.length === 0) {
             return JSON.stringify({ context: "No relevant private documents found in the knowledge base." });
         }
 
-        // Concatenate results for the model to use as RAG context
-        const context = searchResults.map(doc => 
-            `--- Document: ${doc.title} ---\n${doc.content}\n---`
+        // Concatenate only the matching chunks for the model to use as RAG context
+        const context = searchResults.map(({ chunk }) => 
+            `--- Document: ${chunk.title} (chunk ${chunk.id}, bytes ${chunk.startByte}-${chunk.endByte}) ---\n${chunk.text}\n---`
         ).join('\n\n');
 
         return JSON.stringify({ context: context });
-    }, [documents]);
+    }, [documentChunks]);
 
     // --- Core Chat Logic ---
     
@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import numpy as np
+
+from nexus_ann import IVFIndex
+from nexus_vectors import VectorIndex, normalize
+
+# --- ANN Recall / Latency Benchmark ---
+# Compares the IVF index with exact search on a clustered synthetic corpus (real
+# embeddings cluster by topic; uniform random vectors would be a worst case).
+# spread is the typical distance of a chunk from its topic centre.
+# For each nprobe it reports recall@k against exact search and p50/p99 latency.
+# Run from the repo root:  python -m benchmarks.ann_search
+
+
+def make_corpus(size, dimensions, topics, rng, spread=0.5):
+    centers = normalize(rng.standard_normal((topics, dimensions), dtype=np.float32))
+    labels = rng.integers(0, topics, size=size)
+    noise = rng.standard_normal((size, dimensions), dtype=np.float32) * (spread / np.sqrt(dimensions))
+    return normalize(centers[labels] + noise)
+
+
+def timed_search(index, queries, k, **kwargs):
+    results, samples = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(index.search(query, k, **kwargs)[0])
+        samples.append(time.perf_counter() - started)
+    return results, np.percentile(samples, 50) * 1e3, np.percentile(samples, 99) * 1e3
+
+
+def recall(approximate, exact, k):
+    found = sum(len({key for key, _ in a} & {key for key, _ in e[:k]}) for a, e in zip(approximate, exact))
+    return found / (k * len(exact))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall@k and latency against exact search.")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = make_corpus(args.size, args.dimensions, args.topics, rng)
+    queries = make_corpus(args.queries, args.dimensions, args.topics, rng)
+    keys = list(range(args.size))
+
+    exact_index = VectorIndex(args.dimensions, capacity=args.size)
+    exact_index.add(keys, vectors)
+    exact, exact_p50, exact_p99 = timed_search(exact_index, queries, args.k)
+
+    started = time.perf_counter()
+    ivf = IVFIndex(args.dimensions, train_threshold=args.size)
+    ivf.add(keys, vectors)
+    build_seconds = time.perf_counter() - started
+
+    print(f"{args.size:,} vectors, {args.dimensions} dims, {len(ivf.lists)} lists "
+          f"(IVF build {build_seconds:.1f} s)")
+    print(f"{'search':>12} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_p50:>8.2f} {exact_p99:>8.2f}")
+    for nprobe in args.nprobe:
+        approximate, p50, p99 = timed_search(ivf, queries, args.k, nprobe=nprobe)
+        print(f"{'nprobe=' + str(nprobe):>12} {recall(approximate, exact, args.k):>10.3f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from nexus_client import BASE_URL_ENV
+
+# --- Streamlit Load Benchmark ---
+# How many concurrent users one Streamlit process serves. The benchmark starts
+# nexus_app.py with `streamlit run` and the stand-in in processes of their own,
+# then opens N sessions the way browsers do: a websocket to /_stcore/stream per
+# user, a first script run, and one rerun per prompt carrying the chat input's
+# widget state. Every simulated user plays a short scripted conversation; all of
+# them start together. For each concurrency level the benchmark reports turns/s,
+# the p50/p99 time from sending a prompt to the first streamed text and to the
+# end of the rerun, and the CPU cores and resident memory of the Streamlit
+# process (from /proc, so Linux only). The last is the scaling curve for
+# capacity planning; --json writes it out.
+#
+# Prompts carry the session number and the semantic cache is switched off, so
+# every turn goes to the model unless --cache-hits is given. The app saves the
+# conversations to a temporary database.
+# Run from the repo root:  python -m benchmarks.app_load --sessions 1 4 16 64
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nexus_app.py")
+TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+SCRIPT = [
+    "Draft a short status note for project {number}.",
+    "Make it more formal and add a line about the budget.",
+    "Summarize it in two bullet points.",
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError(f"{process.args[2]} did not start on port {port}")
+            time.sleep(0.1)
+
+
+def start_servers(args, directory):
+    """Starts the stand-in and the Streamlit app, saving to directory; returns both processes and the app's port."""
+    stub_port, app_port = free_port(), free_port()
+    stub = subprocess.Popen([sys.executable, "-m", "nexus_stub_server", "--port", str(stub_port),
+                             "--ttft", str(args.ttft), "--tokens-per-second", str(args.tokens_per_second),
+                             "--reply-tokens", str(args.reply_tokens), "--function-calls", "never"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(stub_port, stub)
+    env = dict(os.environ, **{BASE_URL_ENV: f"http://127.0.0.1:{stub_port}"},
+               NEXUS_CONVERSATIONS_DB=os.path.join(directory, "conversations.db"))
+    if not args.cache_hits:
+        env["NEXUS_SEMANTIC_CACHE_THRESHOLD"] = "2"  # Above any cosine similarity
+    app = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP, "--server.headless=true",
+                            f"--server.port={app_port}", "--server.enableXsrfProtection=false",
+                            "--browser.gatherUsageStats=false"],
+                           env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(app_port, app)
+    return stub, app, app_port
+
+
+def process_usage(pid):
+    """(CPU seconds, resident bytes) of a process, from /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/statm") as f:
+        resident = int(f.read().split()[1])
+    return (int(fields[11]) + int(fields[12])) / TICKS, resident * PAGE_SIZE
+
+
+class Session:
+    """One simulated browser tab."""
+
+    def __init__(self, port):
+        self.port = port
+        self.socket = None
+        self.chat_input = None
+
+    async def open(self):
+        self.socket = await websockets.connect(f"ws://127.0.0.1:{self.port}/_stcore/stream",
+                                               subprotocols=["streamlit"], max_size=None)
+        await self.rerun()
+
+    async def rerun(self, prompt=None):
+        """Runs the script, with prompt submitted in the chat input; returns (first text, finished) times."""
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        if prompt is not None:
+            widget = WidgetState(id=self.chat_input)
+            widget.chat_input_value.data = prompt
+            message.rerun_script.widget_states.widgets.append(widget)
+        started = time.perf_counter()
+        await self.socket.send(message.SerializeToString())
+
+        first_text, prompt_shown = None, False
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.socket.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                return first_text, time.perf_counter() - started
+            if kind != "delta" or forward.delta.WhichOneof("type") != "new_element":
+                continue
+            element = forward.delta.new_element
+            element_kind = element.WhichOneof("type")
+            if element_kind == "chat_input":
+                self.chat_input = element.chat_input.id
+            elif element_kind == "exception":
+                raise RuntimeError(f"{element.exception.type}: {element.exception.message}")
+            elif element_kind == "markdown" and prompt is not None and first_text is None:
+                # The prompt is echoed first; the next markdown is the answer's first chunk
+                if element.markdown.body == prompt:
+                    prompt_shown = True
+                elif prompt_shown:
+                    first_text = time.perf_counter() - started
+
+    async def close(self):
+        await self.socket.close()
+
+
+async def run_session(port, number, think_time, records):
+    session = Session(port)
+    try:
+        await session.open()
+    except Exception as e:
+        records.append({"session": number, "turn": None, "error": f"{type(e).__name__}: {e}"})
+        return
+    try:
+        for turn, prompt in enumerate(SCRIPT):
+            record = {"session": number, "turn": turn, "error": None}
+            try:
+                record["ttft_seconds"], record["wait_seconds"] = await session.rerun(prompt.format(number=number))
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+            records.append(record)
+            if record["error"] is not None:
+                return
+            await asyncio.sleep(think_time)
+    finally:
+        await session.close()
+
+
+async def run_level(port, pid, sessions, think_time, offset):
+    records = []
+    peak_rss = 0
+    cpu_before, _ = process_usage(pid)
+    started = time.perf_counter()
+    level = asyncio.gather(*(run_session(port, offset + number, think_time, records) for number in range(sessions)))
+    while not level.done():
+        # Sample the server's memory while the level runs
+        peak_rss = max(peak_rss, process_usage(pid)[1])
+        await asyncio.wait([level], timeout=0.2)
+    wall = time.perf_counter() - started
+    cpu_after, rss = process_usage(pid)
+
+    completed = [record for record in records if record["error"] is None]
+    waits = [record["wait_seconds"] for record in completed]
+    ttfts = [record["ttft_seconds"] for record in completed if record["ttft_seconds"] is not None]
+
+    def stat(values, q):
+        return float(np.percentile(values, q)) if values else None
+
+    return {
+        "sessions": sessions,
+        "turns": len(records),
+        "errors": len(records) - len(completed),
+        "wall_seconds": wall,
+        "turns_per_second": len(completed) / wall,
+        "ttft_p50_seconds": stat(ttfts, 50),
+        "ttft_p99_seconds": stat(ttfts, 99),
+        "wait_p50_seconds": stat(waits, 50),
+        "wait_p99_seconds": stat(waits, 99),
+        "cpu_cores": (cpu_after - cpu_before) / wall,
+        "cpu_ms_per_turn": (cpu_after - cpu_before) / len(completed) * 1e3 if completed else None,
+        "rss_bytes": rss,
+        "peak_rss_bytes": max(peak_rss, rss),
+        "error_samples": sorted({record["error"] for record in records if record["error"] is not None})[:3],
+    }
+
+
+async def sweep(port, pid, levels, think_time):
+    # Warm-up: the first session imports the app's modules and fills the shared resources
+    await run_level(port, pid, 1, 0.0, offset=-1)
+    print(f"{'sessions':>8} {'turns/s':>8} {'ttft p50':>9} {'ttft p99':>9} {'wait p50':>9} {'wait p99':>9} "
+          f"{'cpu cores':>9} {'cpu ms/turn':>11} {'peak MB':>8} {'errors':>6}")
+    curve, offset = [], 0
+    for sessions in levels:
+        level = await run_level(port, pid, sessions, think_time, offset)
+        offset += sessions
+        curve.append(level)
+        cells = " ".join(f"{level[key]:>9.2f}" if level[key] is not None else f"{'-':>9}"
+                         for key in ("ttft_p50_seconds", "ttft_p99_seconds", "wait_p50_seconds", "wait_p99_seconds"))
+        print(f"{sessions:>8} {level['turns_per_second']:>8.2f} {cells} {level['cpu_cores']:>9.2f} "
+              f"{level['cpu_ms_per_turn'] or 0:>11.0f} {level['peak_rss_bytes'] / 1e6:>8.0f} {level['errors']:>6}")
+        for sample in level["error_samples"]:
+            print(f"    {sample}")
+    return curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent browser sessions of nexus_app.py against the stand-in.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64],
+                        help="Concurrency levels, in simulated users.")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a user waits between turns.")
+    parser.add_argument("--ttft", type=float, default=0.4)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--cache-hits", action="store_true", help="Keep the semantic cache on.")
+    parser.add_argument("--json", help="Write the scaling curve here.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        stub, app, port = start_servers(args, directory)
+        try:
+            curve = asyncio.run(sweep(port, app.pid, args.sessions, args.think_time))
+        finally:
+            app.terminate()
+            stub.terminate()
+            app.wait()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "curve": curve}, f, indent=2)
+        print(f"Scaling curve written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from nexus_stub_server import start_stub_server
+
+# --- Streamlit Rerun Benchmark ---
+# Cost of one rerun of nexus_app.py, as any widget interaction triggers, for a
+# resumed conversation of N saved messages: the app renders only the latest page
+# (nexus_conversations.PAGE_SIZE), so the time should not grow with N, while the
+# old loop rendered every message. --all-pages also opens every earlier page,
+# which is what rendering the whole history costs. Uses a temporary database and
+# a headless AppTest session.
+# Run from the repo root:  python -m benchmarks.app_rerun
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rerun time of the app against conversation length.")
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--all-pages", action="store_true", help="Render the whole history as well.")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.update(NEXUS_GEMINI_BASE_URL=server.base_url,
+                          NEXUS_CONVERSATIONS_DB=os.path.join(directory, "conversations.db"))
+        from streamlit.testing.v1 import AppTest
+
+        from nexus_conversations import PAGE_SIZE, ConversationStore
+
+        store = ConversationStore()
+        app_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nexus_app.py")
+        print(f"{'messages':>9} {'rerun ms':>9} {'rendered':>9}" + (f" {'all pages ms':>13}" if args.all_pages else ""))
+        for count in args.messages:
+            conversation = uuid.uuid4().hex
+            store.append(conversation, [{"role": "user" if i % 2 else "assistant",
+                                         "content": f"Message {i}: " + "Some **markdown** text. " * 20}
+                                        for i in range(count)], 0)
+            app = AppTest.from_file(app_path, default_timeout=60)
+            app.query_params["conversation"] = conversation
+            app.run()
+            times = []
+            for _ in range(args.reruns):
+                started = time.perf_counter()
+                app.run()
+                times.append(time.perf_counter() - started)
+            line = f"{count:>9} {np.median(times) * 1e3:>9.0f} {len(app.chat_message):>9}"
+            if args.all_pages:
+                app.session_state.earlier_pages = count // PAGE_SIZE + 1
+                started = time.perf_counter()
+                app.run()
+                line += f" {(time.perf_counter() - started) * 1e3:>13.0f}"
+            print(line)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
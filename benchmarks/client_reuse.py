@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+from google import genai
+from google.genai import types
+
+from nexus_client import BASE_URL_ENV, STUB_API_KEY, get_base_url, make_client
+from nexus_engine import ChatEngine
+from nexus_metrics import response_hook
+from nexus_stub_server import StubConfig, start_stub_server
+
+# --- Client Reuse Benchmark ---
+# Time to first token by turn of a conversation, with a new client for every
+# turn (what nexus_app.py did while it rebuilt its client on every rerun), with
+# one client on httpx's default pool and with one client on the tuned pool of
+# nexus_client.py. setup is the time from sending a request to its response
+# headers, where a cold connection pays for the TCP (and, against the live API,
+# TLS) handshake; build is the construction of the client itself (its SSL
+# context and certificate store), paid before the turn starts and so included
+# in the time to first token the user sees. Against the
+# stand-in there is no TLS, so the live API (--live, needs GEMINI_API_KEY) shows
+# the larger gap. With --think-time above 5 s between turns, the default pool
+# has closed its idle connection by the next turn and pays the handshake again.
+# Run from the repo root:  python -m benchmarks.client_reuse
+
+
+def default_pool_client():
+    """A client on httpx's connection defaults (5 s keep-alive, 20 idle connections), as make_client() built before."""
+    base_url = get_base_url()
+    http_options = types.HttpOptions(base_url=base_url,
+                                     async_client_args={"event_hooks": {"response": [response_hook]}})
+    return genai.Client(api_key=STUB_API_KEY if base_url else None, http_options=http_options)
+
+
+async def conversation(engine_for_turn, turns, think_time):
+    """Plays one conversation; returns the TurnMetrics and client build seconds of every turn."""
+    messages, metrics, builds = [], [], []
+    for turn in range(turns):
+        started = time.perf_counter()
+        engine = engine_for_turn()
+        builds.append(time.perf_counter() - started)
+        chat = engine.conversation(messages)
+        async for _ in engine.reply(chat, f"Draft part {turn + 1} of the weekly update."):
+            pass
+        metrics.append(chat.metrics[-1])
+        await asyncio.sleep(think_time)
+    return metrics, builds
+
+
+async def run(model, conversations, turns, think_time):
+    def engine(client):
+        return ChatEngine(client, model, "You are Nexus.")
+
+    shared, default_pool = make_client(), default_pool_client()
+    variants = {
+        "client per turn": lambda: engine(make_client()),
+        "shared, httpx defaults": lambda: engine(default_pool),
+        "shared, tuned pool": lambda: engine(shared),
+    }
+    print(f"{'variant':<24} {'build ms':>9} {'turn 1 ttft':>12} {'later ttft':>11} {'turn 1 setup':>13} "
+          f"{'later setup':>12}")
+    for name, engine_for_turn in variants.items():
+        first, later, builds = [], [], []
+        for _ in range(conversations):
+            metrics, built = await conversation(engine_for_turn, turns, think_time)
+            turns_seen = [(m.ttft_seconds + seconds, m.setup_seconds) for m, seconds in zip(metrics, built)]
+            first.append(turns_seen[0])
+            later.extend(turns_seen[1:])
+            builds.extend(built)
+        (first_ttft, first_setup), (later_ttft, later_setup) = np.median(first, axis=0), np.median(later, axis=0)
+        print(f"{name:<24} {np.mean(builds) * 1e3:>9.1f} {first_ttft * 1e3:>9.0f} ms {later_ttft * 1e3:>8.0f} ms "
+              f"{first_setup * 1e3:>10.1f} ms {later_setup * 1e3:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first token with fresh and shared clients.")
+    parser.add_argument("--conversations", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds between turns.")
+    parser.add_argument("--live", action="store_true", help="Use the live API instead of the stand-in.")
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    args = parser.parse_args()
+
+    server = None
+    if not args.live:
+        server = start_stub_server(StubConfig(ttft=0.2, tokens_per_second=0, reply_tokens=20))
+        os.environ[BASE_URL_ENV] = server.base_url
+    try:
+        asyncio.run(run(args.model, args.conversations, args.turns, args.think_time))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
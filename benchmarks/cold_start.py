@@ -0,0 +1,70 @@
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from nexus_documents import load_store
+from nexus_index_store import save_index
+from nexus_retrieval import build_retriever, load_retriever, semantic_part
+
+# --- Cold Start Benchmark ---
+# Time until the first answer, when the retriever is built from the raw files and
+# when the saved index is mapped instead, on synthetic corpora written to a
+# temporary document root. The mapped files are in the page cache here (as they
+# are for every process after the first); the build path reads the files from
+# the page cache as well.
+# Run from the repo root:  python -m benchmarks.cold_start
+
+
+def write_corpus(root, files, sections, rng, vocabulary=20_000):
+    words = [f"w{i}" for i in range(vocabulary)]
+    for number in range(files):
+        parts = []
+        for section in range(sections):
+            ranks = np.minimum(rng.zipf(1.2, size=120) - 1, vocabulary - 1)
+            parts.append(f"## Section {section}\n\n" + " ".join(words[i] for i in ranks))
+        with open(os.path.join(root, f"doc{number:06d}.md"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start: build from files against mapping the saved index.")
+    parser.add_argument("--files", type=int, nargs="+", default=[500, 2_000, 10_000])
+    parser.add_argument("--sections", type=int, default=8, help="Sections (about one chunk each) per file.")
+    parser.add_argument("--mode", default="hybrid", choices=["bm25", "semantic", "hybrid"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'files':>7} {'chunks':>8} {'build s':>8} {'save s':>7} {'map ms':>7} {'first query ms':>15}")
+    for files in args.files:
+        with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as index_dir:
+            write_corpus(root, files, args.sections, rng)
+
+            started = time.perf_counter()
+            store = load_store(root)
+            retriever = build_retriever(store, mode=args.mode, backend="local")
+            retriever.search("w1 w20 w300", 5)
+            build_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            save_index(index_dir, store, semantic_part(retriever))
+            save_seconds = time.perf_counter() - started
+
+            del retriever
+            gc.collect()  # Keep collection of the built index out of the mapped timings
+            started = time.perf_counter()
+            mapped = load_retriever(index_dir, mode=args.mode, backend="local")
+            map_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            mapped.search("w1 w20 w300", 5)
+            query_seconds = time.perf_counter() - started
+
+            print(f"{files:>7,} {len(store):>8,} {build_seconds:>8.2f} {save_seconds:>7.2f} "
+                  f"{map_seconds * 1e3:>7.2f} {query_seconds * 1e3:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+# --- Benchmark Comparison ---
+# Compares two result files (nexus_test.py --json, or the NEXUS_TIMINGS files of
+# the front ends, see nexus_metrics.TimingRecorder) and exits with status 1 when
+# the candidate regressed, so it can gate a change:
+#
+#     python nexus_test.py --stub --repeat 5 --concurrency 4 --json candidate.json
+#     python -m benchmarks.compare stub candidate.json
+#
+# Reference runs are committed as benchmarks/baselines/<name>.json and can be
+# named without the path; the command that produced one is in its "settings".
+# Refresh a baseline in the same commit as a change that is meant to move it.
+#
+# Per-turn metrics are compared by bootstrap: the completed turns of both runs
+# are resampled with replacement, and the 2.5th/97.5th percentiles of the
+# relative change of the statistic give its 95% confidence interval. A metric
+# regresses when its change is worse than the threshold and the interval lies
+# entirely on the worse side of no change, so noise alone does not fail a run.
+# Whole-run numbers (throughput, peak memory) have one value per run and are
+# compared against the threshold directly.
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# name -> (turn record field, percentile, higher is better)
+TURN_METRICS = {
+    "ttft_p50": ("ttft_seconds", 0.5, False),
+    "ttft_p99": ("ttft_seconds", 0.99, False),
+    "total_p50": ("total_seconds", 0.5, False),
+    "total_p99": ("total_seconds", 0.99, False),
+    "tokens_per_second_p50": ("tokens_per_second", 0.5, True),
+    "rss_p50": ("rss_bytes", 0.5, False),
+}
+# name -> (getter on the result file, higher is better)
+RUN_METRICS = {
+    "turns_per_second": (lambda result: result["summary"].get("turns_per_second"), True),
+    "peak_rss": (lambda result: (result.get("memory") or {}).get("peak_rss_bytes"), False),
+}
+
+
+def load(path):
+    if not os.path.exists(path) and os.path.exists(os.path.join(BASELINE_DIR, path + ".json")):
+        path = os.path.join(BASELINE_DIR, path + ".json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def turn_values(result, field):
+    return np.array([turn[field] for turn in result["turns"]
+                     if turn.get("error") is None and turn.get(field) is not None], dtype=float)
+
+
+def nearest_rank(samples, fraction):
+    """Nearest-rank percentile along the last axis (as nexus_metrics.percentile)."""
+    ordered = np.sort(samples, axis=-1)
+    return ordered[..., min(samples.shape[-1] - 1, int(fraction * samples.shape[-1]))]
+
+
+def bootstrap_change(baseline, candidate, fraction, resamples, rng):
+    """Relative change of the percentile from baseline to candidate, with its 95% interval."""
+    change = nearest_rank(candidate, fraction) / nearest_rank(baseline, fraction) - 1
+    base = nearest_rank(rng.choice(baseline, (resamples, len(baseline))), fraction)
+    cand = nearest_rank(rng.choice(candidate, (resamples, len(candidate))), fraction)
+    low, high = np.percentile(cand / base - 1, [2.5, 97.5])
+    return change, (low, high)
+
+
+def compare(baseline, candidate, thresholds, default_threshold, resamples=2000, seed=0):
+    """One row per metric: name, baseline, candidate, change, interval, threshold, verdict."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for name, (field, fraction, higher_is_better) in TURN_METRICS.items():
+        threshold = thresholds.get(name, default_threshold)
+        base, cand = turn_values(baseline, field), turn_values(candidate, field)
+        if not len(base) or not len(cand) or not nearest_rank(base, fraction):
+            rows.append((name, None, None, None, None, threshold, "skipped"))
+            continue
+        change, (low, high) = bootstrap_change(base, cand, fraction, resamples, rng)
+        # Express "worse" as a positive change for both directions
+        worse, worse_low = (-change, -high) if higher_is_better else (change, low)
+        regressed = worse > threshold and worse_low > 0
+        rows.append((name, nearest_rank(base, fraction), nearest_rank(cand, fraction), change, (low, high),
+                     threshold, "REGRESSED" if regressed else "ok"))
+    for name, (getter, higher_is_better) in RUN_METRICS.items():
+        threshold = thresholds.get(name, default_threshold)
+        base, cand = getter(baseline), getter(candidate)
+        if not base or cand is None:
+            rows.append((name, base, cand, None, None, threshold, "skipped"))
+            continue
+        change = cand / base - 1
+        worse = -change if higher_is_better else change
+        rows.append((name, base, cand, change, None, threshold, "REGRESSED" if worse > threshold else "ok"))
+    return rows
+
+
+def print_rows(rows):
+    print(f"{'metric':<22} {'baseline':>12} {'candidate':>12} {'change':>8} {'95% CI':>17} {'limit':>6}  verdict")
+    for name, base, cand, change, interval, threshold, verdict in rows:
+        cells = [f"{value:>12.4g}" if value is not None else f"{'-':>12}" for value in (base, cand)]
+        change_cell = f"{change:>+8.1%}" if change is not None else f"{'-':>8}"
+        interval_cell = f"[{interval[0]:+.1%}, {interval[1]:+.1%}]" if interval else "-"
+        print(f"{name:<22} {' '.join(cells)} {change_cell} {interval_cell:>17} {threshold:>6.0%}  {verdict}")
+
+
+def parse_thresholds(pairs):
+    thresholds = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        if name not in TURN_METRICS and name not in RUN_METRICS:
+            raise SystemExit(f"Unknown metric {name!r}; choose from {', '.join([*TURN_METRICS, *RUN_METRICS])}")
+        thresholds[name] = float(value)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files; exit 1 on a regression.")
+    parser.add_argument("baseline", help="Result file, or the name of one in benchmarks/baselines/.")
+    parser.add_argument("candidate", help="Result file to check against the baseline.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative worsening of every metric (default 0.10).")
+    parser.add_argument("--metric-threshold", action="append", default=[], metavar="NAME=VALUE",
+                        help="Allowed worsening for one metric, e.g. ttft_p99=0.25; repeatable.")
+    parser.add_argument("--resamples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    for label, result in (("baseline", baseline), ("candidate", candidate)):
+        summary = result["summary"]
+        print(f"{label}: {summary['turns']} turns, {summary['error_rate']:.1%} errors, "
+              f"settings {json.dumps(result.get('settings', {}), sort_keys=True)}")
+    rows = compare(baseline, candidate, parse_thresholds(args.metric_threshold), args.threshold,
+                   args.resamples, args.seed)
+    print_rows(rows)
+
+    regressions = [row[0] for row in rows if row[-1] == "REGRESSED"]
+    if regressions:
+        print(f"Regressed: {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import time
+
+from nexus_history import ContentCache, estimate_tokens, to_content, window_history
+
+# --- History Conversion Micro-benchmark ---
+# Compares the per-turn cost of preparing the request history two ways:
+#   full rebuild - convert every message to types.Content on every turn (the old behaviour)
+#   incremental  - ContentCache.sync() plus the token-budgeted window
+# Run from the repo root:  python -m benchmarks.content_cache
+
+
+def make_history(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}: what changed on Project Phoenix this week?"})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "the budget and timeline are on track. " * 8})
+    return messages
+
+
+def full_rebuild(messages):
+    contents = []
+    for msg in messages:
+        text = msg.get("content", "")
+        if isinstance(text, str) and text:
+            contents.append(to_content(msg))
+    return contents, sum(estimate_tokens(msg["content"]) for msg in messages)
+
+
+def incremental(cache, messages):
+    cache.sync(messages)
+    window = window_history(messages, tokens=cache.tokens)
+    return cache.contents_for(window), window.token_count
+
+
+def time_per_turn(turns, repeats, strategy):
+    messages = make_history(turns)
+    cache = ContentCache()
+    cache.sync(messages)  # Warm: the cache already holds every earlier turn
+
+    samples = []
+    for i in range(repeats):
+        messages.append({"role": "user", "content": f"Follow-up {i}"})
+        started = time.perf_counter()
+        if strategy == "full":
+            full_rebuild(messages)
+        else:
+            incremental(cache, messages)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn history conversion cost at different conversation lengths.")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'turns':>8} {'full rebuild (us)':>18} {'incremental (us)':>17}")
+    for turns in args.turns:
+        full = time_per_turn(turns, args.repeats, "full")
+        inc = time_per_turn(turns, args.repeats, "incremental")
+        print(f"{turns:>8} {full * 1e6:>18.1f} {inc * 1e6:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from nexus_client import make_client
+from nexus_engine import ChatEngine
+from nexus_stub_server import StubConfig, start_stub_server
+
+# --- Engine Concurrency Benchmark ---
+# Conversations served by one process against the local stand-in: one turn each
+# for N conversations, all on one event loop, next to the same turns answered
+# one after another.
+# Run from the repo root:  python -m benchmarks.engine_concurrency
+
+
+async def one_turn(engine, number):
+    conversation = engine.conversation()
+    started = time.perf_counter()
+    async for _ in engine.reply(conversation, f"Draft a note to the team, number {number}"):
+        pass
+    return time.perf_counter() - started
+
+
+async def run(engine, conversations, concurrent):
+    if concurrent:
+        return await asyncio.gather(*(one_turn(engine, number) for number in range(conversations)))
+    return [await one_turn(engine, number) for number in range(conversations)]
+
+
+async def sweep(engine, sizes):
+    # One event loop throughout: the SDK's async HTTP client belongs to the loop it was first used on
+    print(f"{'conversations':>13} {'sequential s':>13} {'concurrent s':>13} {'turns/s':>8} {'p99 turn s':>11}")
+    for conversations in sizes:
+        started = time.perf_counter()
+        await run(engine, conversations, concurrent=False)
+        sequential = time.perf_counter() - started
+        started = time.perf_counter()
+        turns = await run(engine, conversations, concurrent=True)
+        concurrent = time.perf_counter() - started
+        print(f"{conversations:>13} {sequential:>13.2f} {concurrent:>13.2f} "
+              f"{conversations / concurrent:>8.1f} {np.percentile(turns, 99):>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent conversations on one event loop.")
+    parser.add_argument("--conversations", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--ttft", type=float, default=0.4)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(StubConfig(ttft=args.ttft, tokens_per_second=args.tokens_per_second, reply_tokens=40))
+    os.environ["NEXUS_GEMINI_BASE_URL"] = server.base_url
+    try:
+        asyncio.run(sweep(ChatEngine(make_client(), "gemini-2.5-flash", "You are Nexus."), args.conversations))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from nexus_embeddings import TfidfSvdEmbedder
+
+# --- Local Embedding Build Benchmark ---
+# Build time and memory of the offline TF-IDF + SVD backend on synthetic corpora
+# with a Zipf-distributed vocabulary, plus the cost of adding documents afterwards
+# (folded into the existing projection until the next refit).
+# Run from the repo root:  python -m benchmarks.local_embeddings
+
+
+def make_corpus(documents, vocabulary, length, rng):
+    words = [f"w{i}" for i in range(vocabulary)]
+    ranks = np.minimum(rng.zipf(1.2, size=(documents, length)) - 1, vocabulary - 1)
+    return [" ".join(words[i] for i in row) for row in ranks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build time and memory of TfidfSvdEmbedder.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--length", type=int, default=120, help="Words per document.")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--added", type=int, default=500, help="Documents added after the build.")
+    parser.add_argument("--trace", action="store_true",
+                        help="Also report the tracemalloc peak (slows the build down noticeably).")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'docs':>9} {'build s':>8} {'tfidf MB':>9} {'corpus MB':>10} {'model MB':>9} "
+          f"{'add ms/doc':>11} {'query ms':>9}" + (f" {'peak MB':>8}" if args.trace else ""))
+    for size in args.sizes:
+        corpus = make_corpus(size, args.vocabulary, args.length, rng)
+        extra = make_corpus(args.added, args.vocabulary, args.length, rng)
+
+        embedder = TfidfSvdEmbedder(dimensions=args.dimensions)
+        started = time.perf_counter()
+        embedder.embed_documents(corpus)
+        build_seconds = time.perf_counter() - started
+
+        peak = 0
+        if args.trace:
+            tracemalloc.start()
+            TfidfSvdEmbedder(dimensions=args.dimensions).embed_documents(corpus)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        started = time.perf_counter()
+        for i in range(0, len(extra), 50):
+            embedder.embed_documents(extra[i:i + 50])
+        add_seconds = (time.perf_counter() - started) / len(extra)
+
+        started = time.perf_counter()
+        embedder.embed_queries(extra[:100])
+        query_seconds = (time.perf_counter() - started) / 100
+
+        stats = embedder.stats
+        model_bytes = stats["components_bytes"] + embedder.idf.nbytes
+        print(f"{size:>9,} {build_seconds:>8.2f} {stats['tfidf_bytes'] / 2**20:>9.1f} "
+              f"{stats['corpus_bytes'] / 2**20:>10.1f} {model_bytes / 2**20:>9.1f} "
+              f"{add_seconds * 1e3:>11.3f} {query_seconds * 1e3:>9.3f}"
+              + (f" {peak / 2**20:>8.1f}" if args.trace else ""))
+
+    print(f"Max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.cold_start import write_corpus
+from nexus_documents import load_document, load_store
+from nexus_index_store import save_index
+from nexus_retrieval import apply_changes, build_retriever, load_retriever, semantic_part
+
+# --- Incremental Re-indexing Benchmark ---
+# Cost of making one edited file searchable: the incremental path the Reindexer
+# takes (re-chunk the file, apply it over the mapped index) against rebuilding
+# the retriever from every file. Also the query latency once changes pile up on
+# top of the saved index, before it is saved again.
+# Run from the repo root:  python -m benchmarks.reindex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental update against full rebuild after one file changes.")
+    parser.add_argument("--files", type=int, default=2_000)
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--mode", default="hybrid", choices=["bm25", "semantic", "hybrid"])
+    parser.add_argument("--edits", type=int, default=200, help="Files edited one after another.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as index_dir:
+        write_corpus(root, args.files, args.sections, rng)
+        store = load_store(root)
+        save_index(index_dir, store, semantic_part(build_retriever(store, mode=args.mode, backend="local")))
+        retriever = load_retriever(index_dir, mode=args.mode, backend="local")
+
+        started = time.perf_counter()
+        build_retriever(load_store(root), mode=args.mode, backend="local")
+        rebuild_seconds = time.perf_counter() - started
+
+        update_seconds, query_seconds = [], []
+        for number in range(args.edits):
+            filename = f"doc{number:06d}.md"
+            path = os.path.join(root, filename)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"\n\nEdited w{number} w{number + 1}")
+
+            started = time.perf_counter()
+            info = os.stat(path)
+            chunks = load_document(filename, path)
+            retriever = apply_changes(retriever, [filename], chunks, {filename: (info.st_mtime_ns, info.st_size)})
+            update_seconds.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            retriever.search("w1 w20 w300", 5)
+            query_seconds.append(time.perf_counter() - started)
+
+    print(f"{args.files:,} files, {len(store):,} chunks, mode {args.mode}")
+    print(f"Full rebuild:              {rebuild_seconds * 1e3:10.1f} ms")
+    print(f"Incremental update p50/p99: {np.percentile(update_seconds, 50) * 1e3:9.2f} / "
+          f"{np.percentile(update_seconds, 99) * 1e3:.2f} ms")
+    print(f"Query after 1 / {args.edits} edits:  {query_seconds[0] * 1e3:9.2f} / {query_seconds[-1] * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
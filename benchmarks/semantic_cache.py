@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+
+from nexus_client import make_client
+from nexus_embeddings import GeminiEmbedder, TfidfSvdEmbedder
+from nexus_response_cache import SemanticResponseCache
+from nexus_stub_server import StubConfig, start_stub_server
+
+# --- Semantic Cache Replay ---
+# Replays a prompt log through SemanticResponseCache at several similarity
+# thresholds. Every prompt is labelled with an intent; the "answer" stored for a
+# prompt is its intent, so a hit is correct when the served intent matches.
+#   hit rate        hits / prompts
+#   false-hit rate  hits that served another intent's answer / hits
+#   recall          correct hits / prompts whose intent was seen before
+# The log is JSON lines of {"prompt": ..., "intent": ...}; without --log a small
+# built-in log is used, with near-miss distractors (Phoenix vs Orion budget).
+# Embedders: "stub" (the local stand-in's hashed bag of words, offline), "gemini"
+# (the live endpoint, needs GEMINI_API_KEY) or "local" (TF-IDF + SVD fitted on the log).
+# Run from the repo root:  python -m benchmarks.semantic_cache
+
+SAMPLE_LOG = [
+    ("What's the Phoenix budget?", "phoenix-budget"),
+    ("Who is the project lead for Phoenix?", "phoenix-lead"),
+    ("What is the Orion budget?", "orion-budget"),
+    ("how much money does Project Phoenix have", "phoenix-budget"),
+    ("When is the Phoenix budget sign-off due?", "phoenix-signoff"),
+    ("Draft a thank-you email to the finance team", "email-finance"),
+    ("What's the budget for Phoenix?", "phoenix-budget"),
+    ("who leads project phoenix", "phoenix-lead"),
+    ("Summarize the Phoenix deliverables", "phoenix-deliverables"),
+    ("What are the key deliverables of Project Phoenix?", "phoenix-deliverables"),
+    ("When is the Orion budget sign-off due?", "orion-signoff"),
+    ("What is the due date for the Phoenix finance sign-off?", "phoenix-signoff"),
+    ("Write a thank-you note to finance", "email-finance"),
+    ("Who is the project lead for Orion?", "orion-lead"),
+    ("Phoenix budget?", "phoenix-budget"),
+    ("List the Phoenix project deliverables", "phoenix-deliverables"),
+    ("How often are Phoenix stakeholder meetings held?", "phoenix-meetings"),
+    ("what is the orion budget", "orion-budget"),
+    ("Are the Phoenix stakeholder meetings weekly?", "phoenix-meetings"),
+    ("Who runs Phoenix?", "phoenix-lead"),
+    ("Draft an email to the finance team", "email-finance"),
+    ("What happens in the Phoenix closure phase?", "phoenix-closure"),
+    ("Describe the closure phase of Phoenix", "phoenix-closure"),
+    ("How big is the Phoenix budget?", "phoenix-budget"),
+    ("Tell me who is leading Orion", "orion-lead"),
+]
+
+
+def load_log(path):
+    with open(path, encoding="utf-8") as f:
+        return [(entry["prompt"], entry["intent"]) for entry in map(json.loads, f) if entry]
+
+
+def replay(embedder, log, threshold):
+    cache = SemanticResponseCache(embedder, threshold=threshold)
+    hits = false_hits = possible = 0
+    seen = set()
+    for prompt, intent in log:
+        possible += intent in seen
+        cached, vector = cache.lookup("replay", prompt)
+        if cached is None:
+            cache.put("replay", prompt, vector, [intent], 0.0)
+        else:
+            hits += 1
+            false_hits += cached.text != intent
+        seen.add(intent)
+    return hits, false_hits, possible
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hit and false-hit rates of the semantic cache on a prompt log.")
+    parser.add_argument("--log", help="JSON lines of {\"prompt\", \"intent\"}; default: built-in sample.")
+    parser.add_argument("--embedder", default="stub", choices=["stub", "gemini", "local"])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.85, 0.9, 0.92, 0.95])
+    args = parser.parse_args()
+
+    log = load_log(args.log) if args.log else SAMPLE_LOG
+    server = None
+    if args.embedder == "stub":
+        server = start_stub_server(StubConfig())
+        os.environ["NEXUS_GEMINI_BASE_URL"] = server.base_url
+        embedder = GeminiEmbedder(make_client(), dimensions=256)
+    elif args.embedder == "gemini":
+        embedder = GeminiEmbedder(make_client())
+    else:
+        embedder = TfidfSvdEmbedder(dimensions=64)
+        embedder.embed_documents([prompt for prompt, _ in log])
+
+    try:
+        print(f"{len(log)} prompts, {len({intent for _, intent in log})} intents, embedder {args.embedder}")
+        print(f"{'threshold':>9} {'hits':>5} {'hit rate':>9} {'false hits':>11} {'false-hit rate':>15} {'recall':>7}")
+        for threshold in args.thresholds:
+            hits, false_hits, possible = replay(embedder, log, threshold)
+            print(f"{threshold:>9.2f} {hits:>5} {hits / len(log):>9.0%} {false_hits:>11} "
+                  f"{(false_hits / hits if hits else 0.0):>15.0%} {((hits - false_hits) / possible if possible else 0.0):>7.0%}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# --- Start-up Budget Benchmark ---
+# Start-up cost of the command-line entry points, checked against a budget:
+# the import time of each entry module (from python -X importtime, without the
+# interpreter's own start-up) and the wall time of a session that exits at once
+# (nexus_chat.py answering 'exit', nexus_test.py --help). Exits with status 1
+# when a median is over its budget, so an import that drags the SDK, numpy or
+# scipy back into start-up fails the check; the slowest imports are listed to
+# show what to move. The heavy modules load in the background (nexus_chat.py)
+# or after argument parsing (nexus_test.py), which took exiting at once from
+# about 1.5 s to 0.2 s here. The budgets leave room for slower machines.
+# Run from the repo root:  python -m benchmarks.startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (what to measure, budget in ms)
+CHECKS = {
+    "import nexus_chat": (("import", "nexus_chat"), 150),
+    "import nexus_test": (("import", "nexus_test"), 250),
+    "nexus_chat.py exit": (("run", ["nexus_chat.py"], "exit\n"), 500),
+    "nexus_test.py --help": (("run", ["nexus_test.py", "--help"], None), 500),
+}
+
+
+def import_times(statement):
+    """{module: (self us, cumulative us, depth)} from python -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative), (len(name) - len(name.lstrip())) // 2)
+    return times
+
+
+def import_cost(module):
+    """Milliseconds of top-level imports caused by importing module, and its heaviest imports."""
+    baseline = import_times("pass")
+    times = import_times(f"import {module}")
+    extra = {name: value for name, value in times.items() if name not in baseline}
+    total = sum(cumulative for _, cumulative, depth in extra.values() if depth == 0)
+    heaviest = sorted(((own, name) for name, (own, _, _) in extra.items()), reverse=True)[:5]
+    return total / 1e3, heaviest
+
+
+def run_cost(arguments, stdin):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *arguments], cwd=ROOT, input=stdin, capture_output=True, text=True,
+                   env=dict(os.environ, NEXUS_WARMUP="0"))
+    return (time.perf_counter() - started) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start-up time of the CLI entry points against a budget.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=MS",
+                        help="Override one budget, e.g. 'import nexus_chat=200'; repeatable.")
+    args = parser.parse_args()
+    budgets = {name: budget for name, (_, budget) in CHECKS.items()}
+    for pair in args.budget:
+        name, _, value = pair.rpartition("=")
+        if name not in budgets:
+            raise SystemExit(f"Unknown check {name!r}; choose from {', '.join(budgets)}")
+        budgets[name] = float(value)
+
+    over = []
+    print(f"{'check':<24} {'median ms':>10} {'budget ms':>10}")
+    for name, (measure, _) in CHECKS.items():
+        heaviest = None
+        if measure[0] == "import":
+            samples = []
+            for _ in range(args.runs):
+                milliseconds, heaviest = import_cost(measure[1])
+                samples.append(milliseconds)
+        else:
+            samples = [run_cost(measure[1], measure[2]) for _ in range(args.runs)]
+        median = float(np.median(samples))
+        verdict = "" if median <= budgets[name] else "  OVER BUDGET"
+        print(f"{name:<24} {median:>10.0f} {budgets[name]:>10.0f}{verdict}")
+        if verdict:
+            over.append(name)
+            if heaviest:
+                print("    slowest imports: " + ", ".join(f"{module} {own / 1e3:.0f} ms" for own, module in heaviest))
+
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from nexus_tools import ToolRunner
+
+# --- Concurrent Tool Calls Benchmark ---
+# Wall time of one model turn that asks for several documents at once, with the
+# calls run one after another (one worker) and side by side. Each read pays an
+# added latency standing in for a cold disk, a network share or a slow API; the
+# last row shows a turn where one call hangs past its timeout.
+# Run from the repo root:  python -m benchmarks.tool_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential against concurrent execution of one turn's tool calls.")
+    parser.add_argument("--calls", type=int, default=3, help="Function calls in the turn.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Added seconds per call.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        for number in range(args.calls):
+            with open(os.path.join(root, f"doc{number}.md"), "w", encoding="utf-8") as f:
+                f.write(f"# Document {number}\n\n" + "Budget line. " * 500)
+
+        def read_project_document(filename):
+            time.sleep(args.latency)
+            with open(os.path.join(root, filename), encoding="utf-8") as f:
+                return f.read()
+
+        def hang(filename):
+            time.sleep(args.latency * 20)
+            return ""
+
+        calls = [("read_project_document", {"filename": f"doc{number}.md"}) for number in range(args.calls)]
+        print(f"{args.calls} calls per turn, {args.latency * 1e3:.0f} ms added latency each")
+        print(f"{'runner':<24} {'p50 ms':>8} {'p90 ms':>8}")
+        for label, workers in (("sequential (1 worker)", 1), (f"concurrent ({args.workers} workers)", args.workers)):
+            runner = ToolRunner({"read_project_document": read_project_document}, max_workers=workers)
+            seconds = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results = runner.run(calls)
+                seconds.append(time.perf_counter() - started)
+            assert [result[:12] for result in results] == [f"# Document {n}" for n in range(args.calls)]
+            runner.shutdown()
+            print(f"{label:<24} {np.percentile(seconds, 50) * 1e3:>8.1f} {np.percentile(seconds, 90) * 1e3:>8.1f}")
+
+        runner = ToolRunner({"read_project_document": read_project_document, "hang": hang},
+                            max_workers=args.workers, timeouts={"hang": args.latency * 4})
+        started = time.perf_counter()
+        results = runner.run(calls + [("hang", {"filename": "doc0.md"})])
+        print(f"{'with one hung call':<24} {(time.perf_counter() - started) * 1e3:>8.1f}           -> {results[-1]}")
+        runner.shutdown()
+
+
+if __name__ == "__main__":
+    main()
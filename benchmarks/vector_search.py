@@ -0,0 +1,64 @@
+import argparse
+import time
+
+import numpy as np
+
+from nexus_vectors import VectorIndex
+
+# --- Vector Search Benchmark ---
+# Query latency of the exact VectorIndex at growing corpus sizes, on CPU, with
+# random unit vectors. Reports single-query latency and per-query cost when
+# queries are answered in batches.
+# Run from the repo root:  python -m benchmarks.vector_search
+# At 1M chunks the matrix alone is 1M x dimensions x 4 bytes (3 GB at 768).
+
+
+def build(size, dimensions, rng):
+    index = VectorIndex(dimensions, capacity=size)
+    step = 100_000
+    for start in range(0, size, step):
+        count = min(step, size - start)
+        index.add(list(range(start, start + count)), rng.standard_normal((count, dimensions), dtype=np.float32))
+    return index
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1e3, q))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact vector search latency at 10k / 100k / 1M chunks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50, help="Single queries timed per size.")
+    parser.add_argument("--batch", type=int, default=32, help="Queries per batched call.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>10} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'batched ms/query':>17}")
+    for size in args.sizes:
+        started = time.perf_counter()
+        index = build(size, args.dimensions, rng)
+        build_seconds = time.perf_counter() - started
+
+        queries = rng.standard_normal((args.queries, args.dimensions), dtype=np.float32)
+        index.search(queries[:1], args.k)  # Warm-up
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, args.k)
+            samples.append(time.perf_counter() - started)
+
+        batch = rng.standard_normal((args.batch, args.dimensions), dtype=np.float32)
+        started = time.perf_counter()
+        index.search(batch, args.k)
+        batched = (time.perf_counter() - started) / args.batch
+
+        print(f"{size:>10,} {build_seconds:>8.2f} {percentile(samples, 50):>8.2f} "
+              f"{percentile(samples, 99):>8.2f} {batched * 1e3:>17.3f}")
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from nexus_stub_server import StubConfig, start_stub_server
+
+# --- Warm-up Benchmark ---
+# Latency of the first turn of a fresh CLI-like process, with the start-up
+# warm-up (nexus_warmup.py) and without. Every sample is a new process with the
+# engine set up as in nexus_chat.py (document tools, semantic cache); it waits
+# --think-time seconds, as a user reading the welcome message and typing would,
+# and then asks a question that searches the documents. The stand-in runs in
+# this process and a synthetic corpus is written to a temporary document root;
+# a first, discarded process saves its index (to a temporary directory too) so
+# every sample maps it.
+# Run from the repo root:  python -m benchmarks.warmup
+
+PROMPT = "What is the budget in the Phoenix project documents?"
+
+
+def child(warm, think_time):
+    """One sample: prints the first turn's latency record (and the warm-up steps) as JSON."""
+    from nexus_client import shared_client
+    from nexus_engine import ChatEngine
+    from nexus_response_cache import SemanticResponseCache
+    from nexus_retrieval import document_changes, prompt_embedder
+    from nexus_tools import DOCUMENT_TOOLS, ToolRunner
+    from nexus_warmup import warm_up
+
+    client = shared_client()
+    embedder = prompt_embedder(client)
+    engine = ChatEngine(client, "gemini-2.5-flash", "You are Nexus.", temperature=0.3,
+                        tool_runner=ToolRunner(DOCUMENT_TOOLS), match_history=False,
+                        semantic_cache=SemanticResponseCache(embedder, changes=document_changes))
+
+    async def run():
+        warmup = asyncio.create_task(warm_up(client, engine.model)) if warm else None
+        await asyncio.sleep(think_time)
+        conversation = engine.conversation()
+        async for _ in engine.reply(conversation, PROMPT):
+            pass
+        steps = warmup.result() if warmup is not None and warmup.done() else None
+        return {**conversation.metrics[-1].as_dict(), "warmup": steps}
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def write_corpus(root, files):
+    with open(os.path.join(root, "Phoenix_Project_Summary.txt"), "w", encoding="utf-8") as f:
+        f.write("# Phoenix\n\nThe Phoenix project budget is 1.2 million for the fiscal year.\n")
+    for number in range(files):
+        with open(os.path.join(root, f"notes{number:04d}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Notes {number}\n\n" + f"Meeting {number} covered hiring, vendors and planning. " * 40)
+
+
+def sample(env, warm, think_time):
+    command = [sys.executable, "-m", "benchmarks.warmup", "--child", "warm" if warm else "cold",
+               "--think-time", str(think_time)]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="First-turn latency of a fresh process with and without warm-up.")
+    parser.add_argument("--runs", type=int, default=5, help="Processes per variant.")
+    parser.add_argument("--think-time", type=float, default=2.0)
+    parser.add_argument("--files", type=int, default=500, help="Synthetic documents besides the Phoenix summary.")
+    parser.add_argument("--child", choices=["warm", "cold"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child == "warm", args.think_time)
+        return
+
+    server = start_stub_server(StubConfig(ttft=0.4, tokens_per_second=100.0))
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as index:
+        write_corpus(root, args.files)
+        env = dict(os.environ, NEXUS_GEMINI_BASE_URL=server.base_url, NEXUS_DOCUMENT_ROOT=root,
+                   NEXUS_INDEX_DIR=index)
+        sample(env, warm=False, think_time=0.0)  # Saves the index
+        results = {"cold": [], "warm": []}
+        for _ in range(args.runs):
+            for variant in results:
+                results[variant].append(sample(env, variant == "warm", args.think_time))
+    server.shutdown()
+
+    print(f"{'first turn':<10} {'ttft':>8} {'total':>8} {'setup':>8} {'tools':>8} {'cache':>8}")
+    for variant, records in results.items():
+        cells = " ".join(f"{np.median([record[key] for record in records]) * 1e3:>5.0f} ms"
+                         for key in ("ttft_seconds", "total_seconds", "setup_seconds", "tool_seconds", "cache_seconds"))
+        print(f"{variant:<10} {cells}")
+    steps = [record["warmup"] for record in results["warm"] if record["warmup"]]
+    if steps:
+        print("warm-up steps (in the background): " + ", ".join(
+            f"{name} {np.median([step[name] for step in steps]) * 1e3:.0f} ms" for name in steps[0]))
+
+
+if __name__ == "__main__":
+    main()
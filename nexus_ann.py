@@ -0,0 +1,159 @@
+import math
+import os
+
+import numpy as np
+
+from nexus_vectors import VectorIndex, normalize
+
+# --- Approximate Nearest Neighbour Index (IVF) ---
+# Brute force over every chunk stops scaling at a few hundred thousand chunks. An
+# inverted-file index clusters the vectors with spherical k-means (the coarse
+# quantizer) and keeps one contiguous VectorIndex per cluster. A query is scored
+# against the centroids first and then only against the nprobe closest lists.
+# More probes mean better recall and slower queries.
+
+DEFAULT_NPROBE = int(os.environ.get("NEXUS_IVF_NPROBE", "16"))
+
+# Below this many vectors the index stays a single exact list; at this size it
+# trains its quantizer and splits into clusters.
+DEFAULT_TRAIN_THRESHOLD = int(os.environ.get("NEXUS_IVF_TRAIN_THRESHOLD", "50000"))
+
+# Rows scored per block during k-means and assignment, to bound temporary memory.
+ASSIGN_BLOCK = 65536
+
+
+def default_nlist(count):
+    """Number of clusters for count vectors (about 4 * sqrt(count))."""
+    return max(1, int(4 * math.sqrt(count)))
+
+
+def nearest_centroids(vectors, centroids):
+    """Index of the most similar centroid for every row."""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BLOCK):
+        block = vectors[start:start + ASSIGN_BLOCK]
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors, clusters, iterations=10, seed=0):
+    """Clusters unit vectors by cosine similarity. Returns unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = nearest_centroids(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=clusters)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        occupied = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[occupied] = np.add.reduceat(vectors[order], starts[occupied], axis=0)
+        # Empty clusters restart from random points so no list is wasted
+        empty = np.flatnonzero(~occupied)
+        sums[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file ANN index with the same interface as VectorIndex.
+
+    nprobe (how many lists a query visits) is the recall/latency knob and can be
+    changed at any time, or passed per search() call.
+    """
+
+    def __init__(self, dimensions, nprobe=DEFAULT_NPROBE, train_threshold=DEFAULT_TRAIN_THRESHOLD,
+                 nlist=None, sample_per_list=64, seed=0):
+        self.dimensions = dimensions
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.nlist = nlist
+        self.sample_per_list = sample_per_list
+        self.seed = seed
+        self.centroids = None                  # None until trained: one exact list
+        self.lists = [VectorIndex(dimensions)]
+        self.list_of = {}                      # key -> list number
+
+    def __len__(self):
+        return len(self.list_of)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def train(self, nlist=None):
+        """Clusters the vectors added so far and redistributes them over the new lists."""
+        keys, vectors = [], []
+        for inverted_list in self.lists:
+            keys.extend(inverted_list.keys)
+            vectors.append(inverted_list.vectors.copy())
+        vectors = np.concatenate(vectors) if vectors else np.empty((0, self.dimensions), dtype=np.float32)
+        if len(keys) == 0:
+            return
+
+        nlist = min(nlist or self.nlist or default_nlist(len(keys)), len(keys))
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(keys), nlist * self.sample_per_list)
+        sample = vectors[rng.choice(len(keys), size=sample_size, replace=False)]
+        self.centroids = spherical_kmeans(sample, nlist, seed=self.seed)
+        self.lists = [VectorIndex(self.dimensions, capacity=16) for _ in range(nlist)]
+        self.list_of = {}
+        self._insert(keys, vectors)
+
+    def _insert(self, keys, vectors):
+        if self.centroids is None:
+            assignments = np.zeros(len(keys), dtype=np.int64)
+        else:
+            assignments = nearest_centroids(vectors, self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.flatnonzero(np.diff(assignments[order])) + 1
+        for group in np.split(order, bounds):
+            if len(group) == 0:
+                continue
+            number = int(assignments[group[0]])
+            self.lists[number].add([keys[i] for i in group], vectors[group])
+            for i in group:
+                self.list_of[keys[i]] = number
+
+    def add(self, keys, vectors):
+        """Adds or replaces the vectors for keys, training the quantizer once the index is large enough."""
+        vectors = normalize(vectors)
+        if vectors.shape != (len(keys), self.dimensions):
+            raise ValueError(f"expected {len(keys)} vectors of size {self.dimensions}, got {vectors.shape}")
+        self.remove([key for key in keys if key in self.list_of])
+        self._insert(list(keys), vectors)
+        if not self.trained and len(self) >= self.train_threshold:
+            self.train()
+
+    def copy(self):
+        """An independent copy, sharing only the (never modified) centroids."""
+        index = IVFIndex(self.dimensions, self.nprobe, self.train_threshold, self.nlist, self.sample_per_list,
+                         self.seed)
+        index.centroids = self.centroids
+        index.lists = [inverted_list.copy() for inverted_list in self.lists]
+        index.list_of = dict(self.list_of)
+        return index
+
+    def remove(self, keys):
+        """Drops the vectors for keys; unknown keys are ignored."""
+        for key in keys:
+            number = self.list_of.pop(key, None)
+            if number is not None:
+                self.lists[number].remove([key])
+
+    def search(self, queries, k=5, nprobe=None):
+        """Returns, per query vector, up to k (key, score) pairs, best first."""
+        queries = normalize(queries)
+        if not self.trained:
+            return self.lists[0].search(queries, k)
+
+        nprobe = min(nprobe or self.nprobe, len(self.lists))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        results = []
+        for query, probed in zip(queries, probes):
+            hits = []
+            for number in probed:
+                hits.extend(self.lists[number].search(query, k)[0])
+            hits.sort(key=lambda hit: hit[1], reverse=True)
+            results.append(hits[:k])
+        return results
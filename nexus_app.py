@@ -1,9 +1,16 @@
 import streamlit as st
 import os
-import time
 import json
-from google import genai
-from google.genai import types
+import time
+import uuid
+from nexus_client import get_base_url, make_client
+from nexus_conversations import PAGE_SIZE, ConversationStore
+from nexus_engine import ChatEngine, EngineLoop
+from nexus_history import DEFAULT_TOKEN_BUDGET
+from nexus_metrics import recorder_from_env
+from nexus_response_cache import ResponseCache, SemanticResponseCache
+from nexus_retrieval import document_changes, prompt_embedder
+from nexus_warmup import WARMUP, warm_up
 
 # --- LLM Setup and Persona ---
 
@@ -21,65 +28,143 @@ SYSTEM_INSTRUCTION = (
 
 # --- API Key and Client Initialization ---
 # The app looks for the GEMINI_API_KEY set in Streamlit Secrets.
+# When NEXUS_GEMINI_BASE_URL points at the local stand-in, no key is required.
 try:
     API_KEY = st.secrets["GEMINI_API_KEY"]
-except KeyError:
-    st.error("Error: GEMINI_API_KEY environment variable not set. Please set the key.")
-    st.stop()
+except (KeyError, FileNotFoundError):
+    API_KEY = None
+    if get_base_url() is None:
+        st.error("Error: GEMINI_API_KEY environment variable not set. Please set the key.")
+        st.stop()
+
+
+@st.cache_resource
+def get_client(api_key):
+    """The Gemini client of every session and rerun, so turns reuse its warm connections (see nexus_client.py)."""
+    return make_client(api_key=api_key)
+
 
 # Initialize the Gemini Client
 try:
-    client = genai.Client(api_key=API_KEY)
+    client = get_client(API_KEY)
 except Exception as e:
     st.error(f"Error initializing Gemini client: {e}")
     st.stop()
 
+CHAT_MODEL = "gemini-2.5-pro"
+
+
+@st.cache_resource
+def get_response_cache():
+    """Finished answers, shared by every session of this Streamlit process."""
+    return ResponseCache(changes=document_changes)
+
+
+@st.cache_resource
+def get_semantic_cache():
+    """Answers by prompt similarity, shared like get_response_cache(); None without a prompt embedder."""
+    embedder = prompt_embedder(client)
+    return SemanticResponseCache(embedder, changes=document_changes) if embedder is not None else None
+
 
 # --- Chat Functions (Contains the Critical Fix) ---
 
-def stream_gemini_response(prompt, history, system_instruction):
-    """Generates a response from the Gemini model using the provided prompt and history."""
-    
-    # 1. Prepare chat history for the API
-    contents = []
-    # Add existing chat history
-    for msg in history:
-        # Streamlit session state stores 'user' and 'assistant' roles
-        role = 'user' if msg["role"] == 'user' else 'model'
-        
-        content_text = msg.get("content", "")
-        
-        # --- CRITICAL FIX: Only process non-empty string content to prevent TypeError ---
-        if isinstance(content_text, str) and content_text:
-            contents.append(types.Content(role=role, parts=[types.Part.from_text(content_text)]))
-        # -----------------------------------------------------------------------------
-            
-    
-    # Add the current user prompt
-    contents.append(types.Content(role="user", parts=[types.Part.from_text(prompt)]))
-    
-    # 2. Configure model generation
-    config = types.GenerateContentConfig(
-        system_instruction=system_instruction,
-        temperature=0.7 
-    )
-    
-    # 3. Call the API
-    response = client.models.generate_content_stream(
-        model="gemini-2.5-pro",
-        contents=contents,
-        config=config,
-    )
-    
-    # 4. Stream the response back to Streamlit
-    full_response = ""
-    for chunk in response:
-        if chunk.text:
-            full_response += chunk.text
-            yield chunk.text
-    
-    # 5. Return the full response (needed for updating history)
-    return full_response
+@st.cache_resource
+def get_engine_loop():
+    """The event loop every session's turns run on (see nexus_engine.EngineLoop)."""
+    return EngineLoop()
+
+
+@st.cache_resource
+def start_warmup():
+    """Opens the client's connections on the engine loop once per process, in the background (see nexus_warmup.py)."""
+    return get_engine_loop().submit(warm_up(client, CHAT_MODEL, index=False))
+
+
+@st.cache_resource
+def get_conversation_store():
+    """Saved conversations of every session (see nexus_conversations.py)."""
+    return ConversationStore()
+
+
+# A resumed conversation brings this many of its latest messages back into
+# memory; a session that grows to twice as many is trimmed back to them. Its
+# rolling summary is saved with it and restored, so the turns left out stay in
+# the model's context. If the summary lags behind, the messages it does not
+# cover yet are brought back too, up to half as many again.
+RESUME_MESSAGES = int(os.environ.get("NEXUS_RESUME_MESSAGES", "200"))
+
+
+def open_conversation(conversation_id):
+    """Loads the latest messages and the summary of a saved conversation into the session (none for a new one)."""
+    store = get_conversation_store()
+    count = store.count(conversation_id)
+    saved_summary = store.summary(conversation_id)
+    start = max(count - RESUME_MESSAGES, 0)
+    if saved_summary is not None and saved_summary[1] < start:
+        start = max(saved_summary[1], count - 3 * RESUME_MESSAGES // 2)
+    first_position, messages = store.page(conversation_id, before=count, limit=count - start)
+    conversation = get_engine().conversation(messages)
+    covered = None
+    if saved_summary is not None:
+        summary, covered, sources = saved_summary
+        conversation.summarizer.restore(summary, max(covered - first_position, 0), sources)
+        covered = first_position + conversation.summarizer.covered
+    st.session_state.conversation = conversation
+    st.session_state.first_position = first_position  # Position of conversation.messages[0]
+    st.session_state.saved = len(messages)            # Messages of the list already in the store
+    st.session_state.summary_covered = covered        # Position the saved summary reaches, None without one
+    st.session_state.earlier_pages = 0
+
+
+def save_conversation():
+    """Stores the messages added and the summary updated since the last save, then trims a long session."""
+    conversation = st.session_state.conversation
+    store = get_conversation_store()
+    new = conversation.messages[st.session_state.saved:]
+    if new:
+        store.append(st.session_state.conversation_id, new, st.session_state.first_position + st.session_state.saved)
+        st.session_state.saved = len(conversation.messages)
+    summarizer = conversation.summarizer
+    covered = st.session_state.first_position + summarizer.covered if summarizer.summary else None
+    if covered != st.session_state.summary_covered:
+        store.save_summary(st.session_state.conversation_id, summarizer.summary, covered or 0, summarizer.sources)
+        st.session_state.summary_covered = covered
+    if len(conversation.messages) > 2 * RESUME_MESSAGES:
+        # Reloads the latest messages, with the summary standing in for the rest
+        open_conversation(st.session_state.conversation_id)
+
+
+@st.cache_resource
+def get_recorder():
+    """Collects the latency record of every session's turns when NEXUS_TIMINGS is set (see nexus_metrics.py)."""
+    return recorder_from_env({"entry": "nexus_app", "model": CHAT_MODEL})
+
+
+def get_engine():
+    """The chat engine for this rerun; the caches and the event loop behind it are process-wide."""
+    return ChatEngine(client, CHAT_MODEL, SYSTEM_INSTRUCTION, response_cache=get_response_cache(),
+                      semantic_cache=get_semantic_cache(), recorder=get_recorder())
+
+
+def stream_gemini_response(prompt, conversation):
+    """Generates a response from the Gemini model for the next turn of conversation.
+
+    The turn runs on the shared engine loop (nexus_engine.py); this generator
+    hands its chunks to st.write_stream. The engine sends the rolling summary
+    and the history window rather than the whole conversation (skipping
+    empty/non-string content, which caused the old TypeError), and answers
+    repeated or paraphrased requests from the response caches.
+
+    The time Streamlit spends rendering between chunks is added to the
+    turn's latency record (conversation.metrics, see nexus_metrics.py).
+    """
+    rendering = 0.0
+    for text in get_engine_loop().iterate(get_engine().reply(conversation, prompt)):
+        handed_out = time.perf_counter()
+        yield text
+        rendering += time.perf_counter() - handed_out
+    conversation.metrics[-1].render_seconds = rendering
 
 
 # --- Streamlit UI ---
@@ -96,42 +181,107 @@ st.caption("Custom AI powered by Gemini and local RAG.")
 # TEMPORARY FIX: Add a button to clear the state and force rerun
 # This is our ultimate safety switch to fix the persistent TypeError issue.
 if st.button("🔴 Force Clear Chat History"):
-    st.session_state.messages = []
+    if "conversation" in st.session_state:
+        st.session_state.conversation.reset()
+        get_conversation_store().clear(st.session_state.conversation_id)
+        st.session_state.first_position = st.session_state.saved = st.session_state.earlier_pages = 0
+        st.session_state.summary_covered = None
     st.rerun()
 
-# Initialize chat history in session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# Initialize chat history in session state. The conversation holds the message
+# list, its API-side copy, the background summarizer that condenses old turns
+# once the history gets long, and the per-turn request sizes shown in the sidebar.
+# Its messages are saved to the conversation store after every turn; the ID in
+# the URL brings them back after a reload.
+if "conversation" not in st.session_state:
+    st.session_state.conversation_id = st.query_params.get("conversation") or uuid.uuid4().hex
+    st.query_params["conversation"] = st.session_state.conversation_id
+    open_conversation(st.session_state.conversation_id)
+conversation = st.session_state.conversation
 
-# Display chat messages from history on app rerun
-for message in st.session_state.messages:
+# Display the latest page of the chat on app rerun; earlier pages are read from
+# the store when asked for, so a rerun costs the same however long the chat is.
+latest = conversation.messages[-PAGE_SIZE:]
+latest_position = st.session_state.first_position + len(conversation.messages) - len(latest)
+earlier_position, earlier = latest_position, []
+if st.session_state.earlier_pages:
+    earlier_position, earlier = get_conversation_store().page(
+        st.session_state.conversation_id, before=latest_position, limit=PAGE_SIZE * st.session_state.earlier_pages)
+if earlier_position > 0 and st.button(f"Show earlier messages ({earlier_position} more)"):
+    st.session_state.earlier_pages += 1
+    st.rerun()
+for message in earlier + latest:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
+# Warm up the connections while the first page renders and the user types
+if WARMUP:
+    start_warmup()
+
 # Handle initial welcome message
-if not st.session_state.messages:
+if not conversation.messages:
     initial_message = "Hello Meg. I'm Nexus, your executive assistant. I'm ready to help you with summaries, drafting, and project information. How can I assist you today?"
     
     with st.chat_message("assistant"):
         st.markdown(initial_message)
         
-    st.session_state.messages.append({"role": "assistant", "content": initial_message})
+    conversation.messages.append({"role": "assistant", "content": initial_message})
+    save_conversation()
 
 
 # Accept user input
 if prompt := st.chat_input("Ask Nexus a question..."):
     # 1. Display user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # 2. Get and stream assistant response
+    # 2. Get and stream assistant response. The engine adds the prompt and the
+    # finished answer to the history and compacts old turns in the background.
     with st.chat_message("assistant"):
-        full_response = st.write_stream(stream_gemini_response(
-            prompt, 
-            st.session_state.messages, 
-            SYSTEM_INSTRUCTION
-        ))
-        
-    # 3. Add assistant response to chat history
-    st.session_state.messages.append({"role": "assistant", "content": full_response})
\ No newline at end of file
+        st.write_stream(stream_gemini_response(prompt, conversation))
+    save_conversation()
+    if "cache_error" in conversation.request_log[-1]:
+        st.toast(f"Semantic cache unavailable: {conversation.request_log[-1]['cache_error']}")
+
+
+# --- Request Size Monitor ---
+with st.sidebar:
+    st.subheader("Request size")
+    st.caption(f"History budget: {DEFAULT_TOKEN_BUDGET:,} tokens")
+    if conversation.request_log:
+        last = conversation.request_log[-1]
+        st.metric("Tokens sent last turn", f"{last['tokens']:,}")
+        st.caption(f"{last['history_messages']} messages sent, {last['shrunk']} shrunk, {last['dropped']} dropped")
+    if conversation.summarizer.covered:
+        st.caption(f"{conversation.summarizer.covered} earlier messages condensed into a summary")
+        st.line_chart([entry["tokens"] for entry in conversation.request_log])
+
+    # --- Latency Monitor ---
+    if conversation.metrics and conversation.metrics[-1].total_seconds is not None:
+        turn = conversation.metrics[-1]
+        st.subheader("Last turn latency")
+        ttft_column, total_column = st.columns(2)
+        ttft_column.metric("First token", f"{turn.ttft_seconds or 0:.2f} s")
+        total_column.metric("Total", f"{turn.total_seconds + turn.render_seconds:.2f} s")
+        gaps = turn.as_dict()
+        st.caption(f"History {turn.history_seconds * 1e3:.0f} ms, cache {turn.cache_seconds * 1e3:.0f} ms, "
+                   f"setup {turn.setup_seconds * 1e3:.0f} ms, tools {turn.tool_seconds * 1e3:.0f} ms, "
+                   f"rendering {turn.render_seconds * 1e3:.0f} ms")
+        if turn.tokens_per_second:
+            st.caption(f"{turn.answer_tokens} tokens at {turn.tokens_per_second:.0f} tokens/s, "
+                       f"chunk gaps p50 {gaps['chunk_gap_p50_seconds'] * 1e3:.0f} ms / "
+                       f"max {gaps['chunk_gap_max_seconds'] * 1e3:.0f} ms")
+
+    # --- Response Cache Monitor ---
+    response_cache = get_response_cache()
+    st.subheader("Response cache")
+    hits_column, misses_column = st.columns(2)
+    hits_column.metric("Hits", response_cache.stats["hits"])
+    misses_column.metric("Misses", response_cache.stats["misses"])
+    st.caption(f"{response_cache.hit_rate:.0%} hit rate, {response_cache.stats['saved_seconds']:.1f} s of model time saved, "
+               f"{len(response_cache)} answers cached")
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None:
+        st.caption(f"Paraphrases: {semantic_cache.stats['hits']} served from cache ({semantic_cache.hit_rate:.0%} "
+                   f"of lookups), {semantic_cache.stats['saved_seconds']:.1f} s saved, "
+                   f"{semantic_cache.stats['embed_seconds']:.1f} s spent embedding prompts")
@@ -1,6 +1,16 @@
+import argparse
+import asyncio
 import os
-from google import genai
-from google.genai import types
+import threading
+from concurrent.futures import Future
+
+# --- Start-up ---
+# The SDK, numpy and scipy take over a second to import, which used to be paid
+# before the first prompt appeared, even by a session that only typed 'exit'.
+# Only the standard library is imported up front now: the client, the engine
+# and everything behind them are imported and built by setup() on a background
+# thread while the first question is typed, followed by the warm-up
+# (nexus_warmup.py). python -m benchmarks.startup keeps the start-up in budget.
 
 # --- 1. Define Nexus's Persona (Same as Step 2) ---
 SYSTEM_INSTRUCTION = """
@@ -8,9 +18,10 @@ You are 'Nexus', a highly professional, proactive, and confidential AI assistant
 
 ROLE: Your primary function is to manage tasks, summarize technical documents, 
 and execute code or actions (via provided tools). You must prioritize efficiency 
-and clarity in all responses. You have access to a tool to read project documents. 
-You MUST use the 'read_project_document' tool whenever a query requires looking 
-up specific details from a project file.
+and clarity in all responses. You have access to tools to search and read project documents. 
+You MUST use the 'search_project_documents' tool whenever a query requires looking 
+up specific details from the project files. Only use 'read_project_document' when 
+the full text of one specific, known file is required.
 
 TONE: Formal, succinct, and always helpful. Do not use emojis, unnecessary pleasantries, 
 or excessive enthusiasm. Get straight to the point.
@@ -21,99 +32,144 @@ and professional life, is strictly confidential.
 ACTIONS: When asked to perform a task, acknowledge the request and confirm the action.
 """
 
-# --- 2. Define the Custom Tool (The RAG Function) ---
+MODEL_NAME = 'gemini-2.5-flash'
+
+
+class ClientSetupError(Exception):
+    """The Gemini client could not be built, in practice because no API key is set."""
+
+
+def setup():
+    """Imports and builds the chat engine; returns (client, engine). Runs on a background thread."""
+    from nexus_client import shared_client
+    from nexus_engine import ChatEngine
+    from nexus_metrics import recorder_from_env
+    from nexus_response_cache import SemanticResponseCache
+    from nexus_retrieval import document_changes, prompt_embedder
+    from nexus_tools import DOCUMENT_TOOLS, ToolRunner
+    from nexus_watcher import start_reindexer
 
-def read_project_document(filename: str) -> str:
-    """Reads the content of a project document from the local file system. 
-    Returns the content as a string.
-    """
-    base_path = "C:\\nexus"  # Define the base directory for security
-    full_path = os.path.join(base_path, filename)
-    
-    # Safety check to ensure the file is in the expected directory
-    if not full_path.startswith(base_path):
-        return f"Error: Access denied. Cannot read file outside {base_path}."
+    # --- 2. The Custom Tools (The RAG Functions) ---
+    # search_project_documents and read_project_document live in nexus_tools.py; the
+    # runner executes the calls of one model turn side by side, each with its own timeout.
+    tool_runner = ToolRunner(DOCUMENT_TOOLS)
 
+    # --- 3. Initialize the Client and Configuration ---
     try:
-        with open(full_path, 'r') as f:
-            content = f.read()
-        return content
-    except FileNotFoundError:
-        return f"File '{filename}' not found in the project directory."
+        client = shared_client()
     except Exception as e:
-        return f"An error occurred while reading the file: {e}"
-
-# --- 3. Initialize the Client and Configuration ---
-try:
-    client = genai.Client()
-except Exception:
-    print("Error: GEMINI_API_KEY environment variable not set.")
-    exit()
-
-# Configure the model to recognize and use the custom function
-config = types.GenerateContentConfig(
-    system_instruction=SYSTEM_INSTRUCTION,
-    tools=[read_project_document], # Register the function here
-    temperature=0.3 
-)
-
-model_name = 'gemini-2.5-flash'
-
-# --- 4. Start the Persistent Chat Session ---
-try:
-    chat = client.chats.create(
-        model=model_name,
-        config=config,
-    )
+        raise ClientSetupError(e) from e
+
+    # Earlier answers, served again for close paraphrases of their questions. Prompts
+    # are matched together with the previous exchange, so opening questions are
+    # shared across sessions but a follow-up only matches after the same exchange.
+    prompt_vectors = prompt_embedder(client)
+    semantic_cache = SemanticResponseCache(prompt_vectors, changes=document_changes) if prompt_vectors else None
+
+    # The engine (nexus_engine.py) builds every request from the conversation: old
+    # turns are condensed into a rolling summary in the background and only the
+    # recent ones that fit the token budget are sent. With NEXUS_TIMINGS set, every
+    # turn's latency record is written there on exit (see nexus_metrics.py).
+    engine = ChatEngine(client, MODEL_NAME, SYSTEM_INSTRUCTION, temperature=0.3, tool_runner=tool_runner,
+                        semantic_cache=semantic_cache, match_history=False,
+                        recorder=recorder_from_env({"entry": "nexus_chat", "model": MODEL_NAME}))
+
+    # Keep the document index in step with the document root while the chat runs
+    start_reindexer()
+    return client, engine
+
+
+def in_background(function):
+    """Runs function on a daemon thread, so exiting never waits for it; returns a Future of its result."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="nexus-setup", daemon=True).start()
+    return future
+
+
+async def prepare():
+    """Waits for setup() and starts the warm-up; returns (engine, warm-up task or None)."""
+    client, engine = await asyncio.wrap_future(in_background(setup))
+    from nexus_warmup import WARMUP, warm_up
+
+    # Open the connections and load the index while the first question is typed
+    warmup = asyncio.create_task(warm_up(client, MODEL_NAME)) if WARMUP else None
+    return engine, warmup
+
+
+def describe(turn):
+    """One line of a turn's latency record (nexus_metrics.TurnMetrics) for verbose mode."""
+    if turn.cached:
+        return f"{turn.cached} cache hit, total {turn.total_seconds:.2f} s"
+    parts = [f"first token {turn.ttft_seconds or turn.total_seconds:.2f} s", f"total {turn.total_seconds:.2f} s",
+             f"setup {turn.setup_seconds * 1e3:.0f} ms"]
+    if turn.tool_calls:
+        parts.append(f"{len(turn.tool_calls)} tool call(s) {turn.tool_seconds * 1e3:.0f} ms")
+    if turn.tokens_per_second:
+        parts.append(f"{turn.tokens_per_second:.0f} tokens/s")
+    if turn.usage:
+        parts.append(f"{turn.usage.get('prompt_token_count', 0)} in / {turn.usage.get('candidates_token_count', 0)} out tokens")
+    return ", ".join(parts)
+
+
+# --- 4. The Interactive Chat Loop (Function Calls are handled by the engine) ---
+async def chat_loop(verbose=False):
+    preparing = asyncio.create_task(prepare())
     print("--- Nexus AI Assistant Initiated (RAG Active) ---")
-    print(f"Chat session started with {model_name}. Type 'exit' to quit.\n")
-except Exception as e:
-    print(f"Error starting chat session: {e}")
-    exit()
-
-# --- 5. The Interactive Chat Loop (Handles Function Calls) ---
-while True:
-    user_input = input("Meg: ")
-
-    if user_input.lower() in ['exit', 'quit']:
-        print("\nNexus: Session terminated. Have a productive day, Meg.")
-        break
-    
-    if not user_input.strip():
-        continue
-
-    # Send the user message to the chat
-    response = chat.send_message(user_input)
-    
-    # --- Function Calling Logic ---
-    while response.function_calls:
-        # Nexus wants to call a function (tool)
-        function_calls = response.function_calls
-        
-        tool_results = []
-        for call in function_calls:
-            function_name = call.name
-            args = dict(call.args)
-            
-            # Execute the function based on its name
-            if function_name == 'read_project_document':
-                # Dynamically call the Python function
-                result_content = read_project_document(**args)
-                
-                # Create the ToolResult object to send back to the model
-                tool_results.append(types.Part.from_tool_function_result(
-                    name=function_name,
-                    result=result_content
-                ))
-            else:
-                # Handle unknown function calls
-                tool_results.append(types.Part.from_tool_function_result(
-                    name=function_name,
-                    result=f"Error: Unknown tool {function_name}"
-                ))
-        
-        # Send the tool results back to the model so it can formulate the final answer
-        response = chat.send_message(tool_results)
-
-    # Print the final text response from Nexus
-    print(f"Nexus: {response.text.strip()}")
\ No newline at end of file
+    print(f"Chat session started with {MODEL_NAME}. Type 'exit' to quit.\n")
+    conversation = warmup = None
+
+    while True:
+        # Read input on a worker thread so the event loop stays free
+        user_input = await asyncio.to_thread(input, "Meg: ")
+
+        if user_input.lower() in ['exit', 'quit']:
+            print("\nNexus: Session terminated. Have a productive day, Meg.")
+            break
+
+        if not user_input.strip():
+            continue
+
+        if conversation is None:
+            try:
+                engine, warmup = await preparing
+            except ClientSetupError:
+                print("Error: GEMINI_API_KEY environment variable not set.")
+                return
+            except Exception as e:
+                print(f"Error starting Nexus: {e}")
+                return
+            conversation = engine.conversation()
+
+        # Print Nexus's answer as it streams in; tool calls in the stream are run by the engine
+        print("Nexus: ", end="", flush=True)
+        first = True
+        async for text in engine.reply(conversation, user_input):
+            print(text.lstrip() if first else text, end="", flush=True)
+            first = False
+        print()
+
+        if verbose:
+            print(f"  [{describe(conversation.metrics[-1])}]")
+            if warmup is not None and warmup.done() and len(conversation.metrics) == 1:
+                steps = ", ".join(f"{name} {value * 1e3:.0f} ms" if isinstance(value, float) else f"{name} failed"
+                                  for name, value in warmup.result().items())
+                print(f"  [warm-up before this turn: {steps}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nexus command-line assistant.")
+    parser.add_argument("-v", "--verbose", action="store_true", default=bool(os.environ.get("NEXUS_VERBOSE")),
+                        help="Print the latency breakdown of every answer (see nexus_metrics.py).")
+    args = parser.parse_args()
+    asyncio.run(chat_loop(args.verbose))
+
+
+if __name__ == "__main__":
+    main()
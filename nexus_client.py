@@ -0,0 +1,76 @@
+import importlib.util
+import os
+import threading
+
+import httpx
+from google import genai
+from google.genai import types
+from nexus_metrics import response_hook
+
+# --- Client Factory ---
+# Every entry point builds its Gemini client through here so that a single
+# environment variable can redirect all traffic to the local stand-in server
+# (see nexus_stub_server.py) for offline load and latency testing. The async
+# client also reports response headers to the per-turn metrics (nexus_metrics.py).
+#
+# A client owns the HTTP connection pools, so a process should build as few as
+# possible: a fresh client means fresh TCP and TLS handshakes before the first
+# token. shared_client() hands out one client per API key and base URL for the
+# whole process (nexus_app.py holds its own with st.cache_resource). The pools
+# keep idle connections for KEEPALIVE_SECONDS (httpx closes them after 5 s by
+# default, i.e. between most turns of a chat) and up to POOL_CONNECTIONS of
+# them, enough for the concurrent turns of a busy Streamlit process. HTTP/2,
+# which multiplexes those turns over one connection, is used when the optional
+# h2 package is installed (pip install "httpx[http2]").
+#
+# The async side of a client belongs to the event loop that first used it; the
+# front ends each run all their turns on one loop.
+
+BASE_URL_ENV = "NEXUS_GEMINI_BASE_URL"
+
+# The stand-in does not check keys, but the SDK refuses to start without one.
+STUB_API_KEY = "nexus-stub-key"
+
+POOL_CONNECTIONS = int(os.environ.get("NEXUS_HTTP_POOL", "64"))
+KEEPALIVE_SECONDS = float(os.environ.get("NEXUS_HTTP_KEEPALIVE", "120"))
+HTTP2 = os.environ.get("NEXUS_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+
+def get_base_url():
+    """Returns the overridden API base URL, or None when talking to the live API."""
+    return os.environ.get(BASE_URL_ENV) or None
+
+
+def connection_args():
+    """httpx client arguments for the connection pool (see above)."""
+    limits = httpx.Limits(max_connections=max(100, POOL_CONNECTIONS), max_keepalive_connections=POOL_CONNECTIONS,
+                          keepalive_expiry=KEEPALIVE_SECONDS)
+    return {"limits": limits, "http2": HTTP2}
+
+
+def make_client(api_key=None):
+    """Builds a genai.Client, pointed at the stand-in server when NEXUS_GEMINI_BASE_URL is set."""
+    base_url = get_base_url()
+    http_options = types.HttpOptions(
+        base_url=base_url,
+        client_args=connection_args(),
+        async_client_args={**connection_args(), "event_hooks": {"response": [response_hook]}},
+    )
+    if base_url is None:
+        return genai.Client(api_key=api_key or None, http_options=http_options)
+
+    api_key = api_key or os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY") or STUB_API_KEY
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(api_key=None):
+    """The process-wide client for api_key and the current base URL, built on first use."""
+    key = (api_key, get_base_url())
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = make_client(api_key)
+        return _clients[key]
@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- Conversation Store (SQLite) ---
+# Chat history used to live only in Streamlit's session state: a reload lost it,
+# and every rerun rendered all of it. ConversationStore keeps every message in
+# SQLite, keyed by conversation ID and position (the message's index in the
+# conversation), so the app can resume a conversation after a reload and render
+# only its latest page, fetching older pages from the database when asked. The
+# rolling summary of each conversation (nexus_summary.py) is kept next to its
+# messages, so a resumed conversation keeps the context of the turns it does not
+# bring back.
+#
+# The database runs in WAL mode: the script threads of many sessions read while
+# one of them writes, and a commit appends to the log instead of rewriting pages.
+# Each thread gets its own connection; synchronous=NORMAL keeps commits cheap
+# (a crash can lose the last turns, never corrupt the file).
+#
+#   messages(conversation, position, role, content, sources, created)
+#   summaries(conversation, summary, covered, sources, created)
+#
+# sources holds the (filename, digest) pairs of a message or summary as a JSON
+# list (see nexus_dependencies.py); they are turned back into tuples on the way
+# out. covered is the number of leading messages the summary stands in for.
+
+CONVERSATIONS_DB = os.environ.get("NEXUS_CONVERSATIONS_DB") or os.path.join(
+    os.path.expanduser("~"), ".nexus", "conversations.db")
+
+PAGE_SIZE = int(os.environ.get("NEXUS_PAGE_SIZE", "20"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    conversation TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    sources TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (conversation, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    conversation TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    covered INTEGER NOT NULL,
+    sources TEXT,
+    created REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _sources(sources):
+    return [tuple(pair) for pair in json.loads(sources)] if sources else []
+
+
+def _message(role, content, sources):
+    message = {"role": role, "content": content}
+    if sources:
+        message["sources"] = _sources(sources)
+    return message
+
+
+class ConversationStore:
+    """Messages of many conversations in one SQLite file, shared by the threads of a process."""
+
+    def __init__(self, path=CONVERSATIONS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def append(self, conversation, messages, start):
+        """Stores messages at positions start, start + 1, ...; a stored position is overwritten."""
+        now = time.time()
+        rows = [
+            (conversation, start + offset, msg["role"], msg["content"] if isinstance(msg.get("content"), str) else "",
+             json.dumps(sorted(msg["sources"])) if msg.get("sources") else None, now)
+            for offset, msg in enumerate(messages)
+        ]
+        with self._connection() as db:
+            db.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def count(self, conversation):
+        """Number of stored messages, i.e. the position of the next one."""
+        row = self._connection().execute(
+            "SELECT MAX(position) FROM messages WHERE conversation = ?", (conversation,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def page(self, conversation, before=None, limit=PAGE_SIZE):
+        """Up to limit messages just before position before (the latest ones without it), oldest first.
+
+        Returns (position of the first message returned, messages).
+        """
+        if before is None:
+            before = self.count(conversation)
+        rows = self._connection().execute(
+            "SELECT position, role, content, sources FROM messages WHERE conversation = ? AND position < ? "
+            "ORDER BY position DESC LIMIT ?", (conversation, before, limit)).fetchall()
+        rows.reverse()
+        first = rows[0][0] if rows else before
+        return first, [_message(role, content, sources) for _, role, content, sources in rows]
+
+    def save_summary(self, conversation, summary, covered, sources=()):
+        """Stores the rolling summary that stands in for the first covered messages; an empty one is deleted."""
+        with self._connection() as db:
+            if not summary:
+                db.execute("DELETE FROM summaries WHERE conversation = ?", (conversation,))
+                return
+            db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)",
+                       (conversation, summary, covered, json.dumps(sorted(sources)) if sources else None,
+                        time.time()))
+
+    def summary(self, conversation):
+        """(summary, covered, sources) of a conversation, or None if it has none."""
+        row = self._connection().execute(
+            "SELECT summary, covered, sources FROM summaries WHERE conversation = ?", (conversation,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], _sources(row[2])
+
+    def clear(self, conversation):
+        with self._connection() as db:
+            db.execute("DELETE FROM messages WHERE conversation = ?", (conversation,))
+            db.execute("DELETE FROM summaries WHERE conversation = ?", (conversation,))
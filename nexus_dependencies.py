@@ -0,0 +1,94 @@
+import hashlib
+import os
+
+from nexus_documents import DOCUMENT_ROOT, MAX_CHUNK_BYTES, chunk_bytes
+
+# --- Document Dependencies ---
+# Cached answers and conversation summaries can quote the project documents, so
+# each records what it was built from as (filename, digest) pairs: the SHA-1 of
+# the whole file for read_project_document, the chunk ID (which embeds the hash
+# of the chunk's text) for a passage from search_project_documents. When
+# update_documents() reports changed files, only the entries that depend on one
+# of them are checked, and an entry is stale once one of its digests no longer
+# describes the file on disk. A file that was only touched, or edited in a
+# section an answer never saw, leaves the answer cached.
+
+
+def file_digest(data):
+    """Digest of a whole document's bytes."""
+    return "sha1:" + hashlib.sha1(data).hexdigest()
+
+
+def file_dependency(filename, data):
+    """Dependency of something built from the full text (data) of one file."""
+    return os.path.normpath(filename), file_digest(data)
+
+
+def chunk_dependency(chunk):
+    """Dependency of something built from one chunk."""
+    return os.path.normpath(chunk.filename), chunk.chunk_id
+
+
+def current_digests(filename, root=DOCUMENT_ROOT, max_bytes=MAX_CHUNK_BYTES):
+    """Every digest that still describes filename on disk: the file's and its chunk IDs. Empty if it is gone."""
+    try:
+        with open(os.path.join(root, filename), "rb") as f:
+            data = f.read()
+    except OSError:
+        return set()
+    return {file_digest(data)} | {chunk.chunk_id for chunk in chunk_bytes(filename, data, max_bytes)}
+
+
+class DependencyIndex:
+    """Which keys depend on which documents, and which of them document changes made stale.
+
+    changes is nexus_retrieval.document_changes (without it nothing goes stale);
+    digests maps a filename to its current_digests(). Not thread-safe: the caches
+    call it with their own lock held.
+    """
+
+    def __init__(self, changes=None, digests=current_digests):
+        self.changes = changes
+        self.digests = digests
+        self.by_file = {}  # filename -> {key: set of digests}
+        self.by_key = {}   # key -> filenames it depends on
+        self.seen = changes(None)[0] if changes is not None else None
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def add(self, key, dependencies):
+        """Records that key was built from dependencies, (filename, digest) pairs."""
+        self.discard(key)
+        for filename, digest in dependencies:
+            self.by_file.setdefault(filename, {}).setdefault(key, set()).add(digest)
+            self.by_key.setdefault(key, set()).add(filename)
+
+    def discard(self, key):
+        for filename in self.by_key.pop(key, ()):
+            dependents = self.by_file[filename]
+            del dependents[key]
+            if not dependents:
+                del self.by_file[filename]
+
+    def clear(self):
+        self.by_file.clear()
+        self.by_key.clear()
+
+    def stale(self):
+        """Keys built from a document version that has changed since the last call; they are discarded."""
+        if self.changes is None:
+            return set()
+        version, changed = self.changes(self.seen)
+        if version == self.seen:
+            return set()
+        self.seen = version
+        # Without the list of changed files (the change log moved on), check every tracked file
+        filenames = set(self.by_file) if changed is None else {os.path.normpath(name) for name in changed}
+        stale = set()
+        for filename in filenames & set(self.by_file):
+            current = self.digests(filename)
+            stale.update(key for key, digests in self.by_file[filename].items() if not digests <= current)
+        for key in stale:
+            self.discard(key)
+        return stale
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+
+# --- Document Ingestion ---
+# Splits project documents into bounded-size chunks along headings, numbered or
+# bulleted list items and paragraphs. Every chunk carries a stable ID and its
+# byte offsets in the source file, so retrieval can ship only the relevant
+# chunks to the model instead of whole documents.
+
+DOCUMENT_ROOT = os.environ.get("NEXUS_DOCUMENT_ROOT", "C:\\nexus")
+
+DOCUMENT_EXTENSIONS = (".txt", ".md")
+
+# Upper bound for one chunk, in UTF-8 bytes (roughly 300 tokens).
+MAX_CHUNK_BYTES = int(os.environ.get("NEXUS_MAX_CHUNK_BYTES", "1200"))
+
+MARKDOWN_HEADING = re.compile(rb"^\s{0,3}#{1,6}\s+\S")
+SETEXT_UNDERLINE = re.compile(rb"^\s{0,3}(=+|-+)\s*$")
+LIST_ITEM = re.compile(rb"^\s*(?:\d+[.)]|[-*]|\xe2\x80\xa2|[a-zA-Z][.)])\s+")
+SENTENCE_END = re.compile(rb"(?<=[.!?])\s+")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    chunk_id: str   # "<filename>#<content hash>", unchanged as long as the chunk text is
+    filename: str   # Path relative to the document root
+    start: int      # Byte offsets of the chunk in the UTF-8 file
+    end: int
+    heading: str    # Nearest heading above the chunk, "" if there is none
+    text: str
+
+
+def _lines(data):
+    """Yields (start, end) byte ranges of each line, without the line break."""
+    position = 0
+    for line in data.splitlines(keepends=True):
+        yield position, position + len(line.rstrip(b"\r\n"))
+        position += len(line)
+
+
+def _is_plain_heading(line, previous_blank, next_blank):
+    # A short standalone line without closing punctuation, e.g. a document title.
+    stripped = line.strip()
+    return (
+        previous_blank and next_blank and 0 < len(stripped) <= 80
+        and not stripped.endswith((b".", b",", b";", b":", b"!", b"?"))
+        and not LIST_ITEM.match(line)
+    )
+
+
+def _blocks(data):
+    """Splits a document into (kind, start, end) blocks: 'heading', 'item' or 'paragraph'."""
+    lines = list(_lines(data))
+    blocks = []
+    current = None  # [kind, start, end] of the block being extended
+
+    def close():
+        nonlocal current
+        if current is not None:
+            blocks.append(tuple(current))
+            current = None
+
+    for i, (start, end) in enumerate(lines):
+        line = data[start:end]
+        blank = not line.strip()
+        previous_blank = i == 0 or not data[lines[i - 1][0]:lines[i - 1][1]].strip()
+        next_blank = i + 1 == len(lines) or not data[lines[i + 1][0]:lines[i + 1][1]].strip()
+
+        if blank:
+            close()
+        elif MARKDOWN_HEADING.match(line) or _is_plain_heading(line, previous_blank, next_blank):
+            close()
+            blocks.append(("heading", start, end))
+        elif SETEXT_UNDERLINE.match(line) and current is not None and current[0] == "paragraph" \
+                and data[current[1]:current[2]].count(b"\n") == 0:
+            # "Title\n=====": the paragraph line above is really a heading
+            current[0], current[2] = "heading", end
+            close()
+        elif LIST_ITEM.match(line):
+            close()
+            current = ["item", start, end]
+        elif current is not None:
+            # Continuation of a paragraph or a wrapped list item
+            current[2] = end
+        else:
+            current = ["paragraph", start, end]
+    close()
+    return blocks
+
+
+def _split_oversized(data, start, end, max_bytes):
+    """Cuts one block that is too large into pieces, preferring sentence boundaries."""
+    pieces = []
+    while end - start > max_bytes:
+        limit = start + max_bytes
+        cut = None
+        for match in SENTENCE_END.finditer(data, start, limit):
+            cut = match.start()
+        if cut is None or cut <= start:
+            cut = data.rfind(b" ", start, limit)
+        if cut <= start:
+            cut = limit
+            while cut > start and (data[cut] & 0xC0) == 0x80:
+                cut -= 1  # Never split inside a UTF-8 character
+        pieces.append((start, cut))
+        start = cut
+        while start < end and data[start:start + 1].isspace():
+            start += 1
+    if start < end:
+        pieces.append((start, end))
+    return pieces
+
+
+def chunk_bytes(filename, data, max_bytes=MAX_CHUNK_BYTES):
+    """Splits the UTF-8 bytes of one document into chunks of at most max_bytes."""
+    chunks = []
+    seen = {}
+    heading = ""
+    span = None  # (start, end) of the chunk being packed
+
+    def emit(start, end):
+        text = data[start:end].decode("utf-8", errors="replace")
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        # Identical chunks in one file get an ordinal so their IDs stay unique
+        seen[digest] = seen.get(digest, 0) + 1
+        suffix = f"-{seen[digest]}" if seen[digest] > 1 else ""
+        chunks.append(Chunk(f"{filename}#{digest}{suffix}", filename, start, end, heading, text))
+
+    for kind, start, end in _blocks(data):
+        if kind == "heading":
+            # A heading always opens a new chunk so sections never share one
+            if span is not None:
+                emit(*span)
+            heading = data[start:end].decode("utf-8", errors="replace").strip().lstrip("#").strip()
+            span = (start, end)
+            continue
+
+        for piece_start, piece_end in _split_oversized(data, start, end, max_bytes):
+            if span is not None and piece_end - span[0] <= max_bytes:
+                span = (span[0], piece_end)
+            else:
+                if span is not None:
+                    emit(*span)
+                span = (piece_start, piece_end)
+    if span is not None:
+        emit(*span)
+    return chunks
+
+
+def chunk_text(filename, text, max_bytes=MAX_CHUNK_BYTES):
+    """Same as chunk_bytes for a str; offsets refer to its UTF-8 encoding."""
+    return chunk_bytes(filename, text.encode("utf-8"), max_bytes)
+
+
+def iter_document_files(root=DOCUMENT_ROOT):
+    """Yields (relative filename, absolute path) for every indexable file under root.
+
+    Hidden directories (such as an index saved inside the root, see nexus_index_store.py) are skipped.
+    """
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+        for name in sorted(files):
+            if name.lower().endswith(DOCUMENT_EXTENSIONS):
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, root), path
+
+
+def load_document(filename, path, max_bytes=MAX_CHUNK_BYTES):
+    """Reads one file and returns its chunks."""
+    with open(path, "rb") as f:
+        return chunk_bytes(filename, f.read(), max_bytes)
+
+
+class DocumentStore:
+    """All chunks of the document root, addressable by chunk ID and by file."""
+
+    def __init__(self):
+        self.chunks = {}  # chunk_id -> Chunk
+        self.files = {}   # filename -> [chunk_id, ...] in document order
+        self.stats = {}   # filename -> (mtime_ns, size) of the version on disk that was chunked
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def get(self, chunk_id):
+        return self.chunks.get(chunk_id)
+
+    def chunks_for(self, filename):
+        return [self.chunks[chunk_id] for chunk_id in self.files.get(filename, [])]
+
+    def add_file(self, filename, chunks, stat=None):
+        """Stores the chunks of one file, replacing any previous version. Returns the removed chunks."""
+        removed = self.remove_file(filename)
+        for chunk in chunks:
+            self.chunks[chunk.chunk_id] = chunk
+        self.files[filename] = [chunk.chunk_id for chunk in chunks]
+        if stat is not None:
+            self.stats[filename] = stat
+        return removed
+
+    def remove_file(self, filename):
+        """Drops every chunk of one file. Returns the removed chunks."""
+        self.stats.pop(filename, None)
+        return [self.chunks.pop(chunk_id) for chunk_id in self.files.pop(filename, [])]
+
+
+def load_store(root=DOCUMENT_ROOT, max_bytes=MAX_CHUNK_BYTES):
+    """Ingests every document under root into a DocumentStore."""
+    store = DocumentStore()
+    for filename, path in iter_document_files(root):
+        try:
+            info = os.stat(path)
+            store.add_file(filename, load_document(filename, path, max_bytes), (info.st_mtime_ns, info.st_size))
+        except OSError:
+            continue
+    return store
@@ -0,0 +1,220 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from google.genai import types
+from scipy import linalg, sparse
+
+from nexus_search import tokenize
+
+# --- Embedding Backends ---
+# Every backend turns a list of texts into one float32 row per text. Document and
+# query embeddings are separate calls because the Gemini embedding model is tuned
+# differently for each side of a search. Backends also carry a version number,
+# which changes when previously returned vectors are no longer comparable with
+# new ones (the local backend bumps it on every refit).
+
+EMBEDDING_MODEL = "gemini-embedding-001"
+EMBEDDING_DIMENSIONS = 768
+
+# The batch endpoint accepts at most 100 texts per request.
+EMBEDDING_BATCH_SIZE = 100
+
+
+class GeminiEmbedder:
+    """Embeddings from the Gemini embedding endpoint, sent in batches."""
+
+    def __init__(self, client, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIMENSIONS,
+                 batch_size=EMBEDDING_BATCH_SIZE):
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.version = 0
+
+    def _embed(self, texts, task_type):
+        matrix = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        config = types.EmbedContentConfig(task_type=task_type, output_dimensionality=self.dimensions)
+        for start in range(0, len(texts), self.batch_size):
+            batch = list(texts[start:start + self.batch_size])
+            response = self.client.models.embed_content(model=self.model, contents=batch, config=config)
+            matrix[start:start + len(batch)] = [embedding.values for embedding in response.embeddings]
+        return matrix
+
+    def embed_documents(self, texts):
+        return self._embed(texts, "RETRIEVAL_DOCUMENT")
+
+    def embed_queries(self, texts):
+        return self._embed(texts, "RETRIEVAL_QUERY")
+
+
+# --- Offline Backend (TF-IDF + truncated SVD) ---
+# For air-gapped deployments and tests without the embedding endpoint. Documents
+# are turned into sublinear TF-IDF rows in a SciPy sparse matrix and projected onto
+# the top singular vectors (latent semantic analysis), so texts that share related
+# vocabulary land close together even when they share few exact words.
+
+LOCAL_EMBEDDING_DIMENSIONS = 256
+
+# Refit once the corpus has grown by this fraction since the last fit. In between,
+# new documents are folded into the existing projection.
+LOCAL_REFIT_GROWTH = 0.25
+
+
+def randomized_components(matrix, rank, oversample=10, iterations=3, seed=0):
+    """Top right singular vectors of a sparse matrix by randomized SVD (Halko et al.).
+
+    Much faster than ARPACK at the few hundred components LSA needs. Power
+    iterations are normalized with LU (cheaper than QR), and the final small
+    SVD goes through the eigen-decomposition of a (rank x rank) Gram matrix.
+    """
+    rng = np.random.default_rng(seed)
+    basis = matrix @ rng.standard_normal((matrix.shape[1], rank + oversample)).astype(np.float32)
+    for _ in range(iterations):
+        basis, _ = linalg.lu(matrix.T @ basis, permute_l=True)
+        basis, _ = linalg.lu(matrix @ basis, permute_l=True)
+    basis, _ = np.linalg.qr(basis)
+
+    projected = np.asarray((matrix.T @ basis).T, dtype=np.float64)  # basis.T @ matrix
+    eigenvalues, eigenvectors = np.linalg.eigh(projected @ projected.T)
+    order = np.argsort(-eigenvalues)[:rank]
+    singular_values = np.sqrt(np.maximum(eigenvalues[order], 1e-12))
+    return (eigenvectors[:, order].T @ projected) / singular_values[:, None]
+
+
+class TfidfSvdEmbedder:
+    """Local LSA embeddings that refit incrementally as documents are added.
+
+    embed_documents() adds the texts to the corpus before projecting them, and
+    refits the model when the corpus has grown by refit_growth since the last
+    fit. A refit bumps version; vectors from an older version should be
+    recomputed with transform(). The re-indexer and the prompt cache share one
+    embedder across threads, so fitting and projecting hold a lock: a text is
+    never projected with a half-updated vocabulary and basis.
+    """
+
+    def __init__(self, dimensions=LOCAL_EMBEDDING_DIMENSIONS, refit_growth=LOCAL_REFIT_GROWTH):
+        self.dimensions = dimensions
+        self.refit_growth = refit_growth
+        self.version = 0
+        self.vocabulary = {}  # term -> column, over every document seen
+        self.rows = []        # (column ids, counts) per document seen
+        self.idf = None       # Fitted state, covering the first len(idf) columns
+        self.components = None
+        self.fitted_documents = 0
+        self.frozen = False   # Restored from a saved index: no corpus to refit on
+        self.stats = {"fits": 0, "fit_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_state(cls, vocabulary, idf, components, documents, dimensions=LOCAL_EMBEDDING_DIMENSIONS):
+        """Rebuilds a fitted embedder from saved state (see nexus_index_store.py).
+
+        vocabulary only needs get() and len(). The saved state carries no corpus,
+        so later documents are folded into the saved projection until the index
+        is rebuilt from the files.
+        """
+        embedder = cls(dimensions)
+        embedder.vocabulary = vocabulary
+        embedder.idf = idf
+        embedder.components = components
+        embedder.fitted_documents = documents
+        embedder.frozen = True
+        embedder.version = 1
+        return embedder
+
+    def _count(self, text, grow):
+        counts = Counter(tokenize(text))
+        columns, values = [], []
+        for term, count in counts.items():
+            column = self.vocabulary.get(term)
+            if column is None and grow:
+                column = self.vocabulary[term] = len(self.vocabulary)
+            if column is not None:
+                columns.append(column)
+                values.append(count)
+        return np.asarray(columns, dtype=np.int32), np.asarray(values, dtype=np.float32)
+
+    def _tfidf(self, rows, idf):
+        """Builds unit-length sublinear TF-IDF rows over the fitted vocabulary."""
+        columns = len(idf)
+        indptr, ids, weights = [0], [], []
+        for row_ids, row_counts in rows:
+            keep = row_ids < columns  # Terms first seen after the last fit have no weight yet
+            row_ids = row_ids[keep]
+            ids.append(row_ids)
+            weights.append((1.0 + np.log(row_counts[keep])) * idf[row_ids])
+            indptr.append(indptr[-1] + len(row_ids))
+        matrix = sparse.csr_matrix(
+            (np.concatenate(weights) if rows else [], np.concatenate(ids) if rows else [], indptr),
+            shape=(len(rows), columns), dtype=np.float32,
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+    def fit(self):
+        """Refits IDF weights and the SVD projection on every document seen so far."""
+        with self._lock:
+            self._fit()
+
+    def _fit(self):
+        started = time.perf_counter()
+        columns = len(self.vocabulary)
+        document_frequency = np.zeros(columns, dtype=np.float64)
+        for ids, _ in self.rows:
+            document_frequency[ids] += 1
+        idf = (np.log((1 + len(self.rows)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+        matrix = self._tfidf(self.rows, idf)
+
+        if min(matrix.shape) > 2 * self.dimensions:
+            components = randomized_components(matrix, self.dimensions)
+        elif min(matrix.shape) > 0:
+            # Small corpus: an exact dense SVD is cheap enough
+            _, _, components = np.linalg.svd(matrix.toarray(), full_matrices=False)
+        else:
+            components = np.zeros((0, columns))
+
+        self.idf = idf
+        self.components = np.ascontiguousarray(components[:self.dimensions], dtype=np.float32)
+        self.fitted_documents = len(self.rows)
+        self.version += 1
+
+        elapsed = time.perf_counter() - started
+        self.stats.update({
+            "fits": self.stats["fits"] + 1,
+            "fit_seconds": self.stats["fit_seconds"] + elapsed,
+            "last_fit_seconds": elapsed,
+            "documents": len(self.rows),
+            "vocabulary": columns,
+            "nnz": int(matrix.nnz),
+            "tfidf_bytes": int(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes),
+            "components_bytes": int(self.components.nbytes),
+            "corpus_bytes": int(sum(ids.nbytes + counts.nbytes for ids, counts in self.rows)),
+        })
+
+    def _project(self, rows):
+        vectors = np.zeros((len(rows), self.dimensions), dtype=np.float32)
+        if self.components is not None and rows:
+            projected = self._tfidf(rows, self.idf) @ self.components.T
+            vectors[:, :projected.shape[1]] = projected
+        return vectors
+
+    def transform(self, texts):
+        """Projects texts with the current model without adding them to the corpus."""
+        with self._lock:
+            return self._project([self._count(text, grow=False) for text in texts])
+
+    def embed_documents(self, texts):
+        if self.frozen:
+            return self.transform(texts)
+        with self._lock:
+            rows = [self._count(text, grow=True) for text in texts]
+            self.rows.extend(rows)
+            if self.components is None or len(self.rows) >= self.fitted_documents * (1.0 + self.refit_growth):
+                self._fit()
+            return self._project(rows)
+
+    def embed_queries(self, texts):
+        return self.transform(texts)
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import threading
+import time
+
+from google.genai import types
+from nexus_history import DEFAULT_TOKEN_BUDGET, ContentCache, estimate_tokens, to_content, window_history
+from nexus_metrics import TurnMetrics, error_label
+from nexus_response_cache import context_key, response_key
+from nexus_retrieval import document_changes
+from nexus_summary import RollingSummarizer
+
+# --- Chat Engine ---
+# The conversation logic behind both front ends, written against the SDK's async
+# client (client.aio) so one event loop can serve many conversations at once:
+# model streaming is awaited, tool calls run concurrently through ToolRunner and
+# blocking helpers (prompt embedding for the semantic cache) are moved off the
+# loop. nexus_chat.py drives the engine with asyncio.run(); nexus_app.py runs it
+# on one process-wide EngineLoop thread and pulls the chunks from its script
+# threads, so a generation never holds a thread of its own while it waits.
+#
+# Each turn: the request is built from the rolling summary and the history window
+# (see nexus_history.py), answered from the response caches when possible, and
+# otherwise streamed from the model. Function calls that arrive in the stream are
+# executed and their results sent back until the model answers in text. Every
+# turn leaves a TurnMetrics record (nexus_metrics.py) in Conversation.metrics,
+# which is also handed to the engine's TimingRecorder, if it has one, along with
+# how the turn ended.
+
+logger = logging.getLogger("nexus.engine")
+
+
+class Conversation:
+    """Per-conversation state: the message list, its API-side copy, the rolling summary and per-turn records.
+
+    messages holds {"role", "content"} dicts; assistant messages built from the
+    project documents also carry their "sources" (see nexus_dependencies.py).
+    """
+
+    def __init__(self, client, messages=None):
+        self.messages = messages if messages is not None else []
+        self.content_cache = ContentCache()
+        self.summarizer = RollingSummarizer(client, changes=document_changes)
+        self.request_log = []  # Request size per turn, for the front ends to display
+        self.metrics = []      # TurnMetrics per turn
+
+    def reset(self):
+        """Clears the conversation in place."""
+        self.messages.clear()
+        self.summarizer.reset()
+        self.content_cache.invalidate()
+
+
+class ChatEngine:
+    """Answers turns of Conversations with one model, persona and (optional) tool set.
+
+    tool_runner is a nexus_tools.ToolRunner; its tools are declared to the model.
+    With match_history=False the semantic cache keys prompts on the previous
+    exchange only, not the whole history window: opening questions are shared
+    across sessions, while a follow-up only matches after the same exchange.
+    recorder is a nexus_metrics.TimingRecorder that gets every turn's record.
+    """
+
+    def __init__(self, client, model, system_instruction, temperature=0.7, tool_runner=None,
+                 token_budget=DEFAULT_TOKEN_BUDGET, response_cache=None, semantic_cache=None, match_history=True,
+                 recorder=None):
+        self.client = client
+        self.model = model
+        self.system_instruction = system_instruction
+        self.tool_runner = tool_runner
+        self.token_budget = token_budget
+        self.response_cache = response_cache
+        self.semantic_cache = semantic_cache
+        self.match_history = match_history
+        self.recorder = recorder
+        self.config = types.GenerateContentConfig(system_instruction=system_instruction, temperature=temperature)
+        if tool_runner is not None:
+            # Tool calls are executed by reply() rather than inside the SDK
+            self.config.tools = list(tool_runner.tools.values())
+            self.config.automatic_function_calling = types.AutomaticFunctionCallingConfig(disable=True)
+
+    def conversation(self, messages=None):
+        return Conversation(self.client, messages)
+
+    def _request(self, conversation):
+        """The contents for the next turn and the history messages they carry, plus request-size stats."""
+        history = conversation.messages
+        conversation.content_cache.sync(history)
+
+        # Turns already folded into the rolling summary are replaced by it, and only
+        # the most recent turns that fit the token budget are sent.
+        summary, start = conversation.summarizer.split(history)
+        summary_tokens = estimate_tokens(summary["content"]) if summary else 0
+        window = window_history(history, token_budget=self.token_budget - summary_tokens,
+                                start=start, tokens=conversation.content_cache.tokens)
+        contents = [to_content(summary)] if summary else []
+        contents.extend(conversation.content_cache.contents_for(window))
+        sent = ([summary] if summary else []) + window.messages
+        entry = {
+            "tokens": summary_tokens + window.token_count + estimate_tokens(self.system_instruction),
+            "history_messages": len(window.messages),
+            "dropped": window.dropped,
+            "shrunk": window.shrunk,
+            "cached": None,
+        }
+        return contents, sent, entry
+
+    async def reply(self, conversation, prompt):
+        """Answers prompt as the next turn of conversation, yielding text chunks as they arrive.
+
+        The prompt is added to conversation.messages right away and the answer
+        once it is complete; an interrupted turn leaves no answer behind.
+        """
+        if self.recorder is None:
+            async for text in self._turn(conversation, prompt):
+                yield text
+            return
+        error = None
+        try:
+            async for text in self._turn(conversation, prompt):
+                yield text
+        except Exception as e:
+            error = error_label(e)
+            raise
+        finally:
+            metrics = conversation.metrics[-1] if conversation.metrics else None
+            if metrics is not None:
+                # A turn the caller stopped reading never finished
+                self.recorder.record(metrics, error or (None if metrics.total_seconds is not None else "interrupted"))
+
+    async def _turn(self, conversation, prompt):
+        metrics = TurnMetrics()
+        conversation.metrics.append(metrics)
+        contents, sent, entry = self._request(conversation)
+        contents.append(types.Content(role="user", parts=[types.Part.from_text(text=prompt)]))
+        entry["tokens"] += estimate_tokens(prompt)
+        conversation.request_log.append(entry)
+        conversation.messages.append({"role": "user", "content": prompt})
+        metrics.history_seconds = metrics.elapsed()
+
+        # Serve a repeated (or, failing that, paraphrased) request from the caches
+        key = cached = context = vector = None
+        if self.response_cache is not None:
+            key = response_key(self.model, self.system_instruction, self.config, sent, prompt)
+            cached = self.response_cache.get(key)
+            entry["cached"] = "exact" if cached is not None else None
+        if cached is None and self.semantic_cache is not None:
+            # A follow-up ("make it shorter") means nothing without the turns before it
+            context = context_key(self.model, self.system_instruction, self.config,
+                                  sent if self.match_history else sent[-2:])
+            try:
+                cached, vector = await asyncio.to_thread(self.semantic_cache.lookup, context, prompt)
+            except Exception as e:
+                logger.warning("Semantic cache unavailable: %s", e)
+                entry["cache_error"] = str(e)
+            entry["cached"] = "semantic" if cached is not None else None
+        metrics.cached = entry["cached"]
+        metrics.cache_seconds = metrics.elapsed() - metrics.history_seconds
+
+        if cached is not None:
+            for text in cached.chunks:
+                metrics.record_chunk(text)
+                yield text
+            self._finish(conversation, cached.text, cached.dependencies, metrics)
+            return
+
+        started = time.perf_counter()
+        chunks = []
+        sources = set()
+        while True:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model, contents=contents, config=self.config)
+            metrics.start_call()  # The request goes out on the first read below
+            model_parts, calls, usage = [], [], None
+            async for chunk in stream:
+                usage = chunk.usage_metadata or usage
+                candidate = chunk.candidates[0] if chunk.candidates else None
+                parts = (candidate.content.parts if candidate and candidate.content else None) or []
+                model_parts.extend(parts)
+                for part in parts:
+                    if part.function_call:
+                        # Function calls can arrive mid-stream, after some text
+                        calls.append(part.function_call)
+                    elif part.text and not part.thought:
+                        chunks.append(part.text)
+                        metrics.record_chunk(part.text)
+                        yield part.text
+            # Streamed usage counts are running totals; the last chunk has the call's final ones
+            metrics.record_usage(usage)
+            if not calls:
+                break
+
+            # Execute the calls concurrently and send every result back in one request
+            tools_started = time.perf_counter()
+            results = await self.tool_runner.run_async([(call.name, call.args) for call in calls], sources)
+            metrics.tool_seconds += time.perf_counter() - tools_started
+            metrics.tool_calls.extend(call.name for call in calls)
+            contents.append(types.Content(role="model", parts=model_parts))
+            contents.append(types.Content(role="user", parts=[
+                types.Part.from_function_response(name=call.name, response={"result": result})
+                for call, result in zip(calls, results)
+            ]))
+
+        # Only complete answers are cached; an interrupted stream never gets here
+        elapsed = time.perf_counter() - started
+        if self.response_cache is not None:
+            self.response_cache.put(key, chunks, elapsed, sources)
+        if vector is not None:
+            self.semantic_cache.put(context, prompt, vector, chunks, elapsed, sources)
+        self._finish(conversation, "".join(chunks), sources, metrics)
+
+    def _finish(self, conversation, answer, sources, metrics):
+        message = {"role": "assistant", "content": answer}
+        if sources:
+            message["sources"] = sorted(sources)
+        conversation.messages.append(message)
+        # Compact old turns in the background if the history has grown past the threshold
+        conversation.summarizer.maybe_schedule(conversation.messages)
+        metrics.finish()
+        logger.debug("Turn metrics: %s", metrics.as_dict())
+
+
+class EngineLoop:
+    """An event loop on a daemon thread, for running the engine from synchronous code.
+
+    Streamlit runs every session's script on its own thread; they all submit
+    their turns here, so concurrent generations share one loop.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="nexus-engine", daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine):
+        """Schedules a coroutine on the loop; returns its concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine):
+        """Runs a coroutine on the loop and returns its result."""
+        return self.submit(coroutine).result()
+
+    def iterate(self, generator):
+        """Iterates an async generator on the loop from the calling thread."""
+        try:
+            while True:
+                try:
+                    yield self.run(generator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Also reached when the consumer stops early, e.g. on a Streamlit rerun
+            self.run(generator.aclose())
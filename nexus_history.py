@@ -0,0 +1,151 @@
+import os
+from dataclasses import dataclass, field
+
+from google.genai import types
+
+# --- History Windowing ---
+# Instead of resending the whole conversation on every turn, the request only
+# carries as much history as fits a token budget. The most recent messages are
+# kept verbatim; older ones are shrunk to a short excerpt or dropped entirely.
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("NEXUS_HISTORY_TOKEN_BUDGET", "6000"))
+
+# Always keep this many of the newest messages verbatim, budget permitting.
+DEFAULT_KEEP_RECENT = 6
+
+# Older messages that no longer fit verbatim are cut down to this many tokens.
+DEFAULT_SHRINK_TOKENS = 60
+
+TRIM_MARKER = " [...]"
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token), good enough for budgeting."""
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def shrink_text(text, max_tokens):
+    """Cuts text down to at most max_tokens (by estimate_tokens), breaking on a word boundary.
+
+    Returns "" when max_tokens leaves no room for the trim marker.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens * 4 - len(TRIM_MARKER)  # The marker counts against the budget too
+    if limit <= 0:
+        return ""
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit] + TRIM_MARKER
+
+
+def to_content(msg):
+    """Converts one {"role", "content"} message into an API-side types.Content."""
+    # Streamlit session state stores 'user' and 'assistant' roles
+    role = 'user' if msg["role"] == 'user' else 'model'
+    return types.Content(role=role, parts=[types.Part.from_text(text=msg["content"])])
+
+
+@dataclass
+class HistoryWindow:
+    messages: list = field(default_factory=list)  # The {"role", "content"} dicts to send, oldest first
+    indices: list = field(default_factory=list)   # Position of each selected message in the history
+    token_count: int = 0                          # Estimated tokens in the windowed messages
+    dropped: int = 0                              # Messages left out of the request
+    shrunk: int = 0                               # Messages sent as a shortened excerpt
+
+
+def window_history(history, token_budget=DEFAULT_TOKEN_BUDGET, keep_recent=DEFAULT_KEEP_RECENT,
+                   shrink_tokens=DEFAULT_SHRINK_TOKENS, start=0, tokens=None):
+    """Selects the messages to send for the next turn within token_budget.
+
+    Walks history[start:] newest first. Messages are kept verbatim while they
+    fit. A message that does not fit is shrunk: the newest keep_recent messages
+    may use whatever budget is left, older ones are cut to shrink_tokens. Once
+    one message has been dropped, everything older is dropped too so the window
+    stays contiguous. tokens may hold precomputed per-message counts (see
+    ContentCache) so only the messages inside the window are looked at.
+    """
+    window = HistoryWindow()
+    remaining = token_budget
+    position = 0
+    index = len(history) - 1
+
+    while index >= start:
+        msg = history[index]
+        text = msg.get("content")
+        if not isinstance(text, str) or not text:
+            index -= 1
+            continue
+
+        cost = tokens[index] if tokens is not None else estimate_tokens(text)
+        if cost > remaining:
+            # Recent messages may use whatever budget is left; older ones get a short excerpt.
+            limit = remaining if position < keep_recent else min(shrink_tokens, remaining)
+            excerpt = shrink_text(text, limit)
+            cost = estimate_tokens(excerpt)
+            if not excerpt:
+                break
+            msg = {**msg, "content": excerpt}
+            window.shrunk += 1
+
+        window.messages.append(msg)
+        window.indices.append(index)
+        remaining -= cost
+        position += 1
+        index -= 1
+
+    window.messages.reverse()
+    window.indices.reverse()
+    window.token_count = token_budget - remaining
+    window.dropped = index - start + 1 if index >= start else 0
+    return window
+
+
+# --- Incremental Content Cache ---
+# Converting every message to types.Content on every turn is O(n) allocation on
+# an already heavy rerun path. The cache keeps the converted history next to
+# st.session_state.messages and only converts messages it has not seen yet.
+
+class ContentCache:
+    """API-side copy of a message list, extended by one entry per new message.
+
+    sync() compares the last converted message with the same position in the
+    list by identity; if the list got shorter or that message is a different
+    object (history cleared or replaced), everything is rebuilt. Edits in the
+    middle of the list cannot be seen this way, so call invalidate() after them.
+    """
+
+    def __init__(self):
+        self.sources = []   # The message dicts that were converted
+        self.contents = []  # types.Content per message, None for empty/non-text messages
+        self.tokens = []    # Estimated tokens per message
+        self.rebuilds = 0
+
+    def invalidate(self):
+        self.sources, self.contents, self.tokens = [], [], []
+
+    def sync(self, messages):
+        """Brings the cache in line with messages. Returns the number of newly converted entries."""
+        converted = len(self.sources)
+        if converted > len(messages) or (converted and self.sources[-1] is not messages[converted - 1]):
+            self.invalidate()
+            self.rebuilds += 1
+            converted = 0
+
+        new = messages[converted:]
+        for msg in new:
+            text = msg.get("content")
+            usable = isinstance(text, str) and bool(text)
+            self.sources.append(msg)
+            self.contents.append(to_content(msg) if usable else None)
+            self.tokens.append(estimate_tokens(text) if usable else 0)
+        return len(new)
+
+    def contents_for(self, window):
+        """Returns the types.Content list for a window over the synced messages."""
+        return [
+            self.contents[index] if msg is self.sources[index] else to_content(msg)
+            for index, msg in zip(window.indices, window.messages)
+        ]
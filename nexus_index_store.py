@@ -0,0 +1,619 @@
+import json
+import math
+import os
+import shutil
+import struct
+import time
+
+import numpy as np
+
+from nexus_ann import DEFAULT_NPROBE
+from nexus_documents import Chunk, DocumentStore
+from nexus_embeddings import TfidfSvdEmbedder
+from nexus_search import BM25Index, index_text, tokenize
+from nexus_vectors import VectorIndex, normalize, top_k
+
+# --- Saved Index (memory-mapped) ---
+# Rebuilding retrieval state from the raw files on every start costs time in
+# proportion to the corpus, and again in every Streamlit process. The index is
+# saved instead as a directory of fixed-layout binary arrays that are mapped with
+# numpy.memmap: opening it reads a few headers and nothing else, pages are loaded
+# on first touch, and processes mapping the same files share the page cache.
+#
+#   <index dir>/CURRENT            name of the live generation, e.g. "gen-1760000000000-4242"
+#   <index dir>/gen-.../manifest.json
+#   <index dir>/gen-.../<array>.bin
+#
+# Every .bin file is one array behind a 64-byte header (magic, format version,
+# dtype, shape). Lists of strings are stored as an offsets array plus one UTF-8
+# blob; the ones that are looked up (chunk IDs, BM25 terms, vocabulary) are sorted
+# by their bytes, so lookups are binary searches over the mapped data instead of a
+# dict built at load time.
+#
+# A rebuild writes a complete new generation under a temporary name, fsyncs it,
+# renames it into place and only then swaps CURRENT with os.replace(). A crash at
+# any point leaves CURRENT naming the previous, complete generation.
+
+INDEX_FORMAT_VERSION = 2
+
+MAGIC = b"NEXUSIDX"
+HEADER = struct.Struct("<8sI8sI4Q")  # magic, format version, dtype, ndim, shape (up to 4 dims)
+HEADER_SIZE = 64
+
+POINTER = "CURRENT"
+MANIFEST = "manifest.json"
+
+# Unfinished generations left behind by a crashed writer are removed after this long.
+STALE_SECONDS = 3600
+
+
+class IndexFormatError(ValueError):
+    """A saved index file is truncated, from another format version or not an index at all."""
+
+
+def write_array(path, array):
+    """Writes one array behind a fixed header and fsyncs it."""
+    array = np.ascontiguousarray(array)
+    if array.ndim > 4:
+        raise ValueError(f"arrays of at most 4 dimensions can be saved, got {array.ndim}")
+    shape = tuple(array.shape) + (0,) * (4 - array.ndim)
+    header = HEADER.pack(MAGIC, INDEX_FORMAT_VERSION, array.dtype.str.encode("ascii"), array.ndim, *shape)
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        array.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_array(path):
+    """Maps one saved array read-only, after checking its header against the file size."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        size = os.fstat(f.fileno()).st_size
+    if len(header) < HEADER_SIZE:
+        raise IndexFormatError(f"{path}: truncated header")
+    magic, version, dtype, ndim, *shape = HEADER.unpack_from(header)
+    if magic != MAGIC or version != INDEX_FORMAT_VERSION:
+        raise IndexFormatError(f"{path}: not a version {INDEX_FORMAT_VERSION} index file")
+    dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+    shape = tuple(shape[:ndim])
+    if size != HEADER_SIZE + dtype.itemsize * math.prod(shape):
+        raise IndexFormatError(f"{path}: expected {math.prod(shape)} items of {dtype}, file is {size} bytes")
+    if math.prod(shape) == 0:
+        return np.zeros(shape, dtype=dtype)  # numpy cannot map an empty range
+    # A plain ndarray view of the map indexes much faster than the memmap subclass
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=shape).view(np.ndarray)
+
+
+class StringTable:
+    """A saved list of strings: n + 1 offsets into one UTF-8 blob."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, position):
+        return self.blob[self.offsets[position]:self.offsets[position + 1]].tobytes()
+
+    def __getitem__(self, position):
+        return self.raw(position).decode("utf-8")
+
+    def find(self, text):
+        """Position of text in a table sorted by UTF-8 bytes, or -1."""
+        key = text.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.raw(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < len(self) and self.raw(low) == key else -1
+
+
+def write_strings(directory, name, strings):
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+    write_array(os.path.join(directory, f"{name}.offsets.bin"), offsets)
+    write_array(os.path.join(directory, f"{name}.bin"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+def read_strings(directory, name):
+    return StringTable(
+        read_array(os.path.join(directory, f"{name}.offsets.bin")),
+        read_array(os.path.join(directory, f"{name}.bin")),
+    )
+
+
+def _byte_order(strings):
+    """Sorts strings the way StringTable.find() expects (by UTF-8 bytes)."""
+    return sorted(strings, key=lambda text: text.encode("utf-8"))
+
+
+class MappedVocabulary:
+    """term -> column lookups over a saved TfidfSvdEmbedder vocabulary."""
+
+    def __init__(self, terms, columns):
+        self.terms = terms
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return (self.terms[i] for i in range(len(self.terms)))
+
+    def get(self, term, default=None):
+        position = self.terms.find(term)
+        return default if position < 0 else int(self.columns[position])
+
+
+class MappedIndex:
+    """A saved index generation, mapped read-only. Chunks are addressed by position."""
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.chunk_ids = read_strings(path, "chunk_ids")
+        self.chunk_files = read_strings(path, "chunk_files")
+        self.headings = read_strings(path, "headings")
+        self.texts = read_strings(path, "texts")
+        self.spans = read_array(os.path.join(path, "spans.bin"))
+        self.files = read_strings(path, "files")
+        self.file_stats = read_array(os.path.join(path, "file_stats.bin"))
+        self.file_chunks_indptr = read_array(os.path.join(path, "file_chunks_indptr.bin"))
+        self.file_chunks = read_array(os.path.join(path, "file_chunks.bin"))
+
+        self.terms = read_strings(path, "terms")
+        self.postings_indptr = read_array(os.path.join(path, "postings_indptr.bin"))
+        self.postings_chunks = read_array(os.path.join(path, "postings_chunks.bin"))
+        self.postings_tf = read_array(os.path.join(path, "postings_tf.bin"))
+        self.lengths = read_array(os.path.join(path, "lengths.bin"))
+
+        self.vectors = self.vector_chunks = self.list_offsets = self.centroids = None
+        if manifest.get("embedder"):
+            self.vectors = read_array(os.path.join(path, "vectors.bin"))
+            self.vector_chunks = read_array(os.path.join(path, "vector_chunks.bin"))
+            self.list_offsets = read_array(os.path.join(path, "list_offsets.bin"))
+            if manifest["embedder"]["trained"]:
+                self.centroids = read_array(os.path.join(path, "centroids.bin"))
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def chunk(self, position):
+        start, end = self.spans[position]
+        return Chunk(
+            chunk_id=self.chunk_ids[position],
+            filename=self.chunk_files[position],
+            start=int(start),
+            end=int(end),
+            heading=self.headings[position],
+            text=self.texts[position],
+        )
+
+    def find(self, chunk_id):
+        """Position of a chunk ID, or -1."""
+        return self.chunk_ids.find(chunk_id)
+
+    def stats(self):
+        """filename -> (mtime_ns, size) of every file as it was when the index was saved."""
+        return {self.files[i]: (int(mtime), int(size)) for i, (mtime, size) in enumerate(self.file_stats)}
+
+    def restore_embedder(self):
+        """The saved local (TF-IDF + SVD) embedder, for embedding queries."""
+        embedder = self.manifest["embedder"]
+        return TfidfSvdEmbedder.from_state(
+            MappedVocabulary(read_strings(self.path, "vocabulary"),
+                             read_array(os.path.join(self.path, "vocabulary_columns.bin"))),
+            read_array(os.path.join(self.path, "idf.bin")),
+            read_array(os.path.join(self.path, "components.bin")),
+            embedder["documents"],
+            dimensions=embedder["dimensions"],
+        )
+
+
+class IndexSnapshot:
+    """A MappedIndex plus the file changes applied since it was saved.
+
+    Snapshots are never modified: with_changes() returns a new one, so a query
+    running on the old snapshot is not disturbed by an update. Saved chunks of
+    changed files are masked out and their new chunks live in small in-memory
+    indexes next to the mapped ones until the next save.
+    """
+
+    def __init__(self, index, hidden=None, chunks=None, stats=None, bm25=None, vectors=None):
+        self.index = index
+        self.hidden = hidden        # Bool per saved chunk, True once its file changed; None if none did
+        self.chunks = chunks or {}  # chunk_id -> Chunk added since the save
+        self.stats = stats or {}    # filename -> (mtime_ns, size) of changed files, None once deleted
+        self.bm25 = bm25 if bm25 is not None else BM25Index()
+        self.vectors = vectors      # VectorIndex over chunks (semantic modes only)
+        self.hidden_count = 0 if hidden is None else int(hidden.sum())
+        self.hidden_length = 0 if hidden is None else int(index.lengths[hidden].sum())
+
+    def __len__(self):
+        return len(self.index) - self.hidden_count + len(self.chunks)
+
+    @property
+    def pending(self):
+        """Chunks changed since the save: masked saved ones plus added ones."""
+        return self.hidden_count + len(self.chunks)
+
+    def file_stats(self):
+        """filename -> (mtime_ns, size) of every indexed file, changes included."""
+        stats = self.index.stats()
+        for filename, stat in self.stats.items():
+            if stat is None:
+                stats.pop(filename, None)
+            else:
+                stats[filename] = stat
+        return stats
+
+    def with_changes(self, removed_files, chunks, stats, vectors=None):
+        """A new snapshot where removed_files lose their chunks and chunks (with vectors) are added.
+
+        A modified file appears in removed_files and has its new chunks in chunks.
+        """
+        removed_files = set(removed_files)
+        chunks = list(chunks)
+        hidden = np.zeros(len(self.index), dtype=bool) if self.hidden is None else self.hidden.copy()
+        for filename in removed_files:
+            position = self.index.files.find(filename)
+            if position >= 0:
+                start, end = self.index.file_chunks_indptr[position], self.index.file_chunks_indptr[position + 1]
+                hidden[self.index.file_chunks[start:end]] = True
+
+        added = {chunk_id: chunk for chunk_id, chunk in self.chunks.items() if chunk.filename not in removed_files}
+        bm25 = self.bm25.copy()
+        for chunk_id in self.chunks.keys() - added.keys():
+            bm25.remove(chunk_id)
+        for chunk in chunks:
+            added[chunk.chunk_id] = chunk
+            bm25.add(chunk)
+
+        index = self.vectors
+        if vectors is not None or index is not None:
+            dimensions = index.dimensions if index is not None else vectors.shape[1]
+            index = VectorIndex(dimensions, capacity=max(16, len(added)))
+            if self.vectors is not None:
+                kept = [key for key in self.vectors.keys if key in added]
+                index.add(kept, self.vectors.matrix[[self.vectors.rows[key] for key in kept]])
+            if chunks:
+                index.add([chunk.chunk_id for chunk in chunks], vectors)
+
+        stats = {**self.stats, **{filename: None for filename in removed_files}, **stats}
+        return IndexSnapshot(self.index, hidden, added, stats, bm25, index)
+
+    def live_positions(self):
+        """Positions of the saved chunks that are still current."""
+        if self.hidden is None:
+            return np.arange(len(self.index))
+        return np.flatnonzero(~self.hidden)
+
+    def to_store(self):
+        """Every current chunk as a DocumentStore, for saving a new generation."""
+        store = DocumentStore()
+        by_file = {}
+        for position in self.live_positions():
+            chunk = self.index.chunk(int(position))
+            by_file.setdefault(chunk.filename, []).append(chunk)
+        for chunk in self.chunks.values():
+            by_file.setdefault(chunk.filename, []).append(chunk)
+        stats = self.file_stats()
+        for filename, chunks in by_file.items():
+            store.add_file(filename, sorted(chunks, key=lambda chunk: chunk.start), stats.get(filename))
+        for filename, stat in stats.items():
+            if filename not in store.files:
+                store.add_file(filename, [], stat)  # Indexed, but without any text to chunk
+        return store
+
+    def vector_items(self):
+        """(chunk IDs, vectors) of every current chunk, for saving a new generation."""
+        index = self.index
+        rows = np.arange(len(index.vector_chunks))
+        if self.hidden is not None:
+            rows = rows[~self.hidden[index.vector_chunks]]
+        keys = [index.chunk_ids[int(index.vector_chunks[row])] for row in rows]
+        vectors = [np.asarray(index.vectors[rows])]
+        if self.vectors is not None:
+            keys.extend(self.vectors.keys)
+            vectors.append(self.vectors.vectors)
+        return keys, np.concatenate(vectors)
+
+
+def _merge(first, second, k):
+    """The k best of two (chunk, score) lists."""
+    return sorted(first + second, key=lambda hit: hit[1], reverse=True)[:k]
+
+
+class MappedBM25:
+    """BM25 search over a saved index and the changes since (same scores as BM25Index).
+
+    Document frequencies and lengths are combined over the saved postings that
+    are still current and the in-memory postings of changed files, so scores
+    match a full rebuild.
+    """
+
+    def __init__(self, snapshot, k1=1.5, b=0.75):
+        self.snapshot = snapshot
+        self.k1 = k1
+        self.b = b
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def with_snapshot(self, snapshot):
+        return MappedBM25(snapshot, self.k1, self.b)
+
+    def search(self, query, k=5):
+        snapshot = self.snapshot
+        index, delta, hidden = snapshot.index, snapshot.bm25, snapshot.hidden
+        count = len(snapshot)
+        if not count:
+            return []
+        total_length = index.manifest["total_length"] - snapshot.hidden_length + delta.total_length
+        average_length = total_length / count or 1.0
+        positions, contributions, delta_scores = [], [], {}
+        for term in set(tokenize(query)):
+            chunks = tf = None
+            row = index.terms.find(term)
+            if row >= 0:
+                start, end = index.postings_indptr[row], index.postings_indptr[row + 1]
+                chunks = np.asarray(index.postings_chunks[start:end])
+                tf = np.asarray(index.postings_tf[start:end], dtype=np.float64)
+                if hidden is not None:
+                    keep = ~hidden[chunks]
+                    chunks, tf = chunks[keep], tf[keep]
+            postings = delta.postings.get(term, {})
+            frequency = (0 if chunks is None else len(chunks)) + len(postings)
+            if not frequency:
+                continue
+            idf = math.log(1.0 + (count - frequency + 0.5) / (frequency + 0.5))
+            if chunks is not None and len(chunks):
+                norm = self.k1 * (1.0 - self.b + self.b * index.lengths[chunks] / average_length)
+                positions.append(chunks)
+                contributions.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+            for chunk_id, count_in_chunk in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * delta.lengths[chunk_id] / average_length)
+                score = idf * count_in_chunk * (self.k1 + 1.0) / (count_in_chunk + norm)
+                delta_scores[chunk_id] = delta_scores.get(chunk_id, 0.0) + score
+
+        saved = []
+        if positions:
+            candidates, inverse = np.unique(np.concatenate(positions), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(contributions))
+            indices, best = top_k(scores[None, :], k)
+            saved = [(index.chunk(int(candidates[i])), float(score)) for i, score in zip(indices[0], best[0])]
+        changed = [(delta.chunks[chunk_id], score) for chunk_id, score in delta_scores.items()]
+        return _merge(saved, changed, k)
+
+
+class MappedSemanticRetriever:
+    """Embedding search over the saved vectors of an index and the changes since.
+
+    Vectors are saved grouped by IVF list, so probing a list reads one contiguous
+    slice of the mapped matrix. An index saved before its quantizer was trained is
+    a single list and is searched exactly. Chunks added since the save are
+    searched exactly in a small in-memory VectorIndex.
+    """
+
+    def __init__(self, snapshot, embedder, nprobe=DEFAULT_NPROBE):
+        self.snapshot = snapshot
+        self.embedder = embedder
+        self.nprobe = nprobe
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def with_snapshot(self, snapshot):
+        return MappedSemanticRetriever(snapshot, self.embedder, self.nprobe)
+
+    def _lists(self, query):
+        index = self.snapshot.index
+        if index.centroids is None:
+            return range(len(index.list_offsets) - 1)
+        nprobe = min(self.nprobe, len(index.centroids))
+        return np.argpartition(-(index.centroids @ query), nprobe - 1)[:nprobe]
+
+    def _search_saved(self, query, k):
+        index, hidden = self.snapshot.index, self.snapshot.hidden
+        rows, scores = [], []
+        for number in self._lists(query):
+            start, end = index.list_offsets[number], index.list_offsets[number + 1]
+            if end > start:
+                rows.append(np.arange(start, end))
+                scores.append(index.vectors[start:end] @ query)
+        if not rows:
+            return []
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        if hidden is not None:
+            keep = ~hidden[index.vector_chunks[rows]]
+            rows, scores = rows[keep], scores[keep]
+        indices, best = top_k(scores[None, :], k)
+        return [(index.chunk(int(index.vector_chunks[rows[i]])), float(score)) for i, score in zip(indices[0], best[0])]
+
+    def search_many(self, queries, k=5):
+        if not queries:
+            return []
+        snapshot = self.snapshot
+        results = []
+        for query in normalize(self.embedder.embed_queries(list(queries))):
+            changed = []
+            if snapshot.vectors is not None and len(snapshot.vectors):
+                changed = [(snapshot.chunks[key], score) for key, score in snapshot.vectors.search(query, k)[0]]
+            results.append(_merge(self._search_saved(query, k), changed, k))
+        return results
+
+    def search(self, query, k=5):
+        return self.search_many([query], k)[0]
+
+
+def _vector_lists(index):
+    """(centroids or None, [(keys, vectors), ...]) of a VectorIndex or IVFIndex."""
+    if hasattr(index, "lists"):
+        return index.centroids, [(inverted_list.keys, inverted_list.vectors) for inverted_list in index.lists]
+    return None, [(index.keys, index.vectors)]
+
+
+def _write_generation(path, store, semantic):
+    chunks = sorted(store.chunks.values(), key=lambda chunk: chunk.chunk_id.encode("utf-8"))
+    position = {chunk.chunk_id: i for i, chunk in enumerate(chunks)}
+    write_strings(path, "chunk_ids", [chunk.chunk_id for chunk in chunks])
+    write_strings(path, "chunk_files", [chunk.filename for chunk in chunks])
+    write_strings(path, "headings", [chunk.heading for chunk in chunks])
+    write_strings(path, "texts", [chunk.text for chunk in chunks])
+    write_array(os.path.join(path, "spans.bin"),
+                np.array([(chunk.start, chunk.end) for chunk in chunks], dtype=np.int64).reshape(-1, 2))
+
+    files = _byte_order(store.files)
+    write_strings(path, "files", files)
+    write_array(os.path.join(path, "file_stats.bin"),
+                np.array([store.stats.get(filename, (0, 0)) for filename in files], dtype=np.int64).reshape(-1, 2))
+    # Chunk positions per file, so a changed file's saved chunks can be masked out
+    write_array(os.path.join(path, "file_chunks_indptr.bin"),
+                np.concatenate([[0], np.cumsum([len(store.files[filename]) for filename in files])]).astype(np.int64))
+    write_array(os.path.join(path, "file_chunks.bin"),
+                np.array([position[chunk_id] for filename in files for chunk_id in store.files[filename]], dtype=np.int32))
+
+    # BM25 postings in CSR form: the postings of terms[i] are entries indptr[i]:indptr[i + 1]
+    postings = {}
+    lengths = np.zeros(len(chunks), dtype=np.int32)
+    for i, chunk in enumerate(chunks):
+        terms = tokenize(index_text(chunk))
+        lengths[i] = len(terms)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            postings.setdefault(term, []).append((i, count))
+    terms = _byte_order(postings)
+    write_strings(path, "terms", terms)
+    write_array(os.path.join(path, "postings_indptr.bin"),
+                np.concatenate([[0], np.cumsum([len(postings[term]) for term in terms])]).astype(np.int64))
+    entries = np.array([entry for term in terms for entry in postings[term]], dtype=np.int32).reshape(-1, 2)
+    write_array(os.path.join(path, "postings_chunks.bin"), entries[:, 0])
+    write_array(os.path.join(path, "postings_tf.bin"), entries[:, 1])
+    write_array(os.path.join(path, "lengths.bin"), lengths)
+
+    manifest = {
+        "format": INDEX_FORMAT_VERSION,
+        "created": time.time(),
+        "chunks": len(chunks),
+        "files": len(files),
+        "terms": len(terms),
+        "total_length": int(lengths.sum()),
+        "embedder": None,
+    }
+    if semantic is not None:
+        embedder = semantic.embedder
+        centroids, lists = _vector_lists(semantic.index)
+        offsets = np.concatenate([[0], np.cumsum([len(keys) for keys, _ in lists])]).astype(np.int64)
+        write_array(os.path.join(path, "list_offsets.bin"), offsets)
+        write_array(os.path.join(path, "vector_chunks.bin"),
+                    np.array([position[key] for keys, _ in lists for key in keys], dtype=np.int32))
+        write_array(os.path.join(path, "vectors.bin"),
+                    np.concatenate([vectors for _, vectors in lists]).astype(np.float32))
+        if centroids is not None:
+            write_array(os.path.join(path, "centroids.bin"), centroids.astype(np.float32))
+        local = isinstance(embedder, TfidfSvdEmbedder)
+        manifest["embedder"] = {
+            "backend": "local" if local else "gemini",
+            "model": getattr(embedder, "model", None),
+            "dimensions": embedder.dimensions,
+            "trained": centroids is not None,
+            "documents": embedder.fitted_documents if local else None,
+        }
+        if local:
+            vocabulary = [term for term in _byte_order(embedder.vocabulary) if embedder.vocabulary.get(term) < len(embedder.idf)]
+            write_strings(path, "vocabulary", vocabulary)
+            write_array(os.path.join(path, "vocabulary_columns.bin"),
+                        np.array([embedder.vocabulary.get(term) for term in vocabulary], dtype=np.int32))
+            write_array(os.path.join(path, "idf.bin"), embedder.idf)
+            write_array(os.path.join(path, "components.bin"), embedder.components)
+
+    # The manifest goes last: a generation without one was never finished
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(path):
+    """Makes renames inside path durable. Windows cannot open directories, and needs no help."""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def _prune(directory, keep):
+    """Removes superseded generations, and unfinished ones left by crashed writers.
+
+    Another process may still have an old generation mapped. POSIX keeps its
+    files alive until they are unmapped; on Windows the removal fails and is
+    retried after the next save.
+    """
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not name.startswith("gen-") or name == keep:
+            continue
+        if name.endswith(".tmp"):
+            try:
+                if time.time() - os.path.getmtime(path) < STALE_SECONDS:
+                    continue  # Possibly another writer, still busy
+            except OSError:
+                continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def save_index(directory, store, semantic=None):
+    """Saves a DocumentStore (and optionally a SemanticRetriever's vectors) as the new generation.
+
+    Returns the path of the generation directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"gen-{time.time_ns() // 1_000_000}-{os.getpid()}"
+    staging = os.path.join(directory, f"{name}.tmp")
+    os.makedirs(staging)
+    try:
+        _write_generation(staging, store, semantic)
+        _fsync_directory(staging)
+        os.replace(staging, os.path.join(directory, name))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(directory, f"{POINTER}.{os.getpid()}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, os.path.join(directory, POINTER))
+    _fsync_directory(directory)
+    _prune(directory, name)
+    return os.path.join(directory, name)
+
+
+def open_index(directory):
+    """Maps the current generation under directory; None if there is no usable index."""
+    try:
+        with open(os.path.join(directory, POINTER), encoding="utf-8") as f:
+            path = os.path.join(directory, f.read().strip())
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != INDEX_FORMAT_VERSION:
+            return None
+        return MappedIndex(path, manifest)
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,289 @@
+import atexit
+import contextvars
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+# --- Per-Turn Latency Breakdown ---
+# A slow turn can come from building the request, the cache lookups, opening the
+# stream (connection setup, upload, the server starting work), the model's time
+# to first token, the streaming itself, tool calls or the front end rendering the
+# chunks. The engine fills in one TurnMetrics per turn (Conversation.metrics)
+# with the time spent in each phase, the gaps between streamed chunks and the
+# usage_metadata token counts of every model call. Times are in seconds from the
+# start of the turn unless the name says otherwise.
+#
+# The SDK sends a streaming request lazily, on the first read, so the split of a
+# model call into setup (until the response headers) and model time comes from
+# an httpx response hook that nexus_client.make_client installs on the async
+# client; it finds the turn through a context variable set by start_call().
+
+# usage_metadata counts summed over the model calls of a turn
+USAGE_FIELDS = ("prompt_token_count", "cached_content_token_count", "candidates_token_count",
+                "thoughts_token_count", "tool_use_prompt_token_count", "total_token_count")
+
+
+_active = contextvars.ContextVar("nexus_turn_metrics", default=None)
+
+
+async def response_hook(response):
+    """httpx event hook: marks the arrival of response headers for the turn that sent the request."""
+    metrics = _active.get()
+    if metrics is not None:
+        metrics.record_headers()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of values (fraction 0.5 for the median); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@dataclass
+class TurnMetrics:
+    started: float = field(default_factory=time.time)  # Wall clock, for lining turns up with logs
+    cached: str = None               # None, "exact" or "semantic"
+    history_seconds: float = 0.0     # Summary, content cache and history window
+    cache_seconds: float = 0.0       # Response cache lookups, including the prompt embedding
+    setup_seconds: float = 0.0       # Request start to response headers, over all model calls
+    ttft_seconds: float = None       # Until the first text chunk was handed out
+    tool_seconds: float = 0.0        # Wall time of the tool rounds
+    tool_calls: list = field(default_factory=list)   # Tool names, in call order
+    model_calls: int = 0
+    chunk_gaps: list = field(default_factory=list)   # Seconds between consecutive text chunks
+    chunks: int = 0
+    output_chars: int = 0
+    usage: dict = field(default_factory=dict)
+    answer_tokens: int = None        # Output tokens of the last model call that streamed text
+    answer_stream_seconds: float = 0.0  # That call's first text chunk to its last
+    render_seconds: float = 0.0      # Spent by the front end between chunks (filled in by it)
+    total_seconds: float = None
+    _clock: float = field(default_factory=time.perf_counter, repr=False)
+    _call_started: float = field(default=None, repr=False)
+    _first_chunk: float = field(default=None, repr=False)
+    _last_chunk: float = field(default=None, repr=False)
+    _call_first_chunk: float = field(default=None, repr=False)
+
+    def elapsed(self):
+        """Seconds since the turn started."""
+        return time.perf_counter() - self._clock
+
+    def start_call(self):
+        """Marks the start of a model call, right before its stream is first read."""
+        self.model_calls += 1
+        self._call_started = self.elapsed()
+        self._call_first_chunk = None
+        _active.set(self)
+
+    def record_headers(self):
+        if self._call_started is not None:
+            self.setup_seconds += self.elapsed() - self._call_started
+            self._call_started = None
+
+    def record_chunk(self, text):
+        """Counts one text chunk handed to the caller."""
+        now = self.elapsed()
+        if self._first_chunk is None:
+            self._first_chunk = self.ttft_seconds = now
+        else:
+            self.chunk_gaps.append(now - self._last_chunk)
+        if self._call_first_chunk is None:
+            self._call_first_chunk = now
+        self._last_chunk = now
+        self.chunks += 1
+        self.output_chars += len(text)
+
+    def record_usage(self, usage_metadata):
+        """Adds the token counts of one model call, at the end of its stream."""
+        if usage_metadata is None:
+            return
+        if self._call_first_chunk is not None:
+            # Function-call legs stream no text, so only a call that did is timed
+            self.answer_tokens = getattr(usage_metadata, "candidates_token_count", None)
+            self.answer_stream_seconds = self._last_chunk - self._call_first_chunk
+        for name in USAGE_FIELDS:
+            value = getattr(usage_metadata, name, None)
+            if value:
+                self.usage[name] = self.usage.get(name, 0) + value
+
+    def finish(self):
+        self.total_seconds = self.elapsed()
+
+    @property
+    def streaming_seconds(self):
+        """From the first text chunk to the last."""
+        if self._first_chunk is None:
+            return 0.0
+        return self._last_chunk - self._first_chunk
+
+    @property
+    def tokens_per_second(self):
+        """Output tokens of the answer's model call over its streaming time; None for one-chunk answers.
+
+        The usage totals also count the function-call legs of a tool turn, which
+        stream no text, so they are not divided by the streaming time.
+        """
+        if not self.answer_tokens or self.answer_stream_seconds <= 0:
+            return None
+        return self.answer_tokens / self.answer_stream_seconds
+
+    def as_dict(self):
+        """The record as plain data, with the chunk gaps summarized."""
+        return {
+            "started": self.started,
+            "cached": self.cached,
+            "history_seconds": self.history_seconds,
+            "cache_seconds": self.cache_seconds,
+            "setup_seconds": self.setup_seconds,
+            "ttft_seconds": self.ttft_seconds,
+            "streaming_seconds": self.streaming_seconds,
+            "tool_seconds": self.tool_seconds,
+            "tool_calls": list(self.tool_calls),
+            "model_calls": self.model_calls,
+            "chunks": self.chunks,
+            "chunk_gap_p50_seconds": percentile(self.chunk_gaps, 0.5),
+            "chunk_gap_max_seconds": max(self.chunk_gaps) if self.chunk_gaps else None,
+            "output_chars": self.output_chars,
+            "tokens_per_second": self.tokens_per_second,
+            "answer_tokens": self.answer_tokens,
+            "usage": dict(self.usage),
+            "render_seconds": self.render_seconds,
+            "total_seconds": self.total_seconds,
+        }
+
+
+# --- Run Summaries ---
+# Benchmark runs (nexus_test.py) and the timing recorder collect the as_dict()
+# records of many turns, each with an "error" key that is None for turns that
+# completed and the process's resident memory ("rss_bytes") when it ended.
+
+SUMMARY_METRICS = ("ttft_seconds", "total_seconds", "tokens_per_second", "setup_seconds", "tool_seconds",
+                   "rss_bytes")
+
+
+def summarize(records, wall_seconds=None):
+    """p50/p90/p99/mean per metric over the completed turns, plus error rate and throughput."""
+    completed = [record for record in records if record.get("error") is None]
+    summary = {
+        "turns": len(records),
+        "errors": len(records) - len(completed),
+        "error_rate": (len(records) - len(completed)) / len(records) if records else 0.0,
+    }
+    if wall_seconds:
+        summary["wall_seconds"] = wall_seconds
+        summary["turns_per_second"] = len(completed) / wall_seconds
+    for name in SUMMARY_METRICS:
+        values = [record[name] for record in completed if record.get(name) is not None]
+        summary[name] = {
+            "p50": percentile(values, 0.5),
+            "p90": percentile(values, 0.9),
+            "p99": percentile(values, 0.99),
+            "mean": sum(values) / len(values) if values else None,
+            "count": len(values),
+        }
+    return summary
+
+
+def error_label(error):
+    """Short label for a failed turn: the HTTP status of API errors (429, 500, ...), else the exception type."""
+    return str(getattr(error, "code", None) or type(error).__name__)
+
+
+def memory_usage():
+    """(current, peak) resident set size of this process in bytes; None where it cannot be read."""
+    current = peak = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == "darwin" else 1024  # Bytes on macOS, kilobytes elsewhere
+    except ImportError:
+        pass
+    return current, peak
+
+
+# --- Timing Recorder ---
+# With NEXUS_TIMINGS set, the front ends hand every turn to a TimingRecorder,
+# which writes one result file when the process exits: the settings, the
+# environment, every turn record and their summary, in the same format as
+# nexus_test.py --json. NEXUS_TIMINGS is a file path, or an existing directory
+# to get one timings-<time>-<pid>.json per run. Compare two result files with
+# python -m benchmarks.compare (see there for committed baselines).
+
+TIMINGS_ENV = "NEXUS_TIMINGS"
+
+
+class TimingRecorder:
+    """Collects the turn records of one run and writes them as a result file."""
+
+    def __init__(self, path, settings=None):
+        self.path = path
+        self.settings = dict(settings or {})
+        self.started = time.time()
+        self._entries = []  # (TurnMetrics or None, record)
+        self._lock = threading.Lock()
+
+    def add(self, record, metrics=None):
+        """Adds a finished turn record ("error" and any labels, with the metrics' fields if given)."""
+        record.setdefault("rss_bytes", memory_usage()[0])
+        with self._lock:
+            self._entries.append((metrics, record))
+
+    def record(self, metrics, error=None):
+        # as_dict() waits until the results are written: front ends add their
+        # render time once the engine is done with the turn
+        self.add({"error": error}, metrics)
+
+    @property
+    def records(self):
+        with self._lock:
+            entries = list(self._entries)
+        return [{**metrics.as_dict(), **record} if metrics is not None else record for metrics, record in entries]
+
+    def results(self, wall_seconds=None):
+        records = self.records
+        if wall_seconds is None and records:
+            # From the first turn's start to the last turn's end
+            ends = [record["started"] + (record["total_seconds"] or 0.0) for record in records]
+            wall_seconds = max(ends) - min(record["started"] for record in records)
+        current, peak = memory_usage()
+        return {
+            "settings": self.settings,
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "started": self.started,
+            "summary": summarize(records, wall_seconds),
+            "memory": {"rss_bytes": current, "peak_rss_bytes": peak},
+            "turns": records,
+        }
+
+    def write(self, wall_seconds=None, extra=None):
+        """Writes the result file and returns its path."""
+        path = self.path
+        if os.path.isdir(path):
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+            path = os.path.join(path, f"timings-{stamp}-{os.getpid()}.json")
+        results = self.results(wall_seconds)
+        results.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        return path
+
+
+def recorder_from_env(settings=None):
+    """A TimingRecorder that writes to NEXUS_TIMINGS at exit, or None when it is not set."""
+    path = os.environ.get(TIMINGS_ENV)
+    if not path:
+        return None
+    recorder = TimingRecorder(path, settings)
+    atexit.register(lambda: recorder._entries and recorder.write())
+    return recorder
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from nexus_dependencies import DependencyIndex
+from nexus_vectors import VectorIndex, normalize
+
+# --- Response Cache (exact match) ---
+# The same questions come up again and again. A finished answer is stored under a
+# hash of everything that determines it: model, system instruction, generation
+# config, the history window actually sent and the prompt. Text is compared after
+# collapsing whitespace and case, so trivially different spellings of the same
+# request share an entry. Entries are evicted least-recently-used beyond
+# max_entries and expire after ttl_seconds. A hit is replayed chunk by chunk, so
+# callers stream it exactly like a live answer.
+#
+# Answers can quote the project documents. put() takes the (filename, digest)
+# pairs an answer was built from, and with changes=nexus_retrieval.document_changes
+# both caches evict exactly the entries whose documents have changed since (see
+# nexus_dependencies.py); answers that used no documents survive every change.
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("NEXUS_RESPONSE_CACHE_SIZE", "256"))
+DEFAULT_TTL_SECONDS = float(os.environ.get("NEXUS_RESPONSE_CACHE_TTL", "3600"))
+
+
+def normalize_text(text):
+    """Collapses runs of whitespace and case, the differences that never change an answer."""
+    return " ".join(text.split()).casefold()
+
+
+def config_fingerprint(config):
+    """A plain-data view of a types.GenerateContentConfig (or a dict) for hashing."""
+    if config is None:
+        return None
+    if hasattr(config, "model_dump"):
+        return config.model_dump(exclude_none=True)
+    return config
+
+
+def _describe(value):
+    """JSON fallback: tool functions are identified by their qualified name, anything else by str()."""
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return str(value)
+
+
+def context_key(model, system_instruction, config, messages):
+    """Hash of everything a request carries except the prompt; messages are the history dicts sent."""
+    payload = {
+        "model": model,
+        "system_instruction": normalize_text(system_instruction or ""),
+        "config": config_fingerprint(config),
+        "history": [[msg["role"], normalize_text(msg["content"])] for msg in messages],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=_describe)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def response_key(model, system_instruction, config, messages, prompt):
+    """Cache key for one request: its context plus the normalized prompt."""
+    context = context_key(model, system_instruction, config, messages)
+    return hashlib.sha256(f"{context}\n{normalize_text(prompt)}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    chunks: list                  # Text chunks as originally streamed
+    latency_seconds: float        # How long the original call took, i.e. what a hit saves
+    created: float = field(default_factory=time.monotonic)
+    hits: int = 0
+    dependencies: frozenset = frozenset()  # (filename, digest) pairs the answer was built from
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+
+class _Cache:
+    """Entries, counters, expiry settings and document dependencies shared by both caches."""
+
+    def __init__(self, max_entries, ttl_seconds, changes, clock):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries = OrderedDict()  # Least recently used first
+        self.dependencies = DependencyIndex(changes)
+        self.stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0, "evicted": 0, "expired": 0, "invalidated": 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _evict_stale(self):
+        """Drops the entries built from documents that have changed. Call with the lock held."""
+        for key in self.dependencies.stale():
+            if key in self.entries:
+                self._remove(key)
+                self.stats["invalidated"] += 1
+
+    def _store(self, key, entry, dependencies):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.dependencies.add(key, dependencies)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.stats["evicted"] += 1
+
+    def _remove(self, key):
+        del self.entries[key]
+        self.dependencies.discard(key)
+
+    def _drop_all(self):
+        self.entries.clear()
+        self.dependencies.clear()
+
+    def _count_hit(self, response):
+        response.hits += 1
+        self.stats["hits"] += 1
+        self.stats["saved_seconds"] += response.latency_seconds
+
+    def clear(self):
+        with self._lock:
+            self._drop_all()
+
+    @property
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+
+class ResponseCache(_Cache):
+    """Thread-safe LRU + TTL cache of finished responses, shared by every session in the process."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, changes=None,
+                 clock=time.monotonic):
+        super().__init__(max_entries, ttl_seconds, changes, clock)
+
+    def get(self, key):
+        """The cached response for key, or None. Counts a hit or a miss."""
+        with self._lock:
+            self._evict_stale()
+            entry = self.entries.get(key)
+            if entry is not None and self.clock() - entry.created > self.ttl_seconds:
+                self._remove(key)
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self._count_hit(entry)
+            return entry
+
+    def put(self, key, chunks, latency_seconds, dependencies=()):
+        """Stores a finished response, evicting the least recently used entries beyond max_entries.
+
+        dependencies are the (filename, digest) pairs of the documents the answer used.
+        """
+        if not chunks or self.max_entries <= 0:
+            return
+        dependencies = frozenset(dependencies)
+        with self._lock:
+            self._evict_stale()
+            response = CachedResponse(list(chunks), latency_seconds, created=self.clock(), dependencies=dependencies)
+            self._store(key, response, dependencies)
+
+
+# --- Semantic Response Cache ---
+# Paraphrases ("Phoenix budget?" / "how much money does Project Phoenix have")
+# miss the exact cache. This layer embeds each prompt and keeps the vectors of
+# answered prompts in a VectorIndex; a new prompt is answered from the cache when
+# an earlier one in the same context (model, system instruction, config and
+# history, see context_key) is at least threshold similar. Too low a threshold
+# serves answers to questions that only look alike, so it is worth measuring on a
+# real prompt log (benchmarks/semantic_cache.py).
+
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get("NEXUS_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# Nearest prompts checked per lookup; the closest may belong to another context.
+SEMANTIC_CANDIDATES = 8
+
+
+@dataclass
+class SemanticEntry:
+    context: str
+    prompt: str
+    response: CachedResponse
+
+
+class SemanticResponseCache(_Cache):
+    """Serves answers to prompts similar to earlier ones, through an embedder's query vectors.
+
+    The index is only comparable within one embedder version, so a refit of the
+    (local) embedder drops every entry.
+    """
+
+    def __init__(self, embedder, threshold=DEFAULT_SIMILARITY_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, changes=None, clock=time.monotonic):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.index = VectorIndex(embedder.dimensions, capacity=64)
+        self.next_id = 0
+        super().__init__(max_entries, ttl_seconds, changes, clock)  # entries: id -> SemanticEntry
+        self.stats["embed_seconds"] = 0.0
+        self._embedder_version = embedder.version
+
+    def _evict_stale(self):
+        super()._evict_stale()
+        if self.embedder.version != self._embedder_version:
+            self.stats["invalidated"] += len(self.entries)
+            self._drop_all()
+            self._embedder_version = self.embedder.version
+
+    def _drop_all(self):
+        super()._drop_all()
+        self.index = VectorIndex(self.embedder.dimensions, capacity=64)
+
+    def _remove(self, entry_id):
+        super()._remove(entry_id)
+        self.index.remove([entry_id])
+
+    def embed(self, prompt):
+        """The prompt's unit vector; embedding runs outside the lock."""
+        started = time.perf_counter()
+        vector = normalize(self.embedder.embed_queries([normalize_text(prompt)]))[0]
+        with self._lock:
+            self.stats["embed_seconds"] += time.perf_counter() - started
+        return vector
+
+    def lookup(self, context, prompt):
+        """Returns (cached response or None, prompt vector). Pass the vector on to put() after a miss."""
+        vector = self.embed(prompt)
+        with self._lock:
+            self._evict_stale()
+            entry = None
+            if len(self.index):
+                for entry_id, score in self.index.search(vector, SEMANTIC_CANDIDATES)[0]:
+                    if score < self.threshold:
+                        break
+                    candidate = self.entries[entry_id]
+                    if candidate.context != context:
+                        continue
+                    if self.clock() - candidate.response.created > self.ttl_seconds:
+                        self._remove(entry_id)
+                        self.stats["expired"] += 1
+                        continue
+                    self.entries.move_to_end(entry_id)
+                    entry = candidate.response
+                    break
+            if entry is None:
+                self.stats["misses"] += 1
+                return None, vector
+            self._count_hit(entry)
+            return entry, vector
+
+    def put(self, context, prompt, vector, chunks, latency_seconds, dependencies=()):
+        """Stores a finished response for a prompt that missed in lookup(); see ResponseCache.put."""
+        if not chunks or self.max_entries <= 0:
+            return
+        dependencies = frozenset(dependencies)
+        with self._lock:
+            self._evict_stale()
+            entry_id = self.next_id
+            self.next_id += 1
+            response = CachedResponse(list(chunks), latency_seconds, created=self.clock(), dependencies=dependencies)
+            self.index.add([entry_id], vector[None, :])
+            self._store(entry_id, SemanticEntry(context, prompt, response), dependencies)
@@ -0,0 +1,368 @@
+import collections
+import hashlib
+import logging
+import os
+import threading
+
+from nexus_ann import IVFIndex
+from nexus_client import shared_client
+from nexus_documents import DOCUMENT_ROOT, load_store
+from nexus_embeddings import GeminiEmbedder, TfidfSvdEmbedder
+from nexus_index_store import IndexSnapshot, MappedBM25, MappedSemanticRetriever, open_index, save_index
+from nexus_search import build_index, index_text
+from nexus_vectors import VectorIndex
+
+# --- Retrieval ---
+# Every retriever answers search(query, k) with a list of (chunk, score) pairs,
+# best first, so the document tools do not care which one is behind them:
+#   bm25     - keyword search over the inverted index (nexus_search.py)
+#   semantic - embedding similarity, catches paraphrased questions
+#   hybrid   - both, merged by reciprocal rank fusion
+
+RETRIEVAL_MODE = os.environ.get("NEXUS_RETRIEVAL", "bm25")
+
+# Embedding backend for the semantic and hybrid modes: "gemini", or "local" for
+# offline TF-IDF + SVD embeddings that never touch the network.
+EMBEDDING_BACKEND = os.environ.get("NEXUS_EMBEDDINGS", "gemini")
+
+# Vector index behind semantic search: "exact" brute force, or "ivf", which stays
+# exact until NEXUS_IVF_TRAIN_THRESHOLD chunks and then switches to approximate
+# search (tune recall against latency with NEXUS_IVF_NPROBE).
+VECTOR_INDEX = os.environ.get("NEXUS_VECTOR_INDEX", "ivf")
+
+# How many results per retriever the hybrid mode fuses, and the usual RRF constant.
+HYBRID_DEPTH = 20
+RRF_K = 60
+
+
+def default_index_dir(root=DOCUMENT_ROOT):
+    """A per-user cache directory for the index of one document root, outside the root itself."""
+    key = hashlib.sha256(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.expanduser("~"), ".nexus", "index", key)
+
+
+# Where the built index is saved for the next start (see nexus_index_store.py).
+INDEX_DIR = os.environ.get("NEXUS_INDEX_DIR") or default_index_dir()
+
+logger = logging.getLogger("nexus.retrieval")
+
+
+class SemanticRetriever:
+    """Embedding search over chunks, backed by a VectorIndex."""
+
+    def __init__(self, embedder, index=None):
+        self.embedder = embedder
+        self.index = index if index is not None else make_vector_index(embedder.dimensions)
+        self.chunks = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def add_chunks(self, chunks):
+        """Embeds and indexes chunks (in batches, through the embedder)."""
+        chunks = list(chunks)
+        if not chunks:
+            return
+        version = self.embedder.version
+        vectors = self.embedder.embed_documents([index_text(chunk) for chunk in chunks])
+        self.index.add([chunk.chunk_id for chunk in chunks], vectors)
+        for chunk in chunks:
+            self.chunks[chunk.chunk_id] = chunk
+        if self.embedder.version != version and len(self.chunks) > len(chunks):
+            self._reproject()
+
+    def _reproject(self):
+        """Recomputes every stored vector after the (local) embedder refit its model."""
+        chunk_ids = list(self.chunks)
+        vectors = self.embedder.transform([index_text(self.chunks[chunk_id]) for chunk_id in chunk_ids])
+        self.index.add(chunk_ids, vectors)
+
+    def copy(self):
+        """An independent copy sharing the embedder and the (immutable) chunks."""
+        retriever = SemanticRetriever(self.embedder, self.index.copy())
+        retriever.chunks = dict(self.chunks)
+        return retriever
+
+    def remove_chunks(self, chunk_ids):
+        chunk_ids = list(chunk_ids)
+        self.index.remove(chunk_ids)
+        for chunk_id in chunk_ids:
+            self.chunks.pop(chunk_id, None)
+
+    def search_many(self, queries, k=5):
+        """Answers several queries with one batched embedding call and one matrix product."""
+        if not queries:
+            return []
+        vectors = self.embedder.embed_queries(list(queries))
+        return [
+            [(self.chunks[chunk_id], score) for chunk_id, score in hits]
+            for hits in self.index.search(vectors, k)
+        ]
+
+    def search(self, query, k=5):
+        return self.search_many([query], k)[0]
+
+
+class HybridRetriever:
+    """Merges the rankings of several retrievers with reciprocal rank fusion."""
+
+    def __init__(self, *retrievers, depth=HYBRID_DEPTH):
+        self.retrievers = retrievers
+        self.depth = depth
+
+    def search(self, query, k=5):
+        scores = {}
+        chunks = {}
+        for retriever in self.retrievers:
+            for rank, (chunk, _) in enumerate(retriever.search(query, self.depth)):
+                scores[chunk.chunk_id] = scores.get(chunk.chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+                chunks[chunk.chunk_id] = chunk
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(chunks[chunk_id], score) for chunk_id, score in best]
+
+
+def make_vector_index(dimensions, kind=VECTOR_INDEX):
+    """The vector index for semantic retrieval."""
+    if kind == "ivf":
+        return IVFIndex(dimensions)
+    if kind == "exact":
+        return VectorIndex(dimensions)
+    raise ValueError(f"Unknown vector index {kind!r}; use 'exact' or 'ivf'.")
+
+
+def make_embedder(client=None, backend=EMBEDDING_BACKEND):
+    """The embedding backend for semantic retrieval."""
+    if backend == "local":
+        return TfidfSvdEmbedder()
+    if backend == "gemini":
+        return GeminiEmbedder(client or shared_client())
+    raise ValueError(f"Unknown embedding backend {backend!r}; use 'gemini' or 'local'.")
+
+
+def build_retriever(store, mode=RETRIEVAL_MODE, client=None, backend=EMBEDDING_BACKEND):
+    """Builds the retriever for mode ("bm25", "semantic" or "hybrid") over a DocumentStore."""
+    if mode == "bm25":
+        return build_index(store)
+
+    semantic = SemanticRetriever(make_embedder(client, backend))
+    semantic.add_chunks(store.chunks.values())
+    if mode == "semantic":
+        return semantic
+    if mode == "hybrid":
+        return HybridRetriever(build_index(store), semantic)
+    raise ValueError(f"Unknown retrieval mode {mode!r}; use 'bm25', 'semantic' or 'hybrid'.")
+
+
+def semantic_part(retriever):
+    """The SemanticRetriever inside a built retriever, or None for bm25."""
+    if isinstance(retriever, SemanticRetriever):
+        return retriever
+    for part in getattr(retriever, "retrievers", ()):
+        if isinstance(part, SemanticRetriever):
+            return part
+    return None
+
+
+def load_retriever(directory, mode=RETRIEVAL_MODE, backend=EMBEDDING_BACKEND, client=None):
+    """Maps a saved index as a retriever for mode; None if there is none, or it lacks what mode needs."""
+    index = open_index(directory)
+    if index is None:
+        return None
+    snapshot = IndexSnapshot(index)
+    if mode == "bm25":
+        return MappedBM25(snapshot)
+
+    saved = index.manifest["embedder"]
+    if saved is None or saved["backend"] != backend:
+        return None
+    if backend == "local":
+        embedder = index.restore_embedder()
+    else:
+        embedder = GeminiEmbedder(client or shared_client(), model=saved["model"], dimensions=saved["dimensions"])
+    semantic = MappedSemanticRetriever(snapshot, embedder)
+    if mode == "semantic":
+        return semantic
+    if mode == "hybrid":
+        return HybridRetriever(MappedBM25(snapshot), semantic)
+    raise ValueError(f"Unknown retrieval mode {mode!r}; use 'bm25', 'semantic' or 'hybrid'.")
+
+
+def _parts(retriever):
+    return getattr(retriever, "retrievers", (retriever,))
+
+
+def is_mapped(retriever):
+    return hasattr(_parts(retriever)[0], "snapshot")
+
+
+def apply_changes(retriever, removed_files, chunks, stats):
+    """A copy of a mapped retriever with file changes applied (see IndexSnapshot.with_changes).
+
+    The new chunks are embedded here, before anything is swapped, so queries on
+    the original retriever never wait for the embedder.
+    """
+    parts = _parts(retriever)
+    vectors = None
+    for part in parts:
+        if isinstance(part, MappedSemanticRetriever) and chunks:
+            vectors = part.embedder.embed_documents([index_text(chunk) for chunk in chunks])
+    snapshot = parts[0].snapshot.with_changes(removed_files, chunks, stats, vectors)
+    parts = [part.with_snapshot(snapshot) for part in parts]
+    return parts[0] if len(parts) == 1 else HybridRetriever(*parts, depth=retriever.depth)
+
+
+def update_retriever(retriever, removed_ids, chunks):
+    """A copy of an in-memory retriever without the chunks removed_ids and with chunks added.
+
+    Only the added chunks are embedded.
+    """
+    updated = []
+    for part in _parts(retriever):
+        part = part.copy()
+        if isinstance(part, SemanticRetriever):
+            part.remove_chunks(removed_ids)
+            part.add_chunks(chunks)
+        else:
+            for chunk_id in removed_ids:
+                if chunk_id in part.chunks:
+                    part.remove(chunk_id)
+            for chunk in chunks:
+                part.add(chunk)
+        updated.append(part)
+    return updated[0] if len(updated) == 1 else HybridRetriever(*updated, depth=retriever.depth)
+
+
+def compact(retriever, directory, mode=RETRIEVAL_MODE, backend=EMBEDDING_BACKEND):
+    """Saves a mapped retriever with its changes as a new generation and maps that instead.
+
+    Vectors are copied over, not recomputed, so nothing is sent to the embedder.
+    """
+    parts = _parts(retriever)
+    snapshot = parts[0].snapshot
+    semantic = None
+    for part in parts:
+        if isinstance(part, MappedSemanticRetriever):
+            semantic = SemanticRetriever(part.embedder, make_vector_index(part.embedder.dimensions))
+            semantic.index.add(*snapshot.vector_items())
+    save_index(directory, snapshot.to_store(), semantic)
+    return load_retriever(directory, mode, backend)
+
+
+_retriever = None
+_store = None  # Only kept when the index could not be saved, for rebuilds
+_retriever_lock = threading.Lock()  # Held for the whole first load or build of the index
+_documents_version = 0
+_changes_lock = threading.Lock()    # Guards only the version and the change log, never held for long
+
+# Recent update_documents() batches as (version, changed filenames), so caches can
+# evict exactly the entries built from those files (see nexus_dependencies.py).
+CHANGE_LOG_SIZE = 1024
+_change_log = collections.deque(maxlen=CHANGE_LOG_SIZE)
+
+# A mapped retriever is saved again once this many chunks (or this fraction of the
+# saved index, whichever is larger) have changed since the last save.
+COMPACT_MIN_CHUNKS = 1000
+COMPACT_FRACTION = 0.1
+
+
+def get_retriever():
+    """Returns the process-wide retriever over DOCUMENT_ROOT.
+
+    The saved index under INDEX_DIR is mapped if there is one; otherwise the
+    retriever is built from the files, saved and then mapped. Without a
+    document root there is nothing to save, and the (empty) retriever is only
+    kept in memory.
+    """
+    global _retriever, _store
+    with _retriever_lock:
+        has_root = os.path.isdir(DOCUMENT_ROOT)
+        if _retriever is None and has_root:
+            _retriever = load_retriever(INDEX_DIR)
+        if _retriever is None:
+            store = load_store(DOCUMENT_ROOT)
+            built = build_retriever(store)
+            if has_root:
+                try:
+                    save_index(INDEX_DIR, store, semantic_part(built))
+                    _retriever = load_retriever(INDEX_DIR)
+                except OSError as error:
+                    logger.warning("Could not save the index to %s: %s", INDEX_DIR, error)
+            if _retriever is None:
+                _retriever, _store = built, store
+        return _retriever
+
+
+def document_changes(since):
+    """Returns (current version, filenames changed after version since).
+
+    The version counts the batches update_documents() has applied. The filenames
+    are None when since is None or older than the change log.
+    """
+    with _changes_lock:
+        version, log = _documents_version, list(_change_log)
+    if since == version:
+        return version, frozenset()
+    if since is None or not log or log[0][0] > since + 1:
+        return version, None
+    return version, frozenset().union(*(filenames for number, filenames in log if number > since))
+
+
+def prompt_embedder(client=None, backend=EMBEDDING_BACKEND):
+    """An embedder for comparing prompts (the semantic response cache), or None.
+
+    The Gemini backend embeds prompts directly. The local one only works once
+    fitted, so it borrows the embedder of the semantic retriever; in bm25 mode
+    there is none.
+    """
+    if backend == "gemini":
+        return GeminiEmbedder(client or shared_client())
+    for part in _parts(get_retriever()):
+        if hasattr(part, "embedder"):
+            return part.embedder
+    return None
+
+
+def document_stats():
+    """filename -> (mtime_ns, size) of every file the process-wide retriever has indexed."""
+    retriever = get_retriever()
+    if is_mapped(retriever):
+        return _parts(retriever)[0].snapshot.file_stats()
+    return dict(_store.stats)
+
+
+def update_documents(removed_files, chunks, stats):
+    """Applies changed files to the process-wide retriever.
+
+    removed_files lose their chunks (a modified file is removed and re-added),
+    chunks are the new chunks and stats the (mtime_ns, size) of the files they
+    came from. The updated retriever is built next to the current one and
+    swapped in, so queries are never blocked; a mapped index is saved again
+    once enough has changed. Either way only the chunks of the changed files
+    are removed, added and embedded.
+    """
+    global _retriever, _documents_version
+    retriever = get_retriever()
+    if is_mapped(retriever):
+        updated = apply_changes(retriever, removed_files, chunks, stats)
+        snapshot = _parts(updated)[0].snapshot
+        if snapshot.pending > max(COMPACT_MIN_CHUNKS, COMPACT_FRACTION * len(snapshot.index)):
+            try:
+                updated = compact(updated, INDEX_DIR) or updated
+            except OSError as error:
+                logger.warning("Could not save the index to %s: %s", INDEX_DIR, error)
+    else:
+        # No saved index to layer changes over: update a copy of the one in memory
+        removed = [chunk.chunk_id for filename in removed_files for chunk in _store.remove_file(filename)]
+        by_file = {}
+        for chunk in chunks:
+            by_file.setdefault(chunk.filename, []).append(chunk)
+        added = []
+        for filename, stat in stats.items():
+            removed.extend(chunk.chunk_id for chunk in _store.add_file(filename, by_file.get(filename, []), stat))
+            added.extend(by_file.get(filename, []))
+        updated = update_retriever(retriever, removed, added)
+    with _retriever_lock:
+        _retriever = updated
+    with _changes_lock:
+        _documents_version += 1
+        _change_log.append((_documents_version, frozenset(removed_files) | frozenset(stats)))
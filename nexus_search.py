@@ -0,0 +1,102 @@
+import heapq
+import math
+import re
+from collections import Counter
+
+# --- Project Document Search (BM25) ---
+# An inverted index over the chunks of the document root, built once and kept in
+# memory. Instead of shipping whole files to the model, the search tool returns
+# only the top-k scoring chunks with their filename and byte offsets.
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this "
+    "to was were what when where which who will with".split()
+)
+
+
+def tokenize(text):
+    """Lower-cases text and splits it into index terms, dropping common stopwords."""
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+def index_text(chunk):
+    """The text a chunk is indexed under: its own text plus its section heading."""
+    if chunk.heading and chunk.heading not in chunk.text:
+        return f"{chunk.heading}\n{chunk.text}"
+    return chunk.text
+
+
+class BM25Index:
+    """Okapi BM25 over chunks, with postings kept as term -> {chunk_id: term frequency}."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.chunks = {}
+        self.lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def add(self, chunk):
+        """Indexes one chunk, replacing an earlier chunk with the same ID."""
+        if chunk.chunk_id in self.chunks:
+            self.remove(chunk.chunk_id)
+        terms = Counter(tokenize(index_text(chunk)))
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[chunk.chunk_id] = count
+        length = sum(terms.values())
+        self.chunks[chunk.chunk_id] = chunk
+        self.lengths[chunk.chunk_id] = length
+        self.total_length += length
+
+    def copy(self):
+        """An independent copy, sharing only the (immutable) chunks."""
+        index = BM25Index(self.k1, self.b)
+        index.postings = {term: dict(postings) for term, postings in self.postings.items()}
+        index.chunks = dict(self.chunks)
+        index.lengths = dict(self.lengths)
+        index.total_length = self.total_length
+        return index
+
+    def remove(self, chunk_id):
+        """Drops one chunk from the index."""
+        chunk = self.chunks.pop(chunk_id)
+        self.total_length -= self.lengths.pop(chunk_id)
+        for term in set(tokenize(index_text(chunk))):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def search(self, query, k=5):
+        """Returns up to k (chunk, score) pairs, best first."""
+        if not self.chunks:
+            return []
+        count = len(self.chunks)
+        average_length = self.total_length / count or 1.0
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self.lengths[chunk_id] / average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.chunks[chunk_id], score) for chunk_id, score in best]
+
+
+def build_index(store):
+    """Indexes every chunk of a DocumentStore."""
+    index = BM25Index()
+    for chunk in store.chunks.values():
+        index.add(chunk)
+    return index
+
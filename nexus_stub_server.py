@@ -0,0 +1,385 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# --- Local Gemini Stand-in ---
+# A small HTTP server that speaks enough of the Gemini REST API for Nexus to run
+# without touching the live service. Point the clients at it with:
+#
+#     python nexus_stub_server.py --port 8765 --ttft 0.4 --tokens-per-second 40
+#     export NEXUS_GEMINI_BASE_URL=http://127.0.0.1:8765
+#
+# It implements generateContent and streamGenerateContent (SSE), returns
+# function-call parts for the document tools when they are declared (one
+# read_project_document call per filename when a prompt names several), answers
+# embedding requests with deterministic bag-of-words vectors, answers model
+# lookups (GET models/<name>, used by the warm-up in nexus_warmup.py), and can
+# inject latency, server errors and 429 rate limits. Streams are sent with
+# chunked transfer encoding on a kept-alive connection, as the live API does.
+
+
+# --- 1. Configuration ---
+
+@dataclass
+class StubConfig:
+    ttft: float = 0.4                # Seconds before the first chunk (or the whole unary reply)
+    tokens_per_second: float = 40.0  # Streaming pace after the first chunk; 0 means no pacing
+    reply_tokens: int = 60           # Length of the canned text answer, in words
+    error_rate: float = 0.0          # Fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0     # Fraction of requests answered with HTTP 429
+    function_calls: str = "auto"     # "auto", "always" or "never"
+    seed: int = None
+
+
+# Arguments the stand-in fills in when it decides to call a known tool, in order of preference.
+DOCUMENT_TOOLS = {
+    "search_project_documents": lambda prompt: {"query": prompt, "k": 5},
+    "read_project_document": lambda prompt: {"filename": _guess_filename(prompt)},
+    "retrieve_document_context": lambda prompt: {"query": prompt},
+}
+
+# Prompts containing any of these words trigger a tool call in "auto" mode.
+TOOL_TRIGGERS = re.compile(r"\b(document|file|project|phoenix|budget|minutes|summary|summarize)\b", re.I)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+DEFAULT_EMBEDDING_DIMENSIONS = 768
+
+FILENAME_PATTERN = re.compile(r"[\w\-]+\.(?:txt|md|csv|json)", re.I)
+
+FILLER_WORDS = (
+    "Certainly Meg. Here is a concise overview based on the information available. "
+    "The key points are the current status, the agreed next steps, the owners for each "
+    "action and the dates we are working towards. Let me know if you would like a draft "
+    "email or a more detailed breakdown of any item."
+).split()
+
+
+def _guess_filename(prompt):
+    match = FILENAME_PATTERN.search(prompt)
+    return match.group(0) if match else "Phoenix_Project_Summary.txt"
+
+
+def _count_tokens(text):
+    # Roughly four characters per token, the same rule of thumb the SDK docs use.
+    return max(1, len(text) // 4) if text else 0
+
+
+# --- 2. Request Interpretation ---
+
+def _declared_tools(body):
+    names = []
+    for tool in body.get("tools") or []:
+        for declaration in tool.get("functionDeclarations") or []:
+            names.append(declaration.get("name"))
+    return names
+
+
+def _last_turn(body):
+    contents = body.get("contents") or []
+    return contents[-1] if contents else {"role": "user", "parts": []}
+
+
+def _prompt_text(body):
+    texts = [part.get("text", "") for part in _last_turn(body).get("parts", []) if "text" in part]
+    return " ".join(texts).strip()
+
+
+def _prompt_token_count(body):
+    total = 0
+    for content in body.get("contents") or []:
+        for part in content.get("parts") or []:
+            total += _count_tokens(part.get("text") or json.dumps(part))
+    system = body.get("systemInstruction") or {}
+    for part in system.get("parts") or []:
+        total += _count_tokens(part.get("text", ""))
+    return total
+
+
+def plan_reply(body, config):
+    """Decides whether to answer with function calls or text. Returns (kind, payload).
+
+    The payload of a "call" is a list of {"name", "args"} function calls.
+    """
+    last = _last_turn(body)
+    responses = [part["functionResponse"] for part in last.get("parts", []) if "functionResponse" in part]
+    if responses:
+        # Second leg of a tool round trip: answer from the tool output.
+        first = responses[0]
+        snippet = json.dumps(first.get("response", {}))[:200]
+        return "text", f"Based on {first.get('name')}: {snippet} " + " ".join(FILLER_WORDS[:config.reply_tokens])
+
+    prompt = _prompt_text(body)
+    declared = _declared_tools(body)
+    tools = [name for name in DOCUMENT_TOOLS if name in declared]
+    wants_tool = config.function_calls == "always" or (
+        config.function_calls == "auto" and TOOL_TRIGGERS.search(prompt)
+    )
+    if tools and wants_tool:
+        filenames = FILENAME_PATTERN.findall(prompt)
+        if "read_project_document" in tools and len(filenames) > 1:
+            return "call", [{"name": "read_project_document", "args": {"filename": name}} for name in filenames]
+        name = tools[0]
+        return "call", [{"name": name, "args": DOCUMENT_TOOLS[name](prompt)}]
+
+    words = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(config.reply_tokens)]
+    return "text", " ".join(words)
+
+
+def embed_text(text, dimensions=DEFAULT_EMBEDDING_DIMENSIONS):
+    """Hashes the words of text into a unit vector, so texts sharing words come out similar."""
+    vector = [0.0] * dimensions
+    for word in WORD_PATTERN.findall(text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        slot = int.from_bytes(digest[:4], "little") % dimensions
+        vector[slot] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def _embedding_requests(body):
+    # batchEmbedContents sends {"requests": [...]}, embedContent a single request
+    return body.get("requests") or [body]
+
+
+def _candidate(parts, finish=False):
+    candidate = {"content": {"role": "model", "parts": parts}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    return candidate
+
+
+def _usage(prompt_tokens, output_tokens):
+    return {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+
+
+# --- 3. HTTP Handler ---
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "NexusStub/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, state, message, headers=None):
+        self._send_json(status, {"error": {"code": status, "message": message, "status": state}}, headers)
+
+    def _injected_failure(self):
+        config = self.server.config
+        with self.server.rng_lock:
+            roll = self.server.rng.random()
+        if roll < config.rate_limit_rate:
+            self._send_error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (stand-in).", {"Retry-After": "1"})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send_error(500, "INTERNAL", "Injected stand-in failure.")
+            return True
+        return False
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        match = re.search(r"/models/([^/:]+)$", path)
+        if not match:
+            self._send_error(404, "NOT_FOUND", f"Unknown path {path}")
+            return
+        self.server.record_request("getModel")
+        model = match.group(1)
+        self._send_json(200, {"name": f"models/{model}", "displayName": f"{model} (stand-in)",
+                              "supportedGenerationMethods": ["generateContent", "streamGenerateContent"]})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        match = re.search(r"/models/([^/:]+):(\w+)$", path)
+        if not match:
+            self._send_error(404, "NOT_FOUND", f"Unknown path {path}")
+            return
+
+        model, method = match.groups()
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_error(400, "INVALID_ARGUMENT", "Request body is not valid JSON.")
+            return
+
+        self.server.record_request(method)
+        if self._injected_failure():
+            return
+
+        if method == "generateContent":
+            self._generate(model, body)
+        elif method == "streamGenerateContent":
+            self._stream(model, body)
+        elif method in ("batchEmbedContents", "embedContent"):
+            self._embed(method, body)
+        else:
+            self._send_error(404, "NOT_FOUND", f"Method {method} is not implemented by the stand-in.")
+
+    def _generate(self, model, body):
+        config = self.server.config
+        kind, payload = plan_reply(body, config)
+        prompt_tokens = _prompt_token_count(body)
+        if kind == "call":
+            parts, output_tokens = [{"functionCall": call} for call in payload], _count_tokens(json.dumps(payload))
+        else:
+            parts, output_tokens = [{"text": payload}], len(payload.split())
+
+        # A unary call waits for the whole answer to be "generated".
+        pace = output_tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        time.sleep(config.ttft + pace)
+        self._send_json(200, {
+            "candidates": [_candidate(parts, finish=True)],
+            "usageMetadata": _usage(prompt_tokens, output_tokens),
+            "modelVersion": model,
+        })
+
+    def _embed(self, method, body):
+        embeddings = []
+        for request in _embedding_requests(body):
+            text = " ".join(part.get("text", "") for part in (request.get("content") or {}).get("parts", []))
+            dimensions = request.get("outputDimensionality") or DEFAULT_EMBEDDING_DIMENSIONS
+            embeddings.append({"values": embed_text(text, dimensions)})
+        time.sleep(self.server.config.ttft / 4)
+        if method == "embedContent":
+            self._send_json(200, {"embedding": embeddings[0]})
+        else:
+            self._send_json(200, {"embeddings": embeddings})
+
+    def _stream(self, model, body):
+        config = self.server.config
+        kind, payload = plan_reply(body, config)
+        prompt_tokens = _prompt_token_count(body)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        time.sleep(config.ttft)
+        if kind == "call":
+            self._write_event({
+                "candidates": [_candidate([{"functionCall": call} for call in payload], finish=True)],
+                "usageMetadata": _usage(prompt_tokens, _count_tokens(json.dumps(payload))),
+                "modelVersion": model,
+            })
+            self._end_events()
+            return
+
+        words = payload.split()
+        delay = 1.0 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(delay)
+            last = i == len(words) - 1
+            event = {
+                "candidates": [_candidate([{"text": word + ("" if last else " ")}], finish=last)],
+                "modelVersion": model,
+            }
+            if last:
+                event["usageMetadata"] = _usage(prompt_tokens, len(words))
+            self._write_event(event)
+        self._end_events()
+
+    def _write_event(self, payload):
+        data = b"data: " + json.dumps(payload).encode("utf-8") + b"\r\n\r\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_events(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once; the socketserver default backlog of 5 resets them
+    request_queue_size = 1024
+
+    def __init__(self, address, config, verbose=False):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.verbose = verbose
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+        self.request_counts = {}
+
+    def record_request(self, method):
+        with self.rng_lock:
+            self.request_counts[method] = self.request_counts.get(method, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(config=None, host="127.0.0.1", port=0, verbose=False):
+    """Starts the stand-in on a background thread. Returns the server; use server.base_url."""
+    server = StubServer((host, port), config or StubConfig(), verbose=verbose)
+    threading.Thread(target=server.serve_forever, name="nexus-stub", daemon=True).start()
+    return server
+
+
+# --- 4. Command Line Entry Point ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini stand-in for Nexus load and latency testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.4, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429.")
+    parser.add_argument("--function-calls", choices=["auto", "always", "never"], default="auto")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        function_calls=args.function_calls,
+        seed=args.seed,
+    )
+    server = StubServer((args.host, args.port), config, verbose=args.verbose)
+    print(f"--- Nexus Gemini stand-in listening on {server.base_url} ---")
+    print(f"Set NEXUS_GEMINI_BASE_URL={server.base_url} to route the Nexus clients here. Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStand-in stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from google.genai import types
+from nexus_dependencies import DependencyIndex
+from nexus_history import estimate_tokens
+
+# --- Rolling Conversation Summary ---
+# Once the unsummarized part of a conversation grows past a threshold, the oldest
+# turns are condensed into a single "conversation so far" message by the cheaper
+# flash model. The work runs on a background thread; the finished summary is
+# swapped in on a later turn, so the user never waits for it.
+#
+# An assistant message may list the documents its answer came from under
+# "sources" ((filename, digest) pairs, see nexus_dependencies.py). The summary
+# inherits the sources of every turn it covers and is dropped once one of those
+# documents changes, so it is rebuilt from the turns instead of repeating a
+# stale figure on every later request.
+
+SUMMARY_MODEL = "gemini-2.5-flash"
+
+DEFAULT_THRESHOLD_TOKENS = int(os.environ.get("NEXUS_SUMMARY_THRESHOLD_TOKENS", "3000"))
+
+# The newest messages are never summarized so the model keeps exact recent context.
+DEFAULT_KEEP_RECENT = 6
+
+SUMMARY_PREFIX = "Conversation so far (summary of earlier turns): "
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between Meg and her executive "
+    "assistant, Nexus. Merge the existing summary with the new transcript into one updated "
+    "summary. Keep names, figures, dates, decisions and open action items. Write compact "
+    "prose of at most 250 words and do not add anything that was not said."
+)
+
+logger = logging.getLogger("nexus.summary")
+
+
+def summary_message(summary):
+    """The synthetic message that stands in for all summarized turns."""
+    return {"role": "user", "content": SUMMARY_PREFIX + summary, "summary": True}
+
+
+def _transcript(messages):
+    lines = []
+    for msg in messages:
+        speaker = "Meg" if msg["role"] == "user" else "Nexus"
+        lines.append(f"{speaker}: {msg['content']}")
+    return "\n".join(lines)
+
+
+class RollingSummarizer:
+    """Keeps a background-maintained summary of the oldest part of a message list.
+
+    The caller owns an append-only list of {"role", "content"} messages. view()
+    returns the list to send: the summary message followed by every message the
+    summary does not cover yet. maybe_schedule() starts a compaction when the
+    uncovered part grows past threshold_tokens. With changes (see
+    nexus_retrieval.document_changes), a summary built from documents that have
+    changed since is dropped.
+    """
+
+    def __init__(self, client, model=SUMMARY_MODEL, threshold_tokens=DEFAULT_THRESHOLD_TOKENS,
+                 keep_recent=DEFAULT_KEEP_RECENT, changes=None):
+        self.client = client
+        self.model = model
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent = keep_recent
+        self.summary = ""
+        self.covered = 0  # Number of leading messages folded into the summary
+        self.sources = frozenset()  # Documents the summary was built from
+        self.dependencies = DependencyIndex(changes)
+        self._pending = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nexus-summary")
+
+    def reset(self):
+        """Forgets the summary, e.g. after the chat history was cleared."""
+        with self._lock:
+            self._clear()
+
+    def restore(self, summary, covered, sources=()):
+        """Takes over a summary saved earlier that covers the first covered messages (see nexus_conversations.py)."""
+        with self._lock:
+            self._clear()
+            self.summary, self.covered, self.sources = summary, covered, frozenset(sources)
+            self.dependencies.add("summary", self.sources)
+
+    def _clear(self):
+        self.summary = ""
+        self.covered = 0
+        self.sources = frozenset()
+        self.dependencies.clear()
+        self._pending = None
+        self._generation += 1
+
+    def poll(self):
+        """Swaps in a finished background summary, or drops one a document change made stale.
+
+        Returns True if the summary changed either way.
+        """
+        with self._lock:
+            if self.dependencies.stale():
+                logger.info("Dropping the conversation summary: a document it was built from changed")
+                self._clear()
+                return True
+            future = self._pending
+            if future is None or not future.done():
+                return False
+            self._pending = None
+            try:
+                generation, summary, covered, sources = future.result()
+            except Exception as e:
+                logger.warning("Background summary failed, keeping the full history: %s", e)
+                return False
+            if generation != self._generation:
+                return False
+            self.summary, self.covered, self.sources = summary, covered, sources
+            self.dependencies.add("summary", sources)
+            return True
+
+    def split(self, messages):
+        """Returns (summary message or None, index of the first message it does not cover)."""
+        self.poll()
+        if self.covered > len(messages):
+            # The history was cleared or replaced underneath us.
+            self.reset()
+        if not self.summary:
+            return None, 0
+        return summary_message(self.summary), self.covered
+
+    def view(self, messages):
+        """Returns messages with the summarized prefix replaced by one synthetic message."""
+        summary, start = self.split(messages)
+        if summary is None:
+            return list(messages)
+        return [summary] + list(messages[start:])
+
+    def maybe_schedule(self, messages):
+        """Starts a background compaction if the uncovered history is past the threshold."""
+        with self._lock:
+            if self._pending is not None:
+                return False
+            uncovered = messages[self.covered:]
+            if sum(estimate_tokens(msg.get("content") or "") for msg in uncovered) < self.threshold_tokens:
+                return False
+
+            # Summarize everything but the newest messages, cutting just before a user turn.
+            cut = len(messages) - self.keep_recent
+            while cut > self.covered and messages[cut]["role"] != "user":
+                cut -= 1
+            if cut <= self.covered:
+                return False
+
+            batch = [msg for msg in messages[self.covered:cut] if isinstance(msg.get("content"), str)]
+            sources = self.sources.union(*(msg.get("sources", ()) for msg in batch))
+            self._pending = self._executor.submit(self._summarize, self._generation, self.summary, batch, cut,
+                                                  sources)
+            return True
+
+    def _summarize(self, generation, previous, batch, cut, sources):
+        prompt = (
+            f"Existing summary:\n{previous or '(none yet)'}\n\n"
+            f"New transcript:\n{_transcript(batch)}\n\nUpdated summary:"
+        )
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(system_instruction=SUMMARY_INSTRUCTION, temperature=0.2),
+        )
+        summary = (response.text or "").strip()
+        if not summary:
+            raise ValueError("the summary model returned no text")
+        return generation, summary, cut, frozenset(sources)
@@ -1,59 +1,178 @@
+import argparse
+import asyncio
+import json
 import os
-from google import genai
-from google.genai import types # We need 'types' for configuration
+import time
+from nexus_metrics import SUMMARY_METRICS, TimingRecorder, error_label, summarize
+from nexus_stub_server import StubConfig, start_stub_server
+
+# --- Nexus Benchmark ---
+# Replays a prompt corpus through the chat engine (nexus_engine.py) against the
+# live API or the local stand-in, with several conversations in flight at once,
+# and reports time to first token, total latency, tokens/sec and error rates.
+#
+#     python nexus_test.py                          # built-in corpus, live API, one conversation at a time
+#     python nexus_test.py --stub --concurrency 8   # local stand-in, eight conversations in flight
+#     python nexus_test.py --corpus prompts.jsonl --repeat 5 --json results.json
+#
+# A corpus is JSON lines of {"name", "kind", "turns": [prompt, ...]}; kind is
+# "single", "multi" or "tools" and only labels the results. Every conversation
+# runs its turns in order; a failed turn ends its conversation. --json writes the
+# run settings, every turn's latency record (nexus_metrics.TurnMetrics) and the
+# summary (the nexus_metrics.TimingRecorder format), so runs can be compared
+# with python -m benchmarks.compare. The SDK and the engine are imported once
+# the arguments have been parsed, so --help and argument errors return at once.
 
 # --- 1. Define Nexus's Persona (The System Instruction) ---
 # This instruction dictates the assistant's behavior for every interaction.
 SYSTEM_INSTRUCTION = """
 You are 'Nexus', a highly professional, proactive, and confidential AI assistant for Meg.
 
-ROLE: Your primary function is to manage tasks, summarize technical documents, 
-and execute code or actions (via provided tools). You must prioritize efficiency 
+ROLE: Your primary function is to manage tasks, summarize technical documents,
+and execute code or actions (via provided tools). You must prioritize efficiency
 and clarity in all responses.
 
-TONE: Formal, succinct, and always helpful. Do not use emojis, unnecessary pleasantries, 
+TONE: Formal, succinct, and always helpful. Do not use emojis, unnecessary pleasantries,
 or excessive enthusiasm. Get straight to the point.
 
-CONFIDENTIALITY: All information provided to you, especially concerning Meg's projects 
-and professional life, is strictly confidential. Never share or reference this context 
+CONFIDENTIALITY: All information provided to you, especially concerning Meg's projects
+and professional life, is strictly confidential. Never share or reference this context
 unless explicitly asked to process it.
 
-ACTIONS: When asked to perform a task (like checking a file or sending an email), 
+ACTIONS: When asked to perform a task (like checking a file or sending an email),
 acknowledge the request and confirm the action you will take.
 """
 
-# --- 2. Initialize the Client and Configuration ---
-try:
-    client = genai.Client()
-except Exception as e:
-    print("Error initializing the client. Check GEMINI_API_KEY environment variable.")
-    # We will assume the key is set since Step 1 worked, but keep this check.
-    exit()
-
-# Set up the configuration with the System Instruction
-config = types.GenerateContentConfig(
-    system_instruction=SYSTEM_INSTRUCTION,
-    # Setting a low temperature (0.3) makes Nexus more focused and less creative.
-    temperature=0.3 
-)
-
-# --- 3. Define a Test Prompt ---
-model_name = 'gemini-2.5-flash'
-prompt = "My name is Meg. Tell me what your job is, and what your name is."
-
-# --- 4. Generate the Content with the New Configuration ---
-try:
-    print(f"Sending prompt to {model_name} with Nexus persona...")
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt,
-        config=config # Pass the configuration object here!
-    )
-
-    # --- 5. Print the Result ---
-    print("\n--- Nexus's Response ---")
-    print(response.text.strip())
-    print("--------------------------\n")
-
-except Exception as e:
-    print(f"An error occurred during content generation: {e}")
\ No newline at end of file
+# --- 2. The Prompt Corpus ---
+CORPUS = [
+    {"name": "introduction", "kind": "single",
+     "turns": ["My name is Meg. Tell me what your job is, and what your name is."]},
+    {"name": "email", "kind": "single",
+     "turns": ["Draft a short thank-you email to the finance team for closing the quarter early."]},
+    {"name": "planning", "kind": "multi", "turns": [
+        "I have three meetings tomorrow morning and a report due at noon. How should I plan the day?",
+        "Move the report to the first slot and keep a 15-minute buffer between meetings.",
+        "Summarize the final plan as a bulleted list.",
+    ]},
+    {"name": "follow-up", "kind": "multi", "turns": [
+        "Remind me what makes a good status update for executives.",
+        "Write one for a project that is two weeks late because of a vendor delay.",
+    ]},
+    {"name": "project-budget", "kind": "tools",
+     "turns": ["What is the budget in the Phoenix project documents?"]},
+    {"name": "project-summary", "kind": "tools",
+     "turns": ["Summarize Phoenix_Project_Summary.txt for me.", "Which risks does the document list?"]},
+]
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --- 3. Replay ---
+async def run_conversation(engine, script, number, semaphore, recorder):
+    """Plays one scripted conversation, adding a record per turn to recorder."""
+    async with semaphore:
+        conversation = engine.conversation()
+        for turn, prompt in enumerate(script["turns"]):
+            record = {"conversation": number, "name": script.get("name"), "kind": script.get("kind"),
+                      "turn": turn, "error": None}
+            try:
+                async for _ in engine.reply(conversation, prompt):
+                    pass
+            except Exception as e:
+                record["error"] = error_label(e)
+            recorder.add(record, conversation.metrics[-1] if conversation.metrics else None)
+            if record["error"] is not None:
+                break
+
+
+async def replay(engine, corpus, concurrency, repeat, recorder):
+    semaphore = asyncio.Semaphore(concurrency)
+    scripts = [script for _ in range(repeat) for script in corpus]
+    started = time.perf_counter()
+    await asyncio.gather(*(run_conversation(engine, script, number, semaphore, recorder)
+                           for number, script in enumerate(scripts)))
+    return time.perf_counter() - started
+
+
+# --- 4. Report ---
+def print_report(summary, by_kind):
+    print(f"\n{summary['turns']} turns, {summary['errors']} errors ({summary['error_rate']:.1%}), "
+          f"{summary['turns_per_second']:.2f} turns/s over {summary['wall_seconds']:.1f} s")
+    print(f"{'metric':<20} {'p50':>9} {'p90':>9} {'p99':>9} {'mean':>9}")
+    for name in SUMMARY_METRICS:
+        stats = summary[name]
+        if not stats["count"]:
+            continue
+        scale = 1e-6 if name == "rss_bytes" else 1  # Memory in MB
+        cells = " ".join(f"{stats[key] * scale:>9.3f}" for key in ("p50", "p90", "p99", "mean"))
+        print(f"{name.replace('_bytes', '_mb'):<20} {cells}")
+    for kind, stats in sorted(by_kind.items()):
+        total = stats["total_seconds"]["p50"]
+        print(f"  {kind:<8} {stats['turns']:>4} turns, p50 total "
+              f"{'-' if total is None else f'{total:.3f} s'}, {stats['error_rate']:.1%} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a prompt corpus against Nexus and report latency.")
+    parser.add_argument("--corpus", help="JSON lines of {\"name\", \"kind\", \"turns\"}; default: built-in corpus.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Conversations in flight at once.")
+    parser.add_argument("--repeat", type=int, default=1, help="Times the corpus is replayed.")
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--json", help="Write settings, per-turn records and the summary here.")
+    stub = parser.add_argument_group("local stand-in (instead of the live API)")
+    stub.add_argument("--stub", action="store_true", help="Start the stand-in and point the client at it.")
+    stub.add_argument("--ttft", type=float, default=0.4)
+    stub.add_argument("--tokens-per-second", type=float, default=40.0)
+    stub.add_argument("--error-rate", type=float, default=0.0)
+    stub.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from nexus_client import BASE_URL_ENV, shared_client
+    from nexus_engine import ChatEngine
+    from nexus_tools import DOCUMENT_TOOLS, ToolRunner
+
+    corpus = load_corpus(args.corpus) if args.corpus else CORPUS
+    server = None
+    if args.stub:
+        server = start_stub_server(StubConfig(ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+                                              error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                              seed=0))
+        os.environ[BASE_URL_ENV] = server.base_url
+
+    try:
+        client = shared_client()
+    except Exception:
+        print("Error initializing the client. Check GEMINI_API_KEY environment variable.")
+        exit()
+
+    # Low temperature (0.3) keeps answers, and so their length, steady between runs.
+    # The response caches stay off: every turn goes to the model.
+    engine = ChatEngine(client, args.model, SYSTEM_INSTRUCTION, temperature=0.3,
+                        tool_runner=ToolRunner(DOCUMENT_TOOLS))
+    target = server.base_url if server else os.environ.get(BASE_URL_ENV) or "live API"
+    print(f"Replaying {len(corpus)} conversations x {args.repeat} against {args.model} ({target}), "
+          f"concurrency {args.concurrency}...")
+    settings = {key: value for key, value in vars(args).items() if key != "json"}
+    recorder = TimingRecorder(args.json, {**settings, "target": target, "corpus_size": len(corpus)})
+    try:
+        wall_seconds = asyncio.run(replay(engine, corpus, args.concurrency, args.repeat, recorder))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    records = recorder.records
+    summary = summarize(records, wall_seconds)
+    by_kind = {kind: summarize([record for record in records if record["kind"] == kind])
+               for kind in {record["kind"] for record in records}}
+    print_report(summary, by_kind)
+
+    if args.json:
+        path = recorder.write(wall_seconds, {"by_kind": by_kind})
+        print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
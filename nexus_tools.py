@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from nexus_dependencies import chunk_dependency, file_dependency
+from nexus_documents import DOCUMENT_ROOT
+from nexus_retrieval import get_retriever
+
+# --- Tool Execution ---
+# One model turn can ask for several function calls at once (three documents,
+# say). They do not depend on each other, so ToolRunner runs them side by side on
+# a bounded thread pool and hands the results back in the order of the calls,
+# ready to be sent back in one request. Every call gets its own timeout, counted
+# from the moment the turn's calls are submitted; a call that misses it is
+# answered with an error message so the model can carry on. Python threads can
+# not be killed, so a timed-out call keeps its worker until it returns, which is
+# why the pool is bounded. Each call's latency is logged to "nexus.tools" and
+# added up per tool in stats.
+#
+# A turn passes a set to run() / run_async(); the tools add the (filename, digest)
+# pairs of the documents they return to it through record_sources(), so the
+# answer can be cached against exactly those documents (nexus_dependencies.py).
+
+TOOL_WORKERS = int(os.environ.get("NEXUS_TOOL_WORKERS", "4"))
+TOOL_TIMEOUT_SECONDS = float(os.environ.get("NEXUS_TOOL_TIMEOUT", "30"))
+
+logger = logging.getLogger("nexus.tools")
+
+_sources = contextvars.ContextVar("nexus_tool_sources", default=None)
+
+
+def record_sources(dependencies):
+    """Adds document dependencies to the sources of the turn the calling tool runs for."""
+    sources = _sources.get()
+    if sources is not None:
+        sources.update(dependencies)
+
+
+class ToolRunner:
+    """Runs the function calls of one model turn concurrently.
+
+    tools maps a tool name to its Python function; timeouts optionally overrides
+    the timeout for single tools.
+    """
+
+    def __init__(self, tools, max_workers=TOOL_WORKERS, timeout=TOOL_TIMEOUT_SECONDS, timeouts=None):
+        self.tools = tools
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.stats = {}  # tool name -> {"calls", "seconds", "max_seconds", "timeouts", "errors"}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nexus-tool")
+
+    def _record(self, name, seconds, outcome=None):
+        with self._lock:
+            stats = self.stats.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                 "timeouts": 0, "errors": 0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            if outcome is not None:
+                stats[outcome] += 1
+
+    def _call(self, name, args):
+        started = time.perf_counter()
+        try:
+            result = self.tools[name](**args)
+        except Exception as e:
+            seconds = time.perf_counter() - started
+            self._record(name, seconds, "errors")
+            logger.warning("Tool %s failed after %.0f ms: %s", name, seconds * 1e3, e)
+            return f"An error occurred while running {name}: {e}"
+        seconds = time.perf_counter() - started
+        self._record(name, seconds)
+        logger.info("Tool %s took %.0f ms", name, seconds * 1e3)
+        return result
+
+    def _submit(self, name, args, sources):
+        context = contextvars.copy_context()
+        context.run(_sources.set, sources)
+        return self._executor.submit(context.run, self._call, name, dict(args or {}))
+
+    def _timed_out(self, name, timeout, submitted):
+        self._record(name, time.perf_counter() - submitted, "timeouts")
+        logger.warning("Tool %s timed out after %g s", name, timeout)
+        return f"Error: {name} did not finish within {timeout:g} seconds."
+
+    def run(self, calls, sources=None):
+        """Runs (name, args) pairs and returns their results in the same order.
+
+        The tools add the documents they used to sources, if given.
+        """
+        submitted = time.perf_counter()
+        futures = [self._submit(name, args, sources) if name in self.tools else None for name, args in calls]
+
+        results = []
+        for (name, _), future in zip(calls, futures):
+            if future is None:
+                results.append(f"Error: Unknown tool {name}")
+                continue
+            timeout = self.timeouts.get(name, self.timeout)
+            try:
+                results.append(future.result(timeout=max(0.0, submitted + timeout - time.perf_counter())))
+            except FutureTimeoutError:
+                future.cancel()  # Only helps while it is still queued
+                results.append(self._timed_out(name, timeout, submitted))
+        return results
+
+    async def run_async(self, calls, sources=None):
+        """Same as run() for a coroutine; the event loop stays free while the tools run."""
+        submitted = time.perf_counter()
+
+        async def call(name, args):
+            if name not in self.tools:
+                return f"Error: Unknown tool {name}"
+            timeout = self.timeouts.get(name, self.timeout)
+            future = self._submit(name, args, sources)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                future.cancel()
+                return self._timed_out(name, timeout, submitted)
+
+        return await asyncio.gather(*(call(name, args) for name, args in calls))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Document Tools ---
+# The functions the model can call in nexus_chat.py. Their signatures and
+# docstrings become the function declarations sent to the model.
+
+def read_project_document(filename: str) -> str:
+    """Reads the content of a project document from the local file system. 
+    Returns the content as a string.
+    """
+    base_path = DOCUMENT_ROOT  # Define the base directory for security
+    full_path = os.path.join(base_path, filename)
+    
+    # Safety check to ensure the file is in the expected directory
+    if not full_path.startswith(base_path):
+        return f"Error: Access denied. Cannot read file outside {base_path}."
+
+    try:
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        record_sources([file_dependency(filename, data)])
+        return data.decode('utf-8', errors='replace')
+    except FileNotFoundError:
+        return f"File '{filename}' not found in the project directory."
+    except Exception as e:
+        return f"An error occurred while reading the file: {e}"
+
+
+def search_project_documents(query: str, k: int = 5) -> str:
+    """Searches all project documents and returns the k most relevant passages 
+    (default 5, at most 10), each with its filename, chunk ID and byte offsets.
+    """
+    k = max(1, min(int(k), 10))
+    results = get_retriever().search(query, k)
+    if not results:
+        return json.dumps({"passages": [], "note": "No matching passages found in the project documents."})
+
+    record_sources(chunk_dependency(chunk) for chunk, _ in results)
+    passages = [
+        {
+            "filename": chunk.filename,
+            "chunk_id": chunk.chunk_id,
+            "start": chunk.start,
+            "end": chunk.end,
+            "heading": chunk.heading,
+            "score": round(score, 3),
+            "text": chunk.text,
+        }
+        for chunk, score in results
+    ]
+    return json.dumps({"passages": passages})
+
+
+# Tools the model may call, by name
+DOCUMENT_TOOLS = {
+    'search_project_documents': search_project_documents,
+    'read_project_document': read_project_document,
+}
@@ -0,0 +1,113 @@
+import numpy as np
+
+# --- Vector Index ---
+# Chunk embeddings live in one contiguous float32 matrix with unit-length rows, so
+# cosine similarity for a query is a single matrix-vector product over the used
+# rows, and the top-k comes from argpartition instead of a full sort. Several
+# queries are answered together with one matrix-matrix product.
+
+
+def normalize(vectors):
+    """Scales each row to unit length (all-zero rows are left as they are)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores, k):
+    """Returns (indices, scores) of the k largest entries per row, best first."""
+    count = scores.shape[1]
+    k = min(k, count)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0), dtype=np.float32)
+    if k < count:
+        candidates = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        candidates = np.broadcast_to(np.arange(count), scores.shape).copy()
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+class VectorIndex:
+    """Exact cosine-similarity search over a growable, contiguous float32 matrix.
+
+    Rows are addressed by caller-supplied keys (chunk IDs). Removing a key moves
+    the last row into its slot so the used rows stay contiguous.
+    """
+
+    def __init__(self, dimensions, capacity=1024):
+        self.dimensions = dimensions
+        self.matrix = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.keys = []
+        self.rows = {}  # key -> row number
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def vectors(self):
+        """The used rows of the matrix (a view, not a copy)."""
+        return self.matrix[:len(self.keys)]
+
+    def _reserve(self, extra):
+        needed = len(self.keys) + extra
+        if needed <= self.matrix.shape[0]:
+            return
+        capacity = max(needed, 2 * self.matrix.shape[0])
+        grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        grown[:len(self.keys)] = self.vectors
+        self.matrix = grown
+
+    def add(self, keys, vectors):
+        """Adds or replaces the rows for keys."""
+        vectors = normalize(vectors)
+        if vectors.shape != (len(keys), self.dimensions):
+            raise ValueError(f"expected {len(keys)} vectors of size {self.dimensions}, got {vectors.shape}")
+        fresh = [i for i, key in enumerate(keys) if key not in self.rows]
+        for i, key in enumerate(keys):
+            if key in self.rows:
+                self.matrix[self.rows[key]] = vectors[i]
+        self._reserve(len(fresh))
+        start = len(self.keys)
+        self.matrix[start:start + len(fresh)] = vectors[fresh]
+        for offset, i in enumerate(fresh):
+            self.rows[keys[i]] = start + offset
+            self.keys.append(keys[i])
+
+    def copy(self):
+        """An independent copy of the used rows and their keys."""
+        index = VectorIndex(self.dimensions, capacity=max(1, len(self.keys)))
+        index.matrix[:len(self.keys)] = self.vectors
+        index.keys = list(self.keys)
+        index.rows = dict(self.rows)
+        return index
+
+    def remove(self, keys):
+        """Drops the rows for keys; unknown keys are ignored."""
+        for key in keys:
+            row = self.rows.pop(key, None)
+            if row is None:
+                continue
+            last = len(self.keys) - 1
+            if row != last:
+                moved = self.keys[last]
+                self.matrix[row] = self.matrix[last]
+                self.keys[row] = moved
+                self.rows[moved] = row
+            self.keys.pop()
+
+    def search(self, queries, k=5):
+        """Returns, per query vector, up to k (key, score) pairs, best first."""
+        queries = normalize(queries)
+        if not self.keys:
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self.vectors.T if len(queries) > 1 else (self.vectors @ queries[0])[None, :]
+        indices, best = top_k(scores, k)
+        return [
+            [(self.keys[i], float(score)) for i, score in zip(row_indices, row_scores)]
+            for row_indices, row_scores in zip(indices, best)
+        ]
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import os
+import time
+
+from nexus_retrieval import get_retriever
+
+# --- Start-up Warm-up ---
+# The first question after start-up used to pay for more than the model: DNS,
+# TCP and TLS for the async client that streams the answer and for the sync one
+# that embeds the prompt, the SDK's lazy set-up on its first requests, and
+# mapping (or building) the retrieval index on the first search. warm_up() does
+# all of that in the background while the user reads the welcome message and
+# types: it looks up the chat model on both clients, which opens and checks the
+# connections (and the API key) without generating anything, and loads the
+# retriever. The pooled connections then stay open for the first real turn (see
+# nexus_client.py). Set NEXUS_WARMUP=0 to skip it.
+#
+# The async lookup must run on the event loop the engine uses, since the async
+# client belongs to the loop that first used it.
+
+WARMUP = os.environ.get("NEXUS_WARMUP", "1") != "0"
+
+logger = logging.getLogger("nexus.warmup")
+
+
+async def _timed(step):
+    started = time.perf_counter()
+    await step
+    return time.perf_counter() - started
+
+
+async def warm_up(client, model, index=True):
+    """Runs the warm-up steps side by side.
+
+    Returns {step: seconds} for "api" (async client), "sync_api" and, with
+    index, "index"; a failed step maps to its error message instead. Failures
+    are logged, not raised: the first turn reports them properly.
+    """
+    steps = {
+        "api": client.aio.models.get(model=model),
+        "sync_api": asyncio.to_thread(client.models.get, model=model),
+    }
+    if index:
+        steps["index"] = asyncio.to_thread(get_retriever)
+    outcomes = await asyncio.gather(*(_timed(step) for step in steps.values()), return_exceptions=True)
+
+    results = {}
+    for name, outcome in zip(steps, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning("Warm-up step %s failed: %s", name, outcome)
+            results[name] = f"{type(outcome).__name__}: {outcome}"
+        else:
+            results[name] = outcome
+    logger.info("Warm-up: %s", ", ".join(f"{name} {value * 1e3:.0f} ms" if isinstance(value, float)
+                                          else f"{name} failed" for name, value in results.items()))
+    return results
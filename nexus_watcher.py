@@ -0,0 +1,280 @@
+import collections
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from nexus_documents import DOCUMENT_EXTENSIONS, DOCUMENT_ROOT, MAX_CHUNK_BYTES, iter_document_files, load_document
+from nexus_retrieval import document_stats, update_documents
+
+# --- Incremental Re-indexing ---
+# Keeps the retriever in step with the document root without full rebuilds. A
+# watcher reports which files may have changed: inotify on Linux, otherwise a
+# poller that compares every file's mtime and size. The Reindexer thread then
+# re-chunks only the files whose (mtime, size) really differ from what is indexed,
+# drops the chunks of deleted files, and hands the batch to update_documents(),
+# which swaps in an updated retriever without blocking queries.
+#
+# Indexing lag is the time from a file's modification (or the detection of its
+# deletion) until the change is searchable.
+
+POLL_INTERVAL = float(os.environ.get("NEXUS_WATCH_INTERVAL", "2.0"))
+
+# Editors write in several steps; events are collected for this long before indexing.
+DEBOUNCE_SECONDS = 0.25
+
+logger = logging.getLogger("nexus.watcher")
+
+
+def scan(root=DOCUMENT_ROOT):
+    """filename -> (mtime_ns, size) of every indexable file under root."""
+    stats = {}
+    for filename, path in iter_document_files(root):
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue  # Deleted between listing and stat
+        stats[filename] = (info.st_mtime_ns, info.st_size)
+    return stats
+
+
+class PollingWatcher:
+    """Portable fallback: asks for a full rescan every interval seconds."""
+
+    def __init__(self, root, interval=POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._closed = threading.Event()
+
+    def wait(self, timeout):
+        """Blocks for up to timeout. Returns None (rescan everything) once per interval, else an empty set."""
+        if self._closed.wait(min(timeout, self.interval)):
+            return set()
+        return None
+
+    def close(self):
+        self._closed.set()
+
+
+# inotify(7) event flags
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK if hasattr(os, "O_NONBLOCK") else 0
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; followed by len bytes of name
+
+
+class InotifyWatcher:
+    """Linux inotify through ctypes, with one watch per directory under root.
+
+    Reports the changed filenames (relative to root). Directory events and queue
+    overflows ask for a full rescan instead, since they can hide file events.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}  # watch descriptor -> directory relative to root
+        self._add_tree(root)
+
+    def _add_tree(self, top):
+        for directory, subdirectories, _ in os.walk(top):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.directories[wd] = os.path.relpath(directory, self.root)
+
+    def wait(self, timeout):
+        """Blocks for up to timeout. Returns changed filenames, or None to rescan everything."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        changed, rescan = set(), False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b"\0")
+            offset += EVENT.size + length
+            if name.startswith(b"."):
+                continue  # Hidden entries, such as the saved index
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+            elif mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+            elif mask & IN_ISDIR or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = True  # Whole directories appeared or went away
+                if mask & (IN_CREATE | IN_MOVED_TO) and wd in self.directories:
+                    self._add_tree(os.path.join(self.root, self.directories[wd], os.fsdecode(name)))
+            elif wd in self.directories and os.fsdecode(name).lower().endswith(DOCUMENT_EXTENSIONS):
+                changed.add(os.path.normpath(os.path.join(self.directories[wd], os.fsdecode(name))))
+        return None if rescan else changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(root=DOCUMENT_ROOT):
+    """inotify where it is available, polling everywhere else."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as error:
+            logger.info("inotify unavailable (%s); polling %s instead", error, root)
+    return PollingWatcher(root)
+
+
+class Reindexer(threading.Thread):
+    """Background thread that applies file changes to the process-wide retriever.
+
+    stats holds the running totals: batches and files indexed, the lag of the
+    last batch and the worst lag seen, and the read + chunk time of recently
+    indexed files (apply_seconds is the embedding and index update of the last
+    batch as a whole).
+    """
+
+    def __init__(self, root=DOCUMENT_ROOT, watcher=None, debounce=DEBOUNCE_SECONDS, max_bytes=MAX_CHUNK_BYTES):
+        super().__init__(name="nexus-reindexer", daemon=True)
+        self.root = root
+        self.watcher = watcher
+        self.debounce = debounce
+        self.max_bytes = max_bytes
+        self.known = {}
+        self.started = None
+        self.ready = threading.Event()
+        self._stopped = threading.Event()
+        self.stats = {
+            "batches": 0,
+            "files": 0,
+            "last_lag_seconds": None,
+            "max_lag_seconds": 0.0,
+            "apply_seconds": None,
+            "file_seconds": collections.deque(maxlen=256),  # (filename, seconds)
+        }
+
+    def stop(self):
+        """Asks the thread to exit; it does within a second."""
+        self._stopped.set()
+
+    def run(self):
+        self.watcher = self.watcher or make_watcher(self.root)
+        self.started = time.time()
+        self.known = document_stats()
+        # Catch up with whatever changed while no process was watching
+        changed = None
+        while not self._stopped.is_set():
+            if changed is not None:
+                changed = self.watcher.wait(1.0)
+                if changed == set():
+                    continue
+            detected = time.time()
+            while changed is not None:
+                more = self.watcher.wait(self.debounce)
+                if more == set():
+                    break
+                changed = None if more is None else changed | more
+            try:
+                self.sync(changed, detected)
+                changed = set()
+            except Exception:
+                logger.exception("Re-indexing failed; retrying with a full rescan")
+                self.known = document_stats()
+                changed = None
+                self._stopped.wait(POLL_INTERVAL)
+            self.ready.set()
+        self.watcher.close()
+
+    def sync(self, filenames, detected):
+        """Re-indexes whichever of filenames (None: every file) differs from what is indexed."""
+        if filenames is None:
+            current = scan(self.root)
+            filenames = set(current) | set(self.known)
+        else:
+            current = {}
+            for filename in filenames:
+                try:
+                    info = os.stat(os.path.join(self.root, filename))
+                    current[filename] = (info.st_mtime_ns, info.st_size)
+                except OSError:
+                    pass
+
+        removed, chunks, stats, lags = [], [], {}, []
+        for filename in sorted(filenames):
+            stat = current.get(filename)
+            if stat == self.known.get(filename):
+                continue
+            if filename in self.known:
+                removed.append(filename)
+            if stat is None:
+                lags.append(detected)
+                continue
+            started = time.perf_counter()
+            try:
+                file_chunks = load_document(filename, os.path.join(self.root, filename), self.max_bytes)
+            except OSError:
+                continue  # Gone again; the next event or scan will drop it
+            self.stats["file_seconds"].append((filename, time.perf_counter() - started))
+            chunks.extend(file_chunks)
+            stats[filename] = stat
+            # Lag counts from the modification, or from startup for changes made before it
+            lags.append(min(detected, max(stat[0] / 1e9, self.started)))
+        if not removed and not stats:
+            return
+
+        started = time.perf_counter()
+        update_documents(removed, chunks, stats)
+        applied = time.time()
+        for filename in removed:
+            self.known.pop(filename, None)
+        self.known.update(stats)
+
+        lag = applied - min(lags)
+        self.stats.update({
+            "batches": self.stats["batches"] + 1,
+            "files": self.stats["files"] + len(set(removed) | set(stats)),
+            "last_lag_seconds": lag,
+            "max_lag_seconds": max(self.stats["max_lag_seconds"], lag),
+            "apply_seconds": time.perf_counter() - started,
+        })
+        logger.info("Re-indexed %d file(s), %d chunk(s), in %.0f ms; lag %.0f ms",
+                    len(set(removed) | set(stats)), len(chunks), self.stats["apply_seconds"] * 1e3, lag * 1e3)
+
+
+_reindexer = None
+_reindexer_lock = threading.Lock()
+
+
+def start_reindexer(root=DOCUMENT_ROOT):
+    """Starts the process-wide Reindexer (once) and returns it."""
+    global _reindexer
+    with _reindexer_lock:
+        if _reindexer is None:
+            _reindexer = Reindexer(root)
+            _reindexer.start()
+        return _reindexer